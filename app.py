@@ -9,6 +9,8 @@ from src.services.soul_link_service import SoulLinkService
 from src.services.echo_service import EchoService
 from src.services.badge_service import BadgeService
 from src.services.tribe_service import TribeService
+from src.services.feed_service import FeedService
+from src.services.trending_service import TrendingService
 
 st.set_page_config(
     page_title="VibeNet",
@@ -50,8 +52,7 @@ def display_badges(badges):
 
 def display_thought_card(thought):
     emotion = thought.get("emotion_tag", "Neutral")
-    author_id = thought.get("viber_id")
-    author = ViberService.get(author_id)
+    author = thought.get("author") or ViberService.get(thought.get("viber_id")) or {}
     aura_color = author.get("aura_color", "Neutral")
     st.markdown(f"<div class='card'>", unsafe_allow_html=True)
     st.markdown(f"**Author:** {author.get('username')}  | Aura: {aura_color}")
@@ -81,7 +82,7 @@ if menu == "Home":
 
 elif menu == "Feed":
     st.header("Feed")
-    thoughts = ThoughtService.list_recent(10)
+    thoughts = FeedService.recent(10)
     for t in thoughts:
         display_thought_card(t)
 
@@ -105,14 +106,12 @@ elif menu == "Profile":
     display_badges(user.get("badges", []))
     st.markdown("---")
     st.subheader("Your Thoughts")
-    thoughts = ThoughtService.list_recent(10)
-    for t in thoughts:
-        if t["viber_id"] == 1:
-            display_thought_card(t)
+    thoughts, _ = ThoughtService.list_by_viber(1, 10)
+    for t in FeedService.hydrate(thoughts):
+        display_thought_card(t)
 
 elif menu == "Trending":
     st.header("Trending Realms")
-    # Placeholder for trending (latest thoughts)
-    trending = ThoughtService.list_recent(5)
+    trending = FeedService.hydrate(TrendingService.trending_thoughts(5))
     for t in trending:
         display_thought_card(t)
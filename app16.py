@@ -1,4 +1,5 @@
 import streamlit as st
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
@@ -9,6 +10,16 @@ from src.services.post_service import PostService
 from src.services.badge_service import BadgeService
 from src.services.tribe_service import TribeService
 from src.services.echo_service import EchoService
+from src.services.feed_service import FeedService
+from src.services.reverberation_service import ReverberationService
+from src.services.trending_service import TrendingService
+from src.services.search_service import SearchService
+from src.services.aio import AsyncBadgeService, AsyncFeedService, AsyncStatsService
+from src.aio import run_all, run_page
+from src import instrumentation
+from src.singleflight import flights
+from src.cache import shared_cache
+from src.dao.projections import AUTH, AUTHOR_CARD, FEED_ITEM, PROFILE
 
 # ====== Page config ======
 st.set_page_config(page_title="VibeNet 🔮", page_icon="🔮", layout="wide", initial_sidebar_state="expanded")
@@ -118,9 +129,11 @@ def render_badges(badges: List[str]):
     for b in badges:
         st.markdown(f"<span class='badge-pill mini'>{b}</span>", unsafe_allow_html=True)
 
+FEED_PAGE_SIZE = 20
+
 def safe_get_user(viber_id: int) -> Dict:
     try:
-        return ViberService.dao.get_by_id(viber_id) or {}
+        return ViberService.get(viber_id, PROFILE) or {}
     except:
         return {}
 
@@ -129,31 +142,89 @@ def avatar_url(username: str):
     return f"https://api.dicebear.com/6.x/bottts/svg?seed={seed}"
 
 # ---------- Badge awarding helper ----------
-def award_badge(viber_id: int, badge_name: str) -> bool:
+def award_badges(event: str, **facts) -> List[str]:
     """
-    Safely award a badge to a viber (updates vibers.badges JSONB).
-    Returns True if awarded, False if already owned.
-    Raises Exception if badge doesn't exist or update fails.
+    Run the badge rules for an event by the signed-in viber.
+    Session badges are passed along so owned badges cost no write at all;
+    newly awarded badges are added to the session and notifications.
     """
-    # 1) ensure badge exists in badges table
-    badges_available = BadgeService.list() or []
-    badge_names = [b.get("name") for b in badges_available]
-    if badge_name not in badge_names:
-        raise Exception(f"Badge '{badge_name}' does not exist in badges table.")
-
-    # 2) fetch user
-    user = ViberService.dao.get_by_id(viber_id)
-    if not user:
-        raise Exception("User not found.")
-
-    current = user.get("badges", []) or []
-    if badge_name in current:
-        return False
-
-    updated = current + [badge_name]
-    # 3) update vibers table (assumes ViberService.dao.update(id, dict) exists)
-    ViberService.dao.update(viber_id, {"badges": updated})
-    return True
+    awarded = BadgeService.on_event(
+        st.session_state.viber_id, event, owned=st.session_state.viber_badges, **facts
+    )
+    for badge in awarded:
+        st.session_state.viber_badges = st.session_state.viber_badges + [badge]
+        st.session_state.notif.insert(0, f"🎉 You unlocked a badge: {badge}!")
+        st.success(f"🎉 Badge Unlocked: {badge}!")
+    return awarded
+
+def reset_feed():
+    """Forget the Feed's loaded pages; the next render starts again from the first page."""
+    st.session_state.feed_cursors = [None]
+    st.session_state.home_cursors = [None]
+    st.session_state.feed_pages = {"scope": None, "pages": []}
+
+# ---------- Reverberation threads ----------
+def render_reverberation(r: Dict, author: Dict, reply: bool = False):
+    indent = "margin-left:28px; " if reply else ""
+    st.markdown(
+        f"<div class='mini' style='{indent}margin-top:6px'><b>{author.get('username') or 'viber'}</b> "
+        f"<span class='muted'>{timeago(r.get('created_at'))}</span><br/>{r.get('content')}</div>",
+        unsafe_allow_html=True
+    )
+
+def post_reverberation(thought_id: int, content: str, parent_id: Optional[int] = None):
+    if not st.session_state.viber_id:
+        st.warning("Sign in first (sidebar).")
+        return
+    if not content.strip():
+        return
+    try:
+        ReverberationService.create(thought_id, st.session_state.viber_id, content.strip(), parent_id)
+        # The feed cards carry reverberation counts.
+        reset_feed()
+        st.rerun()
+    except ValueError as e:
+        st.error(str(e))
+
+def render_thread(thought_id: int):
+    """Top-level reverberations page by page, each with its first replies; the rest load on demand."""
+    cursors = st.session_state.thread_cursors.setdefault(thought_id, [None])
+    next_cursor = None
+    for cursor in cursors:
+        roots, next_cursor = ReverberationService.thread_page(thought_id, FEED_PAGE_SIZE, cursor)
+        # One author lookup for the page's roots and their first replies.
+        authors = ViberService.get_many(
+            [r.get("viber_id") for root in roots for r in [root] + root["replies"]], AUTHOR_CARD
+        )
+        for root in roots:
+            rid = root["reverberation_id"]
+            render_reverberation(root, authors.get(root.get("viber_id"), {}))
+            replies = root["replies"]
+            if (root.get("reply_count") or 0) > len(replies) and st.session_state.reply_cursors.get(rid) is None:
+                if st.button(f"View all {root['reply_count']} replies", key=f"replies-{rid}"):
+                    st.session_state.reply_cursors[rid] = [None]
+                    st.rerun()
+            reply_cursor = None
+            if rid in st.session_state.reply_cursors:
+                replies = []
+                for c in st.session_state.reply_cursors[rid]:
+                    page, reply_cursor = ReverberationService.replies_page(rid, FEED_PAGE_SIZE, c)
+                    replies.extend(page)
+                authors.update(ViberService.get_many([r.get("viber_id") for r in replies], AUTHOR_CARD))
+            for reply in replies:
+                render_reverberation(reply, authors.get(reply.get("viber_id"), {}), reply=True)
+            if reply_cursor and st.button("More replies", key=f"more-replies-{rid}"):
+                st.session_state.reply_cursors[rid].append(reply_cursor)
+                st.rerun()
+            text = st.text_input("Reply", key=f"reply-text-{rid}", label_visibility="collapsed", placeholder="Reply…")
+            if st.button("Reply", key=f"reply-{rid}"):
+                post_reverberation(thought_id, text, rid)
+    if next_cursor and st.button("More reverberations", key=f"more-thread-{thought_id}"):
+        cursors.append(next_cursor)
+        st.rerun()
+    text = st.text_input("Reverberate", key=f"rev-text-{thought_id}", placeholder="Add a reverberation…")
+    if st.button("Reverberate", key=f"rev-{thought_id}"):
+        post_reverberation(thought_id, text)
 
 # ====== Session state ======
 if "viber_username" not in st.session_state:
@@ -164,6 +235,16 @@ if "notif" not in st.session_state:
     st.session_state.notif = []
 if "viber_badges" not in st.session_state:
     st.session_state.viber_badges = []
+if "feed_cursors" not in st.session_state:
+    st.session_state.feed_cursors = [None]
+if "home_cursors" not in st.session_state:
+    st.session_state.home_cursors = [None]
+if "feed_pages" not in st.session_state:
+    st.session_state.feed_pages = {"scope": None, "pages": []}
+if "thread_cursors" not in st.session_state:
+    st.session_state.thread_cursors = {}
+if "reply_cursors" not in st.session_state:
+    st.session_state.reply_cursors = {}
 
 # ====== Auth page ======
 if st.session_state.viber_id is None:
@@ -173,7 +254,7 @@ if st.session_state.viber_id is None:
         username = st.text_input("Username", key="signin_user")
         password = st.text_input("Password", type="password", key="signin_pass")
         if st.button("Sign In"):
-            user = ViberService.dao.get_by_username(username)
+            user = ViberService.get_by_username(username, AUTH)
             if user and user.get("password") == password:
                 st.session_state.viber_id = user["viber_id"]
                 st.session_state.viber_username = user["username"]
@@ -191,7 +272,7 @@ if st.session_state.viber_id is None:
                 st.warning("Fill both fields")
             else:
                 try:
-                    v = ViberService.dao.create(username, f"{username}@example.com", password, "Violet")
+                    v = ViberService.register(username, f"{username}@example.com", password, "Violet")
                     st.session_state.viber_id = v["viber_id"]
                     st.session_state.viber_username = v["username"]
                     st.session_state.viber_badges = v.get("badges", []) or []
@@ -208,341 +289,442 @@ else:
             st.session_state.viber_id = None
             st.session_state.viber_username = None
             st.session_state.viber_badges = []
+            reset_feed()
             st.rerun()
         st.markdown("---")
-        selected = st.radio("Navigation", ["Dashboard","Feed","Create Thought","Create Post","Profile","Tribes","Trending"])
-
-    col_main, col_right = st.columns([3,1])
-
-    # ---------- LEFT COLUMN ----------
-    with col_main:
-        # ---------- DASHBOARD ----------
-        if selected == "Dashboard":
-            st.title("Dashboard — VibeNet 🔮")
-            st.markdown("<div class='card'><b>Welcome</b><div class='mini muted'>Your personal hub for vibes, tribes & trends</div></div>", unsafe_allow_html=True)
-            c1, c2, c3 = st.columns(3)
-            try:
-                total_vibers = len(ViberService.dao.list_all() or [])
-            except:
-                total_vibers = "?"
-            try:
-                total_thoughts = len(ThoughtService.list_recent(100) or [])
-            except:
-                total_thoughts = "?"
-            try:
-                total_tribes = len(TribeService.list() or [])
-            except:
-                total_tribes = "?"
-            c1.markdown(f"<div class='card'><div class='author'>{total_vibers}</div><div class='mini muted'>Vibers</div></div>", unsafe_allow_html=True)
-            c2.markdown(f"<div class='card'><div class='author'>{total_thoughts}</div><div class='mini muted'>Thoughts</div></div>", unsafe_allow_html=True)
-            c3.markdown(f"<div class='card'><div class='author'>{total_tribes}</div><div class='mini muted'>Tribes</div></div>", unsafe_allow_html=True)
-
-            st.markdown("<div class='card'><b>Recent Thoughts</b></div>", unsafe_allow_html=True)
-            try:
-                rec = ThoughtService.list_recent(6)
-                for t in rec:
-                    st.markdown("<div class='card'>", unsafe_allow_html=True)
-                    author = safe_get_user(t.get("viber_id"))
-                    st.markdown(f"<div class='author'>{author.get('username','Viber')}</div>", unsafe_allow_html=True)
-                    st.markdown(f"<div class='mini muted'>{timeago(t.get('created_at'))} • #{t.get('emotion_tag')}</div>", unsafe_allow_html=True)
-                    st.markdown(f"<div style='margin-top:8px'>{t.get('content')[:220]}</div>", unsafe_allow_html=True)
-                    st.markdown("</div>", unsafe_allow_html=True)
-            except:
-                st.info("No thoughts yet.")
-
-        # ---------- FEED ----------
-        elif selected == "Feed":
-            st.title("Feed — Latest Vibes")
-            search_q = st.text_input("Search thoughts", placeholder="Search content or username")
-            st.markdown("<div class='card'><b>Thoughts</b> — click an emotion to echo</div>", unsafe_allow_html=True)
-            try:
-                thoughts = ThoughtService.list_recent(50)
-                for t in thoughts:
-                    author = safe_get_user(t.get("viber_id"))
-                    st.markdown("<div class='card'>", unsafe_allow_html=True)
-                    st.markdown(
-                        f"<div style='display:flex; align-items:center'>"
-                        f"<img src='{avatar_url(author.get('username'))}' width='56' style='border-radius:12px; margin-right:12px'/>"
-                        f"<div><div class='author'>{author.get('username')}</div>"
-                        f"<div class='mini muted'>{timeago(t.get('created_at'))} • "
-                        f"<span class='{EMOTION_CLASS.get(t.get('emotion_tag','Neutral'))}'>#{t.get('emotion_tag')}</span></div></div></div>",
-                        unsafe_allow_html=True
-                    )
-                    st.markdown(f"<div style='margin-top:8px'>{t.get('content')}</div>", unsafe_allow_html=True)
-
-                    # Actions — Echo Buttons with Badge Unlocks
-                    c1, c2, c3 = st.columns([1,1,1])
-                    emotions = [("Joy","😊"), ("Curiosity","🤔"), ("Nostalgia","🌸")]
-                    cols = [c1, c2, c3]
-
-                    for i, (emotion, emoji) in enumerate(emotions):
-                        with cols[i]:
-                            key = f"{emotion}-{t['thought_id']}"
-                            if st.button(f"{emoji} {emotion}", key=key):
-                                if st.session_state.viber_id:
-                                    try:
-                                        EchoService.react(t["thought_id"], st.session_state.viber_id, emotion)
-                                        st.success(f"Echoed {emotion}!")
-
-                                        user = safe_get_user(st.session_state.viber_id)
-
-                                        # Badge awarding (use helper that updates vibers.badges)
-                                        badge_map = {
-                                            "Joy": "Joyful Viber",
-                                            "Curiosity": "Curious Mind",
-                                            "Nostalgia": "Nostalgic Soul",
-                                        }
-                                        badge_to_award = badge_map.get(emotion)
-                                        if badge_to_award and badge_to_award not in (user.get("badges") or []):
+        selected = st.radio("Navigation", ["Dashboard","Feed","Create Thought","Create Post","Profile","Tribes","Trending","Insights"])
+    # Counts this page's queries when VIBENET_INSTRUMENT=1 (no-op otherwise).
+    render = instrumentation.begin_render(selected)
+
+    try:
+        col_main, col_right = st.columns([3,1])
+
+        # ---------- LEFT COLUMN ----------
+        with col_main:
+            # ---------- DASHBOARD ----------
+            if selected == "Dashboard":
+                st.title("Dashboard — VibeNet 🔮")
+                st.markdown("<div class='card'><b>Welcome</b><div class='mini muted'>Your personal hub for vibes, tribes & trends</div></div>", unsafe_allow_html=True)
+                c1, c2, c3 = st.columns(3)
+                # Independent queries run concurrently; the page waits for the slowest one.
+                # Counts come from count queries (or maintained counters), cached briefly.
+                # The badge list warms the right column's cache.
+                page_data = run_page(
+                    counts=AsyncStatsService.counts(("vibers", "thoughts", "tribes")),
+                    recent=AsyncFeedService.recent(6),
+                    badges=AsyncBadgeService.list(),
+                )
+                counts = page_data["counts"] if isinstance(page_data["counts"], dict) else {}
+                total_vibers = counts.get("vibers", "?")
+                total_thoughts = counts.get("thoughts", "?")
+                total_tribes = counts.get("tribes", "?")
+                c1.markdown(f"<div class='card'><div class='author'>{total_vibers}</div><div class='mini muted'>Vibers</div></div>", unsafe_allow_html=True)
+                c2.markdown(f"<div class='card'><div class='author'>{total_thoughts}</div><div class='mini muted'>Thoughts</div></div>", unsafe_allow_html=True)
+                c3.markdown(f"<div class='card'><div class='author'>{total_tribes}</div><div class='mini muted'>Tribes</div></div>", unsafe_allow_html=True)
+
+                st.markdown("<div class='card'><b>Recent Thoughts</b></div>", unsafe_allow_html=True)
+                try:
+                    rec = page_data["recent"]
+                    if isinstance(rec, Exception):
+                        raise rec
+                    for t in rec:
+                        st.markdown("<div class='card'>", unsafe_allow_html=True)
+                        author = t["author"]
+                        st.markdown(f"<div class='author'>{author.get('username','Viber')}</div>", unsafe_allow_html=True)
+                        st.markdown(f"<div class='mini muted'>{timeago(t.get('created_at'))} • #{t.get('emotion_tag')}</div>", unsafe_allow_html=True)
+                        st.markdown(f"<div style='margin-top:8px'>{t.get('content')[:220]}</div>", unsafe_allow_html=True)
+                        st.markdown("</div>", unsafe_allow_html=True)
+                except:
+                    st.info("No thoughts yet.")
+
+            # ---------- FEED ----------
+            elif selected == "Feed":
+                st.title("Feed — Latest Vibes")
+                search_q = st.text_input("Search thoughts", placeholder="Search content or username")
+                scope = "Everyone"
+                if st.session_state.viber_id:
+                    scope = st.radio("Show", ["For you", "Everyone"], horizontal=True, key="feed_scope")
+                if st.button("🔄 Refresh"):
+                    reset_feed()
+                st.markdown("<div class='card'><b>Thoughts</b> — click an emotion to echo</div>", unsafe_allow_html=True)
+                try:
+                    # Loaded pages stay in the session, so a rerun or "Load more" only fetches the new page.
+                    thoughts, next_cursor = [], None
+                    if search_q.strip():
+                        # Served from the in-memory index; only the matching rows are fetched.
+                        thoughts = FeedService.hydrate(SearchService.search_thoughts(search_q, limit=50))
+                    else:
+                        # "For you" merges soul links and tribes from in-memory timelines.
+                        cursors = st.session_state.home_cursors if scope == "For you" else st.session_state.feed_cursors
+                        loaded = st.session_state.feed_pages
+                        if loaded["scope"] != scope or len(loaded["pages"]) > len(cursors):
+                            del cursors[1:]
+                            loaded = st.session_state.feed_pages = {"scope": scope, "pages": []}
+                        pending = cursors[len(loaded["pages"]):]
+                        # Usually just the newest cursor; after a reset the pages are fetched concurrently.
+                        if pending and scope == "For you":
+                            loaded["pages"].extend(run_all(*(AsyncFeedService.home(st.session_state.viber_id, FEED_PAGE_SIZE, c) for c in pending)))
+                        elif pending:
+                            loaded["pages"].extend(run_all(*(AsyncFeedService.page(FEED_PAGE_SIZE, c) for c in pending)))
+                        for page, next_cursor in loaded["pages"]:
+                            thoughts.extend(page)
+                    for t in thoughts:
+                        author = t["author"]
+                        st.markdown("<div class='card'>", unsafe_allow_html=True)
+                        st.markdown(
+                            f"<div style='display:flex; align-items:center'>"
+                            f"<img src='{avatar_url(author.get('username'))}' width='56' style='border-radius:12px; margin-right:12px'/>"
+                            f"<div><div class='author'>{author.get('username')}</div>"
+                            f"<div class='mini muted'>{timeago(t.get('created_at'))} • "
+                            f"<span class='{EMOTION_CLASS.get(t.get('emotion_tag','Neutral'))}'>#{t.get('emotion_tag')}</span> · {t.get('echoes') or 0} echoes"
+                            f" · {t.get('reverberation_count') or 0} reverberations</div></div></div>",
+                            unsafe_allow_html=True
+                        )
+                        st.markdown(f"<div style='margin-top:8px'>{t.get('content')}</div>", unsafe_allow_html=True)
+
+                        # Threads load only when opened; the count above comes with the page.
+                        if st.toggle(f"💬 Reverberations ({t.get('reverberation_count') or 0})", key=f"thread-{t['thought_id']}"):
+                            render_thread(t["thought_id"])
+
+                        # Actions — Echo Buttons with Badge Unlocks
+                        c1, c2, c3 = st.columns([1,1,1])
+                        emotions = [("Joy","😊"), ("Curiosity","🤔"), ("Nostalgia","🌸")]
+                        cols = [c1, c2, c3]
+
+                        for i, (emotion, emoji) in enumerate(emotions):
+                            with cols[i]:
+                                key = f"{emotion}-{t['thought_id']}"
+                                if st.button(f"{emoji} {emotion}", key=key):
+                                    if st.session_state.viber_id:
+                                        try:
+                                            # Buffered: written with the next batch flush, deduped in memory.
+                                            if not EchoService.enqueue(t["thought_id"], st.session_state.viber_id, emotion):
+                                                st.info(f"Already reacted with {emotion}")
+                                                continue
+                                            st.success(f"Echoed {emotion}!")
+
+                                            # Badge awarding (rules live in BadgeService.rules)
                                             try:
-                                                awarded = award_badge(user["viber_id"], badge_to_award)
-                                                if awarded:
-                                                    # Refresh session badges and push notification to top
-                                                    refreshed_user = ViberService.dao.get_by_id(user["viber_id"])
-                                                    st.session_state.viber_badges = refreshed_user.get("badges", []) or []
-                                                    st.session_state.notif.insert(0, f"🎉 You unlocked a badge: {badge_to_award}!")
-                                                    st.success(f"🎉 Badge Unlocked: {badge_to_award}!")
+                                                award_badges("echo", emotion=emotion)
                                             except Exception as e:
                                                 st.error(f"Could not award badge: {str(e)}")
 
-                                        # Add Echo notification
-                                        st.session_state.notif.insert(0, f"{user.get('username','You')} echoed a thought with {emotion} {emoji}")
+                                            # Add Echo notification
+                                            st.session_state.notif.insert(0, f"{st.session_state.viber_username or 'You'} echoed a thought with {emotion} {emoji}")
 
-                                        # Refresh UI
-                                        st.rerun()
+                                            # Refresh UI
+                                            st.rerun()
 
-                                    except Exception as e:
-                                        msg = str(e)
-                                        if "duplicate key" in msg:
-                                            st.info(f"Already reacted with {emotion}")
-                                        else:
-                                            st.error("Echo failed: " + msg)
-                                else:
-                                    st.warning("Sign in first (sidebar).")
-                    st.markdown("</div>", unsafe_allow_html=True)
-
-                if not thoughts:
-                    st.info("No thoughts found." if search_q else "No thoughts yet.")
-            except Exception as e:
-                st.error("Could not load Feed: " + str(e))
-
-        # ---------- CREATE THOUGHT ----------
-        elif selected == "Create Thought":
-            st.title("Share a Thought")
-            with st.form("thought_form"):
-                username = st.text_input("Your username (existing)", value=st.session_state.viber_username or "")
-                content = st.text_area("Your thought...", height=150)
-                emotion = st.selectbox("Emotion", ["Joy","Curiosity","Nostalgia","Rage"], index=0)
-                submitted = st.form_submit_button("Share")
-                if submitted:
-                    if not content.strip():
-                        st.warning("Write something first.")
-                    else:
-                        try:
-                            user = safe_get_user(st.session_state.viber_id)
-                            ThoughtService.create(user["viber_id"], content, emotion)
-                            st.success("Thought shared ✨")
-                            st.rerun()
-                        except Exception as e:
-                            st.error("Could not create thought: " + str(e))
-
-        # ---------- CREATE POST ----------
-        elif selected == "Create Post":
-            st.title("Create a Post")
-            with st.form("post_form"):
-                username = st.text_input(
-                    "Your username (existing)",
-                    value=st.session_state.viber_username or "",
-                    key="post_user"
-                )
-                content = st.text_area("Post content...", height=150)
-                submitted = st.form_submit_button("Publish")
+                                        except Exception as e:
+                                            msg = str(e)
+                                            if "duplicate key" in msg:
+                                                st.info(f"Already reacted with {emotion}")
+                                            else:
+                                                st.error("Echo failed: " + msg)
+                                    else:
+                                        st.warning("Sign in first (sidebar).")
+                        st.markdown("</div>", unsafe_allow_html=True)
 
-                if submitted:
-                    if not content.strip():
-                        st.warning("Write something first.")
-                    else:
-                        try:
-                            user = ViberService.dao.get_by_username(username)
-                            if not user:
-                                st.error("User not found.")
-                            else:
-                                # Create post
-                                PostService.create(user["viber_id"], content)
-                                st.success("Post published 🎉")
+                    if not thoughts:
+                        st.info("No thoughts found." if search_q else "No thoughts yet.")
+                    elif next_cursor and st.button("Load more"):
+                        cursors.append(next_cursor)
+                        st.rerun()
+                except Exception as e:
+                    st.error("Could not load Feed: " + str(e))
+
+            # ---------- CREATE THOUGHT ----------
+            elif selected == "Create Thought":
+                st.title("Share a Thought")
+                with st.form("thought_form"):
+                    username = st.text_input("Your username (existing)", value=st.session_state.viber_username or "")
+                    content = st.text_area("Your thought...", height=150)
+                    emotion = st.selectbox("Emotion", ["Joy","Curiosity","Nostalgia","Rage"], index=0)
+                    submitted = st.form_submit_button("Share")
+                    if submitted:
+                        if not content.strip():
+                            st.warning("Write something first.")
+                        else:
+                            try:
+                                ThoughtService.create(st.session_state.viber_id, content, emotion)
+                                reset_feed()
+                                st.success("Thought shared ✨")
+                                st.rerun()
+                            except Exception as e:
+                                st.error("Could not create thought: " + str(e))
+
+            # ---------- CREATE POST ----------
+            elif selected == "Create Post":
+                st.title("Create a Post")
+                with st.form("post_form"):
+                    username = st.text_input(
+                        "Your username (existing)",
+                        value=st.session_state.viber_username or "",
+                        key="post_user"
+                    )
+                    content = st.text_area("Post content...", height=150)
+                    submitted = st.form_submit_button("Publish")
+
+                    if submitted:
+                        if not content.strip():
+                            st.warning("Write something first.")
+                        else:
+                            try:
+                                user = ViberService.get_by_username(username, AUTHOR_CARD)
+                                if not user:
+                                    st.error("User not found.")
+                                else:
+                                    # Create post
+                                    PostService.create(user["viber_id"], content)
+                                    st.success("Post published 🎉")
                                 
 
 
 
-                                # Award badge if not already owned (Social Viber)
-                                user_badges = user.get("badges", []) or []
-                                if "Explorer" not in user_badges:
-                                    try:
-                                        awarded = award_badge(user["viber_id"], "Explorer")
-                                        if awarded:
-                                            # Refresh user badges from DAO
-                                            refreshed = ViberService.dao.get_by_id(user["viber_id"])
-                                            st.session_state.viber_badges = refreshed.get("badges", []) or []
-                                            # Add notification at the TOP
-                                            st.session_state.notif.insert(0, "🎉 You unlocked a badge: Explorer!")
-                                            st.success("🎉 Badge Unlocked: Explorer!")
-                                    except Exception as e:
-                                        st.error(f"Could not award badge: {str(e)}")
-                                else:
-                                    st.session_state.viber_badges = user_badges
+                                    # Award first-post badges (Explorer) if not already owned
+                                    if user["viber_id"] == st.session_state.viber_id:
+                                        try:
+                                            award_badges("post", vibe_level=user.get("vibe_level"))
+                                        except Exception as e:
+                                            st.error(f"Could not award badge: {str(e)}")
 
-                                st.rerun()
-                        except Exception as e:
-                            st.error(f"Error creating post: {str(e)}")
-
-        # ---------- PROFILE ----------
-        elif selected == "Profile":
-            st.title("Profile")
-            if not st.session_state.viber_id:
-                st.info("Sign in to view profile.")
-            else:
-                user = safe_get_user(st.session_state.viber_id)
-                if not user:
-                    st.error("Profile not found.")
+                                    st.rerun()
+                            except Exception as e:
+                                st.error(f"Error creating post: {str(e)}")
+
+            # ---------- PROFILE ----------
+            elif selected == "Profile":
+                st.title("Profile")
+                if not st.session_state.viber_id:
+                    st.info("Sign in to view profile.")
                 else:
-                    st.markdown("<div class='card'>", unsafe_allow_html=True)
-                    col_a, col_b = st.columns([1,3])
-                    with col_a:
-                        st.image(avatar_url(user.get("username","viber")), width=140)
-                    with col_b:
-                        st.markdown(f"<div class='author'>{user.get('username')}</div>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"<div class='mini muted'>Aura: <b>{user.get('aura_color')}</b> • Vibe: <b>{user.get('vibe_level','Novice')}</b></div>",
-                            unsafe_allow_html=True
-                        )
+                    user = safe_get_user(st.session_state.viber_id)
+                    if not user:
+                        st.error("Profile not found.")
+                    else:
+                        st.markdown("<div class='card'>", unsafe_allow_html=True)
+                        col_a, col_b = st.columns([1,3])
+                        with col_a:
+                            st.image(avatar_url(user.get("username","viber")), width=140)
+                        with col_b:
+                            st.markdown(f"<div class='author'>{user.get('username')}</div>", unsafe_allow_html=True)
+                            st.markdown(
+                                f"<div class='mini muted'>Aura: <b>{user.get('aura_color')}</b> • Vibe: <b>{user.get('vibe_level','Novice')}</b></div>",
+                                unsafe_allow_html=True
+                            )
 
-                        st.markdown("<div style='margin-top:8px'>Badges:</div>", unsafe_allow_html=True)
-                        # prefer session badges if available so profile updates instantly
-                        render_badges(st.session_state.get("viber_badges", user.get("badges", []) or []))
+                            st.markdown("<div style='margin-top:8px'>Badges:</div>", unsafe_allow_html=True)
+                            # prefer session badges if available so profile updates instantly
+                            render_badges(st.session_state.get("viber_badges", user.get("badges", []) or []))
 
-                        new_aura = st.selectbox(
-                            "Change Aura Color",
-                            ["Neutral","Violet","Blue","Gold","Rose","Crimson"],
-                            index=["Neutral","Violet","Blue","Gold","Rose","Crimson"].index(user.get("aura_color","Neutral"))
-                        )
-                        if st.button("Save Aura"):
-                            try:
-                                ViberService.dao.update(user["viber_id"], {"aura_color": new_aura})
-                                st.success("Aura updated ✨")
-                                st.rerun()
-                            except Exception as e:
-                                st.error("Could not update aura: " + str(e))
-                    st.markdown("</div>", unsafe_allow_html=True)
+                            new_aura = st.selectbox(
+                                "Change Aura Color",
+                                ["Neutral","Violet","Blue","Gold","Rose","Crimson"],
+                                index=["Neutral","Violet","Blue","Gold","Rose","Crimson"].index(user.get("aura_color","Neutral"))
+                            )
+                            if st.button("Save Aura"):
+                                try:
+                                    ViberService.dao.update(user["viber_id"], {"aura_color": new_aura})
+                                    st.success("Aura updated ✨")
+                                    st.rerun()
+                                except Exception as e:
+                                    st.error("Could not update aura: " + str(e))
+                        st.markdown("</div>", unsafe_allow_html=True)
 
            
-        elif selected == "Tribes":
-            st.title("Tribes — Join your crew")
-            left, right = st.columns([2,1])
-            with left:
-                tribes = TribeService.list() or []
-                if not tribes: st.info("No tribes available yet. Start one soon!")
-                for t in tribes:
-                    st.markdown("<div class='card'>", unsafe_allow_html=True)
-                    st.markdown(f"<div class='author'>{t.get('name')}</div>", unsafe_allow_html=True)
-                    st.markdown(f"<div class='mini muted'>{t.get('description')}</div>", unsafe_allow_html=True)
-                    if st.button("Join Tribe", key=f"join-{t.get('tribe_id')}"):
-                        if st.session_state.viber_id:
+            elif selected == "Tribes":
+                st.title("Tribes — Join your crew")
+                left, right = st.columns([2,1])
+                with left:
+                    # Member counts and the "joined" flag come back with the tribes in one query.
+                    tribes = TribeService.list_for_viber(st.session_state.viber_id) or []
+                    if not tribes: st.info("No tribes available yet. Start one soon!")
+                    for t in tribes:
+                        st.markdown("<div class='card'>", unsafe_allow_html=True)
+                        st.markdown(f"<div class='author'>{t.get('name')}</div>", unsafe_allow_html=True)
+                        st.markdown(f"<div class='mini muted'>{t.get('description')}</div>", unsafe_allow_html=True)
+                        st.markdown(f"<div class='mini muted'>👥 {t.get('member_count') or 0} members</div>", unsafe_allow_html=True)
+                        if t.get('is_member'):
+                            st.markdown("<div class='mini'>✅ Joined</div>", unsafe_allow_html=True)
+                        elif st.button("Join Tribe", key=f"join-{t.get('tribe_id')}"):
                             try:
-                                TribeService.join(st.session_state.viber_id, t.get('tribe_id'))
-                                st.success(f"🎉 You joined {t.get('name')}!")
-                                st.session_state.notif.insert(0,f"🎉 Joined tribe {t.get('name')}")
-                                try: award_badge(st.session_state.viber_id,"Tribe Member")
-                                except: pass
+                                if TribeService.join(st.session_state.viber_id, t.get('tribe_id')):
+                                    st.success(f"🎉 You joined {t.get('name')}!")
+                                    st.session_state.notif.insert(0,f"🎉 Joined tribe {t.get('name')}")
+                                    try: award_badges("tribe_join")
+                                    except: pass
                                 st.rerun()
                             except Exception as e:
                                 st.error("Could not join tribe: " + str(e))
-                        else: st.warning("Sign in first.")
-                    st.markdown("</div>", unsafe_allow_html=True)
-            with right:
-                st.markdown("<div class='card'><b>Create Tribe</b></div>", unsafe_allow_html=True)
-                with st.form("new_tribe"):
-                    name = st.text_input("Tribe name")
-                    desc = st.text_area("Short description", height=120)
-                    submitted = st.form_submit_button("Create")
-                    if submitted:
-                        if not name.strip(): st.warning("Provide a tribe name.")
-                        else:
-                            try:
-                                TribeService.create(name, desc)
-                                st.success("✨ Tribe created successfully!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error("Failed to create tribe: " + str(e))
+                        st.markdown("</div>", unsafe_allow_html=True)
+                with right:
+                    st.markdown("<div class='card'><b>Create Tribe</b></div>", unsafe_allow_html=True)
+                    with st.form("new_tribe"):
+                        name = st.text_input("Tribe name")
+                        desc = st.text_area("Short description", height=120)
+                        submitted = st.form_submit_button("Create")
+                        if submitted:
+                            if not name.strip(): st.warning("Provide a tribe name.")
+                            else:
+                                try:
+                                    TribeService.create(name, desc)
+                                    st.success("✨ Tribe created successfully!")
+                                    st.rerun()
+                                except Exception as e:
+                                    st.error("Failed to create tribe: " + str(e))
         
         
-        # ---------- TRENDING ----------
-        elif selected == "Trending":
-            st.title("Trending — Hot Vibes 🔥")
-            col_main, col_side = st.columns([3,1])
+            # ---------- TRENDING ----------
+            elif selected == "Trending":
+                st.title("Trending — Hot Vibes 🔥")
+                col_main, col_side = st.columns([3,1])
 
-    # ----- LEFT: Top Thoughts -----
-            with col_main:
+                with col_side:
+                    trend_emotion = st.radio("Emotion", ["All","Joy","Curiosity","Nostalgia","Rage"], key="trend_emotion")
+
+        # ----- LEFT: Top Thoughts -----
+                with col_main:
                 
-            # Fetch recent thoughts
-                    thoughts = ThoughtService.list_recent(3) or []
-                    if not thoughts:
-                        st.info("No trending thoughts yet. Start sharing vibes!")
+                # Precomputed time-decayed ranking (echoes, reverberations, recency)
+                        trending_thoughts = TrendingService.trending_thoughts(
+                            10, emotion=None if trend_emotion == "All" else trend_emotion, columns=FEED_ITEM
+                        )
+                        if not trending_thoughts:
+                            st.info("No trending thoughts yet. Start sharing vibes!")
+                        else:
+                            for t in FeedService.hydrate(trending_thoughts):
+                                author = t["author"]
+                                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                                st.markdown(
+                                    f"<div style='display:flex; align-items:center'>"
+                                    f"<img src='{avatar_url(author.get('username'))}' width='48' style='border-radius:12px; margin-right:12px'/>"
+                                    f"<div><div class='author'>{author.get('username')}</div>"
+                                    f"<div class='mini muted'>{timeago(t.get('created_at'))} • "
+                                    f"<span class='{EMOTION_CLASS.get(t.get('emotion_tag','Neutral'))}'>#{t.get('emotion_tag')}</span> • "
+                                    f"🔥 {t.get('trend_score',0)}</div></div></div>",
+                                    unsafe_allow_html=True
+                                )
+                                st.markdown(f"<div style='margin-top:6px'>{t.get('content')[:250]}</div>", unsafe_allow_html=True)
+
+            # ---------- INSIGHTS ----------
+            elif selected == "Insights":
+                st.title("Insights — Emotional Pulse 📊")
+                try:
+                    from src.services.analytics_service import EMOTIONS, AnalyticsService
+                except ImportError:
+                    st.error("Insights need NumPy: pip install numpy")
+                else:
+                    c1, c2, c3 = st.columns(3)
+                    kind = c1.radio("Emotions of", ["echoes","thoughts"], horizontal=True, key="ins_kind")
+                    bucket = c2.selectbox("Per", ["hour","day","week"], index=1, key="ins_bucket")
+                    days = c3.selectbox("Window", [7, 30, 90, 365], index=1, format_func=lambda d: f"last {d} days", key="ins_days")
+                    since = datetime.now().timestamp() - days * 86400
+
+                    # The first view after a restart (or TTL expiry) loads in the background, not in this request.
+                    if not AnalyticsService.ready():
+                        st.info("Crunching the latest emotions… this page refreshes when they are ready.")
+                        time.sleep(2)
+                        st.rerun()
+                    timeline = AnalyticsService.distribution_over_time(kind, bucket, since)
+                    if not any(r["total"] for r in timeline):
+                        st.info("No emotions in this window yet. Echo some thoughts!")
                     else:
-                # Sort by echo_count (most reactions first)
-                        trending_thoughts = sorted(thoughts, key=lambda t: t.get("echo_count", 0), reverse=True)[:3]
-
-                        for t in trending_thoughts:
-                            author = safe_get_user(t.get("viber_id"))
-                            st.markdown("<div class='card'>", unsafe_allow_html=True)
+                        st.markdown("<div class='card'><b>Emotions over time</b></div>", unsafe_allow_html=True)
+                        st.bar_chart(timeline, x="start", y=list(EMOTIONS))
+
+                        mood = AnalyticsService.mood_shift(kind, bucket, since)
+                        st.markdown("<div class='card'><b>Mood mix</b><div class='mini muted'>Share of each emotion per active period</div></div>", unsafe_allow_html=True)
+                        st.line_chart(mood, x="start", y=list(EMOTIONS))
+                        biggest = max(mood, key=lambda m: m["shift"])
+                        if biggest["shift"] > 0:
                             st.markdown(
-                                f"<div style='display:flex; align-items:center'>"
-                                f"<img src='{avatar_url(author.get('username'))}' width='48' style='border-radius:12px; margin-right:12px'/>"
-                                f"<div><div class='author'>{author.get('username')}</div>"
-                                f"<div class='mini muted'>{timeago(t.get('created_at'))} • "
-                                f"<span class='{EMOTION_CLASS.get(t.get('emotion_tag','Neutral'))}'>#{t.get('emotion_tag')}</span> • "
-                                f"{t.get('echo_count',0)} echoes</div></div></div>",
+                                f"<div class='mini muted'>Biggest mood shift: {timeago(biggest['start'])} — "
+                                f"{biggest['rising']} ↑, {biggest['falling']} ↓ ({int(biggest['shift'] * 100)}% of the mix moved)</div>",
                                 unsafe_allow_html=True
                             )
-                            st.markdown(f"<div style='margin-top:6px'>{t.get('content')[:250]}</div>", unsafe_allow_html=True)
+
+                        left, right = st.columns(2)
+                        with left:
+                            st.markdown("<div class='card'><b>Top emotional influencers</b></div>", unsafe_allow_html=True)
+                            influencers = AnalyticsService.top_influencers(10, since=since)
+                            vibers = ViberService.get_many([i["viber_id"] for i in influencers], AUTHOR_CARD)
+                            for i in influencers:
+                                name = vibers.get(i["viber_id"], {}).get("username", f"viber {i['viber_id']}")
+                                st.markdown(
+                                    f"<div class='author'>{name}</div>"
+                                    f"<div class='mini muted'>{i['echoes']} echoes from {i['reach']} vibers • mostly "
+                                    f"<span class='{EMOTION_CLASS.get(i['dominant'])}'>#{i['dominant']}</span> • "
+                                    f"{int(i['resonance'] * 100)}% resonance</div>",
+                                    unsafe_allow_html=True
+                                )
+                        with right:
+                            st.markdown("<div class='card'><b>Tribe moods</b></div>", unsafe_allow_html=True)
+                            names = {t["tribe_id"]: t.get("name") for t in TribeService.list() or []}
+                            st.dataframe([{"tribe": names.get(r["tribe_id"], r["tribe_id"]), **{e: r[e] for e in EMOTIONS}}
+                                          for r in AnalyticsService.distribution_by_tribe(kind, since)[:10]], hide_index=True)
+                            mine = AnalyticsService.distribution_by_viber([st.session_state.viber_id], kind, since=since)[0]
+                            st.markdown("<div class='card'><b>Your vibe</b></div>", unsafe_allow_html=True)
+                            st.bar_chart({e: [mine[e]] for e in EMOTIONS})
 
                     
-    # ---------- RIGHT COLUMN ----------
+        # ---------- RIGHT COLUMN ----------
   
-    with col_right:
-    # ----- Notifications Card -----
-        st.markdown("<div class='card'><b>Notifications</b></div>", unsafe_allow_html=True)
-        notifs = st.session_state.get("notif", [])
-
-        if not notifs:
-            st.markdown("<div class='mini muted'>No notifications</div>", unsafe_allow_html=True)
-        else:
-            for n in notifs:
-                cls = "notif-item notif-new"  # Neon applied to ALL notifications
-                st.markdown(f"<div class='{cls}'>{n}</div>", unsafe_allow_html=True)
-
-        st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
-
-    # ----- Badges Card -----
-        st.markdown("<div class='card'><b>Badges</b><div class='mini muted'>Create & view badges</div></div>", unsafe_allow_html=True)
-        badges = BadgeService.list() or []
-
-        if not badges:
-            st.markdown("<div class='mini muted'>No badges yet</div>", unsafe_allow_html=True)
-        else:
-            for b in badges:
-                st.markdown(
-                    f"<div><b>{b.get('name')}</b>"
-                    f"<div class='mini muted'>{b.get('description')}</div></div>",
-                    unsafe_allow_html=True
-                )
+        with col_right:
+        # ----- Notifications Card -----
+            st.markdown("<div class='card'><b>Notifications</b></div>", unsafe_allow_html=True)
+            notifs = st.session_state.get("notif", [])
 
-        st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
+            if not notifs:
+                st.markdown("<div class='mini muted'>No notifications</div>", unsafe_allow_html=True)
+            else:
+                for n in notifs:
+                    cls = "notif-item notif-new"  # Neon applied to ALL notifications
+                    st.markdown(f"<div class='{cls}'>{n}</div>", unsafe_allow_html=True)
 
-    # ----- Quick Tips Card -----
-        st.markdown(
-            "<div class='card'><b>Quick Tips</b>"
-            "<div class='mini muted'>Use demo account; change aura; join tribes!</div></div>",
-            unsafe_allow_html=True
-        )
+            st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
+
+        # ----- Badges Card -----
+            st.markdown("<div class='card'><b>Badges</b><div class='mini muted'>Create & view badges</div></div>", unsafe_allow_html=True)
+            badges = BadgeService.list() or []
 
+            if not badges:
+                st.markdown("<div class='mini muted'>No badges yet</div>", unsafe_allow_html=True)
+            else:
+                for b in badges:
+                    st.markdown(
+                        f"<div><b>{b.get('name')}</b>"
+                        f"<div class='mini muted'>{b.get('description')}</div></div>",
+                        unsafe_allow_html=True
+                    )
 
+            st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
+
+        # ----- Quick Tips Card -----
+            st.markdown(
+                "<div class='card'><b>Quick Tips</b>"
+                "<div class='mini muted'>Use demo account; change aura; join tribes!</div></div>",
+                unsafe_allow_html=True
+            )
+    finally:
+        # Also runs when st.rerun() cuts the script short, so the render context never leaks.
+        last = instrumentation.end_render(render)
+
+    # ---------- DEBUG PANEL (VIBENET_INSTRUMENT=1) ----------
+    if render is not None:
+        snap = instrumentation.snapshot()
+        instrumentation.dump()
+        with st.sidebar.expander("🛠 Debug: queries"):
+            st.markdown(f"<div class='mini'>This render: <b>{last['queries']}</b> queries, {last['ms']} ms</div>", unsafe_allow_html=True)
+            st.dataframe([
+                {"query": k, "count": q["count"], "mean ms": q["mean_ms"], "p95 ms": q["p95_ms"],
+                 "max ms": q["max_ms"], "rows": q["rows"], "KB in": round(q["bytes_in"] / 1024, 1)}
+                for k, q in snap["queries"].items()
+            ], hide_index=True)
+            st.dataframe([{"page": p, "renders": r["count"], "mean ms": r["mean_ms"], "queries": r["mean_queries"]}
+                          for p, r in snap["renders"].items()], hide_index=True)
+            flight = flights.stats()
+            st.dataframe([{"cache": name, "hits": c["hits"], "misses": c["misses"], "size": c["size"], "ttl s": c["ttl"]}
+                          for name, c in shared_cache.stats().items()], hide_index=True)
+            st.markdown(f"<div class='mini muted'>Single-flight: {flight['collapsed']} of {flight['calls']} reads collapsed</div>", unsafe_allow_html=True)
+            for e in reversed(snap["slow_queries"][-5:]):
+                st.markdown(f"<div class='mini muted'>🐢 {e['ms']} ms {e['query']} ({e['dao']})</div>", unsafe_allow_html=True)
@@ -0,0 +1,88 @@
+"""Emotion analytics over a synthetic export: load once, then time each report.
+
+    python -m benchmarks.bench_analytics --echoes 1000000
+
+Writes echoes, thoughts and memberships as .vnc files to a temp directory,
+loads them with AnalyticsService (source=<dir>) and reports the best of
+--repeat runs per report. Needs NumPy.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from src.columnar import ColumnarWriter
+from src.services.analytics_service import EMOTIONS, AnalyticsService
+from src.storage.schema import TABLES
+
+
+def write_export(out_dir: str, n_echoes: int, n_thoughts: int, n_vibers: int, n_tribes: int, days: int):
+    now = time.time()
+
+    def write(table: str, rows):
+        columns = [(c, TABLES[table]["columns"][c]) for c in rows[0]]
+        with ColumnarWriter(f"{out_dir}/{table}.vnc", columns, codec="none") as w:
+            w.write_rows(rows)
+
+    write("thoughts", [
+        {"thought_id": i, "viber_id": random.randint(1, n_vibers), "emotion_tag": random.choice(EMOTIONS),
+         "created_at": now - random.random() * days * 86400}
+        for i in range(1, n_thoughts + 1)
+    ])
+    write("echoes", [
+        {"thought_id": random.randint(1, n_thoughts), "viber_id": random.randint(1, n_vibers),
+         "emotion_tag": random.choice(EMOTIONS), "created_at": now - random.random() * days * 86400}
+        for _ in range(n_echoes)
+    ])
+    write("viber_tribes", [{"viber_id": v, "tribe_id": random.randint(1, n_tribes)} for v in range(1, n_vibers + 1)])
+
+
+def best_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--echoes", type=int, default=1_000_000)
+    parser.add_argument("--thoughts", type=int, default=200_000)
+    parser.add_argument("--vibers", type=int, default=50_000)
+    parser.add_argument("--tribes", type=int, default=200)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    out_dir = tempfile.mkdtemp(prefix="vibenet-analytics-")
+    try:
+        start = time.perf_counter()
+        write_export(out_dir, args.echoes, args.thoughts, args.vibers, args.tribes, args.days)
+        print(f"wrote export in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        AnalyticsService.load(out_dir)
+        print(f"loaded {args.echoes} echoes in {time.perf_counter() - start:.1f}s\n")
+
+        reports = {
+            "timeline (day)": lambda: AnalyticsService.distribution_over_time("echoes", "day", source=out_dir),
+            "timeline (hour)": lambda: AnalyticsService.distribution_over_time("echoes", "hour", source=out_dir),
+            "mood shift": lambda: AnalyticsService.mood_shift("echoes", "day", source=out_dir),
+            "by tribe": lambda: AnalyticsService.distribution_by_tribe("echoes", source=out_dir),
+            "by viber (top 20)": lambda: AnalyticsService.distribution_by_viber(source=out_dir),
+            "influencers": lambda: AnalyticsService.top_influencers(10, source=out_dir),
+            "influencers (Joy)": lambda: AnalyticsService.top_influencers(10, "Joy", source=out_dir),
+        }
+        print(f"{'report':<20} {'ms':>8}")
+        for name, fn in reports.items():
+            print(f"{name:<20} {best_ms(fn, args.repeat):>8.1f}")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Search latency over a synthetic corpus, without touching the DB.
+
+    python -m benchmarks.bench_search --thoughts 300000
+"""
+import argparse
+import random
+import time
+
+from src.services.search_service import SearchService
+
+EMOTIONS = ["Joy", "Curiosity", "Nostalgia", "Rage"]
+QUERIES = ["sunset", "sun", "coffee rain", "viber7", "viber7 joy", "joy", "w12", "joy w12"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--thoughts", type=int, default=300_000)
+    parser.add_argument("--vibers", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    words = [f"w{i}" for i in range(20_000)] + ["sunset", "sunrise", "coffee", "rain", "vibes"]
+    vibers = [{"viber_id": i, "username": f"viber{i}"} for i in range(args.vibers)]
+    thoughts = [
+        {
+            "thought_id": i,
+            "viber_id": random.randrange(args.vibers),
+            "content": " ".join(random.choices(words, k=15)),
+            "emotion_tag": random.choice(EMOTIONS),
+        }
+        for i in range(args.thoughts)
+    ]
+
+    SearchService.reset()
+    start = time.perf_counter()
+    SearchService.warm(thoughts=thoughts, vibers=vibers)
+    print(f"indexed {args.thoughts} thoughts in {time.perf_counter() - start:.2f}s {SearchService.stats()}")
+
+    for q in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            hits = SearchService.search(q, ("thought",), 20)
+        ms = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{q!r:>16} {ms:8.2f} ms  {len(hits)} hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Soul-link graph queries on a synthetic power-law graph.
+
+Links are generated by preferential attachment, so a few hub vibers end
+up with thousands of friends. Timings are reported for the hubs.
+
+    python -m benchmarks.bench_social_graph
+"""
+import argparse
+import random
+import time
+
+from src.services.social_graph_service import SocialGraphService
+
+
+def power_law_links(n_vibers: int, links_per_viber: int, pending_ratio: float):
+    # Barabási–Albert: each new viber links to existing ones with
+    # probability proportional to their degree (sampled from `ends`).
+    ends = list(range(links_per_viber))
+    links, link_id = [], 0
+    for v in range(links_per_viber, n_vibers):
+        targets = set()
+        while len(targets) < links_per_viber:
+            targets.add(random.choice(ends))
+        for t in targets:
+            link_id += 1
+            status = "PENDING" if random.random() < pending_ratio else "ACCEPTED"
+            links.append({"link_id": link_id, "viber_id": v, "friend_id": t, "status": status})
+            ends += (v, t)
+    return links
+
+
+def per_op_us(fn, ops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--links", type=int, default=5, help="links added per new viber")
+    parser.add_argument("--ops", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"{'vibers':>8} {'links':>8} {'warm s':>7} {'hub deg':>8} {'friends us':>11} "
+          f"{'is_friend us':>13} {'mutual us':>10} {'suggest us':>11} {'hub sugg us':>12} {'update us':>10}")
+    for n in args.sizes:
+        SocialGraphService.reset()
+        links = power_law_links(n, args.links, 0.1)
+        start = time.perf_counter()
+        SocialGraphService.warm(links)
+        warm_s = time.perf_counter() - start
+
+        hubs = sorted(range(n), key=SocialGraphService.friend_count, reverse=True)[:10]
+        hub, other = hubs[0], hubs[1]
+        friends = per_op_us(lambda: SocialGraphService.friends(hub, 50), args.ops)
+        is_friend = per_op_us(lambda: SocialGraphService.is_friend(hub, random.randrange(n)), args.ops)
+        mutual = per_op_us(lambda: SocialGraphService.mutual_friends(hub, other), args.ops)
+        suggest = per_op_us(lambda: SocialGraphService.suggestions(random.randrange(n), 10), args.ops)
+        hub_suggest = per_op_us(lambda: SocialGraphService.suggestions(hub, 10), max(args.ops // 10, 1))
+
+        next_id = [len(links)]
+
+        def update():
+            next_id[0] += 1
+            SocialGraphService.on_links([{"link_id": next_id[0], "viber_id": hub,
+                                          "friend_id": random.randrange(n), "status": "ACCEPTED"}])
+
+        upd = per_op_us(update, args.ops)
+        print(f"{n:>8} {len(links):>8} {warm_s:>7.2f} {SocialGraphService.friend_count(hub):>8} {friends:>11.1f} "
+              f"{is_friend:>13.1f} {mutual:>10.1f} {suggest:>11.1f} {hub_suggest:>12.1f} {upd:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""CLI startup stays cheap: `--help` must not pull in services or the HTTP stack.
+
+    python -m benchmarks.bench_startup [--budget-ms 60]
+
+Each command runs in a fresh interpreter under `-X importtime`; the
+benchmark reports the cumulative import time of `src.cli.main` and the
+slowest project imports, and exits non-zero if a command goes over
+budget or imports a forbidden module.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = [
+    ["--help"],
+    ["viber", "--help"],
+    ["viber", "get", "--help"],
+    ["import", "--help"],
+    ["export", "--help"],
+]
+FORBIDDEN = ("supabase", "httpx", "postgrest", "src.services", "src.storage")
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(argv: List[str]) -> Dict[str, Tuple[int, int]]:
+    """module -> (self us, cumulative us) for one CLI invocation."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # Not `-m src.cli.main`: run as __main__, the module would not show up.
+    script = f"import sys; sys.argv = ['vibenet-cli'] + {argv!r}; from src.cli.main import main; main()"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode not in (0, 2) or "Traceback" in proc.stderr:
+        raise SystemExit(f"vibenet-cli {' '.join(argv)} failed:\n{proc.stderr}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            times[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("VIBENET_STARTUP_BUDGET_MS", "60")),
+                        help="max cumulative import time of src.cli.main")
+    parser.add_argument("--runs", type=int, default=5, help="best of N per command")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'command':<22} {'src.cli.main ms':>16} {'modules':>8}  slowest project imports")
+    for argv in COMMANDS:
+        runs = [import_times(argv) for _ in range(args.runs)]
+        best = min(runs, key=lambda t: t.get("src.cli.main", (0, 0))[1])
+        main_ms = best.get("src.cli.main", (0, 0))[1] / 1000
+        ours = sorted(((cum, mod) for mod, (_, cum) in best.items() if mod.startswith("src.")), reverse=True)
+        slowest = ", ".join(f"{mod} {cum / 1000:.1f}ms" for cum, mod in ours[1:args.top + 1])
+        print(f"{' '.join(argv):<22} {main_ms:>16.2f} {len(best):>8}  {slowest}")
+
+        loaded = sorted(m for m in best if m.startswith(FORBIDDEN))
+        if loaded:
+            failures.append(f"{' '.join(argv)}: imports {', '.join(loaded)}")
+        if main_ms > args.budget_ms:
+            failures.append(f"{' '.join(argv)}: {main_ms:.1f}ms over the {args.budget_ms:.0f}ms budget")
+
+    for failure in failures:
+        print("FAIL", failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
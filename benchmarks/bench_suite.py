@@ -0,0 +1,246 @@
+"""End-to-end service scenarios against the fake Supabase client.
+
+    python -m benchmarks.bench_suite --latency-ms 5 --out bench.json
+    python -m benchmarks.bench_suite --latency-ms 5 --compare bench.json
+
+Every scenario is one user-visible operation (a form submit or a page
+render) run through the real services. Per scenario we report ops/sec,
+p50/p99 latency and database round trips per operation; the JSON output
+carries the git commit so runs can be compared across changes.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.fake_supabase import FakeSupabase, install
+
+EMOTIONS = ("Joy", "Curiosity", "Nostalgia", "Rage")
+HERD_SIZE = 16
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(vibers: int, thoughts_per_viber: int, tribes: int, friends_per_viber: int) -> Dict:
+    """Bulk-load a data set through the DAOs; returns the ids scenarios draw from."""
+    from src.dao.badge_dao import BadgeDAO
+    from src.dao.soul_link_dao import SoulLinkDAO
+    from src.dao.thought_dao import ThoughtDAO
+    from src.dao.tribe_dao import TribeDAO
+    from src.dao.viber_dao import ViberDAO
+    from src.services.badge_service import BADGE_RULES
+
+    viber_rows = ViberDAO().create_many([
+        {"username": f"seed{i}", "email": f"seed{i}@example.com", "password": "x", "badges": []}
+        for i in range(vibers)
+    ])
+    viber_ids = [v["viber_id"] for v in viber_rows]
+    thought_ids = []
+    for i in range(0, len(viber_ids) * thoughts_per_viber, 1000):
+        rows = [{"viber_id": random.choice(viber_ids), "content": f"seed thought {n}",
+                 "emotion_tag": random.choice(EMOTIONS)}
+                for n in range(i, min(i + 1000, len(viber_ids) * thoughts_per_viber))]
+        thought_ids += [t["thought_id"] for t in ThoughtDAO().create_many(rows)]
+    tribe_ids = [t["tribe_id"] for t in TribeDAO().create_many(
+        [{"name": f"tribe{i}", "description": "seed"} for i in range(tribes)]
+    )]
+    BadgeDAO().create_many([{"name": r["badge"], "description": "", "aura_color": "Neutral",
+                             "vibe_level_required": 1} for r in BADGE_RULES])
+    links = {}
+    for a in viber_ids:
+        for b in random.sample(viber_ids, min(friends_per_viber, len(viber_ids))):
+            if a != b:
+                links[min(a, b), max(a, b)] = {"viber_id": a, "friend_id": b, "status": "ACCEPTED"}
+    SoulLinkDAO().create_many(list(links.values()))
+    return {"vibers": viber_ids, "thoughts": thought_ids, "tribes": tribe_ids}
+
+
+def scenarios(data: Dict) -> Dict[str, Callable[[], object]]:
+    from src.dao.projections import FEED_ITEM
+    from src.services.badge_service import BadgeService
+    from src.services.echo_service import EchoService
+    from src.services.feed_service import FeedService
+    from src.services.post_service import PostService
+    from src.services.stats_service import StatsService
+    from src.services.thought_service import ThoughtService
+    from src.services.trending_service import TrendingService
+    from src.services.tribe_service import TribeService
+    from src.services.viber_service import ViberService
+
+    vibers, thoughts, tribes = data["vibers"], data["thoughts"], data["tribes"]
+    serial = count()
+    owned: Dict[int, List[str]] = {}
+    joins = iter([(v, t) for t in tribes for v in random.sample(vibers, len(vibers))])
+
+    def register():
+        n = next(serial)
+        ViberService.register(f"bench{n}", f"bench{n}@example.com", "x")
+
+    def create_thought():
+        ThoughtService.create(random.choice(vibers), "benchmark thought", random.choice(EMOTIONS))
+
+    def create_post():
+        PostService.create(random.choice(vibers), "benchmark post")
+
+    def echo_with_badge():
+        viber_id, emotion = random.choice(vibers), random.choice(EMOTIONS)
+        EchoService.react(random.choice(thoughts), viber_id, emotion)
+        owned.setdefault(viber_id, []).extend(
+            BadgeService.on_event(viber_id, "echo", owned=owned.get(viber_id), emotion=emotion)
+        )
+
+    def render_feed():
+        FeedService.page(20)
+
+    def render_home_feed():
+        FeedService.home(random.choice(vibers), 20)
+
+    def render_dashboard():
+        StatsService.counts(("vibers", "thoughts", "tribes"))
+        FeedService.recent(6)
+        BadgeService.list()
+
+    def render_trending():
+        FeedService.hydrate(TrendingService.trending_thoughts(10, columns=FEED_ITEM))
+
+    def render_tribes():
+        TribeService.list_for_viber(random.choice(vibers))
+
+    herd = ThreadPoolExecutor(max_workers=HERD_SIZE)
+
+    def feed_refresh_herd():
+        # Many sessions refreshing the same feed at once.
+        list(herd.map(lambda _: FeedService.recent(50), range(HERD_SIZE)))
+
+    def tribe_join():
+        viber_id, tribe_id = next(joins)
+        TribeService.join(viber_id, tribe_id)
+        owned.setdefault(viber_id, []).extend(
+            BadgeService.on_event(viber_id, "tribe_join", owned=owned.get(viber_id))
+        )
+
+    return {
+        "register": register,
+        "create_thought": create_thought,
+        "create_post": create_post,
+        "echo_with_badge": echo_with_badge,
+        "render_feed": render_feed,
+        "render_home_feed": render_home_feed,
+        "render_dashboard": render_dashboard,
+        "render_trending": render_trending,
+        "render_tribes": render_tribes,
+        "feed_refresh_herd": feed_refresh_herd,
+        "tribe_join": tribe_join,
+    }
+
+
+def measure(client: FakeSupabase, op: Callable[[], object], ops: int, warmup: int) -> Dict:
+    from src import instrumentation
+    for _ in range(warmup):
+        op()
+    client.reset_counts()
+    instrumentation.metrics.reset()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(ops):
+        t0 = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    counts = client.snapshot()
+    result = {
+        "ops": ops,
+        "ops_per_sec": round(ops / max(elapsed, 1e-9), 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "queries_per_op": round(counts["queries"] / ops, 2),
+        "queries_by_kind": {k: round(v / ops, 2) for k, v in sorted(counts["by_kind"].items())},
+    }
+    if instrumentation.enabled():
+        received = sum(q["bytes_in"] for q in instrumentation.snapshot()["queries"].values())
+        result["kb_in_per_op"] = round(received / ops / 1024, 2)
+    return result
+
+
+def compare(results: Dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline.get('commit')})")
+    print(f"{'scenario':<18} {'ops/s':>16} {'p99 ms':>18} {'queries/op':>14} {'KB in/op':>14}")
+    for name, r in results["scenarios"].items():
+        b = baseline["scenarios"].get(name)
+        if not b:
+            continue
+        print(f"{name:<18} {b['ops_per_sec']:>7} → {r['ops_per_sec']:<7} {b['p99_ms']:>8} → {r['p99_ms']:<8}"
+              f" {b['queries_per_op']:>5} → {r['queries_per_op']:<5}"
+              f" {b.get('kb_in_per_op', '-'):>5} → {r.get('kb_in_per_op', '-'):<5}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated round-trip time")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--vibers", type=int, default=2_000)
+    parser.add_argument("--thoughts-per-viber", type=int, default=5)
+    parser.add_argument("--tribes", type=int, default=20)
+    parser.add_argument("--friends-per-viber", type=int, default=10)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="+", help="default: all")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--instrument", action="store_true",
+                        help="enable DAO instrumentation and report KB received per op (adds overhead)")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.instrument:
+        from src import instrumentation
+        instrumentation.enable()
+    client = install(seed=args.seed)
+    data = seed(args.vibers, args.thoughts_per_viber, args.tribes, args.friends_per_viber)
+    client.latency, client.jitter = args.latency_ms / 1000, args.jitter_ms / 1000
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "scenarios": {},
+    }
+    print(f"{'scenario':<18} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'queries/op':>11} {'KB in/op':>9}")
+    for name, op in scenarios(data).items():
+        if args.scenarios and name not in args.scenarios:
+            continue
+        r = results["scenarios"][name] = measure(client, op, args.ops, args.warmup)
+        print(f"{name:<18} {r['ops_per_sec']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['queries_per_op']:>11}"
+              f" {r.get('kb_in_per_op', '-'):>9}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
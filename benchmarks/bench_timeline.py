@@ -0,0 +1,60 @@
+"""Home timeline reads stay O(page size) as the network grows.
+
+    python -m benchmarks.bench_timeline
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_social_graph import per_op_us, power_law_links
+from src.services.social_graph_service import SocialGraphService
+from src.services.timeline_service import TimelineService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--thoughts-per-viber", type=int, default=2)
+    parser.add_argument("--tribes", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"{'vibers':>8} {'thoughts':>9} {'warm s':>7} {'first read us':>14} {'page us':>8} "
+          f"{'next page us':>13} {'post us':>8}")
+    for n in args.sizes:
+        SocialGraphService.reset()
+        TimelineService.reset()
+        SocialGraphService.warm(power_law_links(n, 5, 0.1))
+        now = time.time()
+        thoughts = [{"thought_id": i, "viber_id": random.randrange(n), "created_at": now - random.random() * 86400}
+                    for i in range(n * args.thoughts_per_viber)]
+        memberships = [{"viber_id": v, "tribe_id": random.randrange(args.tribes)}
+                       for v in range(n) if random.random() < 0.3]
+        start = time.perf_counter()
+        TimelineService.warm(thoughts, memberships)
+        for v in range(n):
+            TimelineService._viber_tribes.setdefault(v, set())
+        warm_s = time.perf_counter() - start
+
+        readers = random.sample(range(n), 200)
+        start = time.perf_counter()
+        for v in readers:
+            TimelineService.page_ids(v, 20)
+        first = (time.perf_counter() - start) / len(readers) * 1e6
+        page = per_op_us(lambda: TimelineService.page_ids(random.choice(readers), 20), args.ops)
+        cursors = [TimelineService.page_ids(v, 20)[1] for v in readers]
+        pairs = [(v, 20, c) for v, c in zip(readers, cursors) if c]
+        nxt = per_op_us(lambda: TimelineService.page_ids(*random.choice(pairs)), args.ops) if pairs else 0.0
+        next_id = [len(thoughts)]
+
+        def post():
+            next_id[0] += 1
+            TimelineService.add_thought({"thought_id": next_id[0], "viber_id": random.randrange(n),
+                                         "created_at": time.time()})
+
+        posted = per_op_us(post, args.ops)
+        print(f"{n:>8} {len(thoughts):>9} {warm_s:>7.2f} {first:>14.1f} {page:>8.1f} {nxt:>13.1f} {posted:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Trending reads stay flat as the number of tracked thoughts grows.
+
+    python -m benchmarks.bench_trending
+"""
+import argparse
+import random
+import time
+
+from src.services.trending_service import TrendingService
+
+EMOTIONS = ["Joy", "Curiosity", "Nostalgia", "Rage"]
+
+
+def synthetic(n_thoughts: int, echoes_per_thought: int, now: float):
+    thoughts = [
+        {
+            "thought_id": i,
+            "viber_id": random.randrange(max(n_thoughts // 10, 1)),
+            "emotion_tag": random.choice(EMOTIONS),
+            "created_at": now - random.random() * 7 * 86400,
+        }
+        for i in range(n_thoughts)
+    ]
+    echoes = [
+        {"thought_id": random.randrange(n_thoughts), "created_at": now - random.random() * 86400}
+        for _ in range(n_thoughts * echoes_per_thought)
+    ]
+    memberships = [{"viber_id": v, "tribe_id": v % 20} for v in range(max(n_thoughts // 10, 1))]
+    return thoughts, echoes, memberships
+
+
+def per_op_us(fn, ops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 300_000])
+    parser.add_argument("--ops", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{'thoughts':>10} {'warm s':>8} {'top10 us':>9} {'emotion us':>11} {'tribe us':>9} {'echo us':>8}")
+    for n in args.sizes:
+        TrendingService.reset()
+        now = time.time()
+        thoughts, echoes, memberships = synthetic(n, 3, now)
+        start = time.perf_counter()
+        TrendingService.warm(thoughts, echoes, memberships=memberships)
+        warm_s = time.perf_counter() - start
+
+        top = per_op_us(lambda: TrendingService.top(10), args.ops)
+        emotion = per_op_us(lambda: TrendingService.top(10, emotion="Joy"), args.ops)
+        tribe = per_op_us(lambda: TrendingService.top(10, tribe_id=3), args.ops)
+        echo = per_op_us(lambda: TrendingService.record_echo(random.randrange(n)), args.ops)
+        print(f"{n:>10} {warm_s:>8.2f} {top:>9.1f} {emotion:>11.1f} {tribe:>9.1f} {echo:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
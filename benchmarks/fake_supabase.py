@@ -0,0 +1,75 @@
+"""An offline stand-in for the Supabase client that counts round trips.
+
+It is the in-memory backend (same table()/rpc() builder the DAOs use)
+plus a simulated network: every execute() counts as one query and
+sleeps `latency` seconds, with optional uniform jitter, outside the
+storage lock so concurrent callers overlap like real HTTP requests.
+"""
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from src.storage.memory import MemoryBackend
+from src.storage.query import Query, Response, RpcCall
+
+
+class _CountedRpc(RpcCall):
+    def execute(self) -> Response:
+        self._client.round_trip(f"rpc {self.fn}")
+        # The Python twin of the SQL function queries the same client; those
+        # run inside the database for real, so they are not round trips.
+        self._client._local.in_rpc = True
+        try:
+            return super().execute()
+        finally:
+            self._client._local.in_rpc = False
+
+
+class FakeSupabase(MemoryBackend):
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        super().__init__()
+        self.latency, self.jitter = latency, jitter
+        self.queries = 0
+        self.by_kind: Counter = Counter()
+        self._random = random.Random(seed)
+        self._count_lock = threading.Lock()
+        self._local = threading.local()
+
+    def round_trip(self, kind: str):
+        with self._count_lock:
+            self.queries += 1
+            self.by_kind[kind] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _run(self, query: Query) -> Response:
+        if not getattr(self._local, "in_rpc", False):
+            self.round_trip(f"{query.op} {query.table}")
+        return super()._run(query)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> RpcCall:
+        return _CountedRpc(self, fn, params or {})
+
+    def reset_counts(self):
+        with self._count_lock:
+            self.queries = 0
+            self.by_kind = Counter()
+
+    def snapshot(self) -> Dict:
+        with self._count_lock:
+            return {"queries": self.queries, "by_kind": dict(self.by_kind)}
+
+
+def install(latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None) -> FakeSupabase:
+    """Route every DAO to a fresh FakeSupabase. Call before any service is used."""
+    from src.config import set_client
+    os.environ["VIBENET_BACKEND"] = "memory"
+    client = FakeSupabase(latency, jitter, seed)
+    set_client(client)
+    return client
@@ -0,0 +1,13 @@
+-- increment_likes returns the updated post so PostDAO.like needs no follow-up read.
+drop function if exists increment_likes(bigint);
+drop function if exists increment_likes(int);
+
+create or replace function increment_likes(p_post_id bigint)
+returns setof posts
+language sql
+as $$
+    update posts
+    set likes = coalesce(likes, 0) + 1
+    where post_id = p_post_id
+    returning *;
+$$;
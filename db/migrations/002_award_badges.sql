@@ -0,0 +1,46 @@
+-- Conditional badge append: one locked read-modify-write per viber, returns only the newly awarded names.
+create or replace function award_badges(p_viber_id bigint, p_badges text[])
+returns setof text
+language plpgsql
+as $$
+declare
+    current jsonb;
+    missing text[];
+begin
+    select coalesce(badges, '[]'::jsonb) into current
+    from vibers where viber_id = p_viber_id
+    for update;
+    if not found then
+        return;
+    end if;
+
+    select coalesce(array_agg(distinct b), '{}') into missing
+    from unnest(p_badges) as b
+    where not current ? b;
+    if coalesce(array_length(missing, 1), 0) = 0 then
+        return;
+    end if;
+
+    update vibers set badges = current || to_jsonb(missing) where viber_id = p_viber_id;
+    return query select unnest(missing);
+end;
+$$;
+
+-- Batch form: p_awards is [{"viber_id": 1, "badges": ["Explorer"]}, ...].
+create or replace function award_badges_many(p_awards jsonb)
+returns table (viber_id bigint, badge text)
+language plpgsql
+as $$
+declare
+    item jsonb;
+begin
+    for item in select * from jsonb_array_elements(p_awards) loop
+        return query
+            select (item->>'viber_id')::bigint, a
+            from award_badges(
+                (item->>'viber_id')::bigint,
+                array(select jsonb_array_elements_text(item->'badges'))
+            ) as a;
+    end loop;
+end;
+$$;
@@ -0,0 +1,23 @@
+-- Aggregated echo counters on thoughts, bumped in bulk by the echo write-behind buffer.
+alter table thoughts add column if not exists echoes integer not null default 0;
+alter table thoughts add column if not exists vibe_score integer not null default 0;
+alter table thoughts add column if not exists echo_counts jsonb not null default '{}'::jsonb;
+
+-- p_counts is [{"thought_id": 1, "n": 5, "score": 12, "emotions": {"Joy": 3, "Rage": 2}}, ...]
+create or replace function bump_echo_counters(p_counts jsonb)
+returns void
+language sql
+as $$
+    update thoughts t
+    set echoes = t.echoes + (c.item->>'n')::int,
+        vibe_score = t.vibe_score + (c.item->>'score')::int,
+        echo_counts = (
+            select coalesce(jsonb_object_agg(
+                k,
+                coalesce((t.echo_counts->>k)::int, 0) + coalesce((c.item->'emotions'->>k)::int, 0)
+            ), '{}'::jsonb)
+            from jsonb_object_keys(t.echo_counts || (c.item->'emotions')) as k
+        )
+    from jsonb_array_elements(p_counts) as c(item)
+    where t.thought_id = (c.item->>'thought_id')::bigint;
+$$;
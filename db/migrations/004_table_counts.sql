@@ -0,0 +1,56 @@
+-- Row counts maintained by statement-level triggers, so the dashboard never scans a table.
+create table if not exists table_counts (
+    name text primary key,
+    n bigint not null default 0
+);
+
+create or replace function table_counts_on_insert()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into table_counts (name, n)
+    select tg_table_name, count(*) from new_rows
+    on conflict (name) do update set n = table_counts.n + excluded.n;
+    return null;
+end;
+$$;
+
+create or replace function table_counts_on_delete()
+returns trigger
+language plpgsql
+as $$
+begin
+    update table_counts set n = n - (select count(*) from old_rows)
+    where name = tg_table_name;
+    return null;
+end;
+$$;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['vibers', 'thoughts', 'posts', 'tribes'] loop
+        execute format('drop trigger if exists %1$s_count_ins on %1$I', t);
+        execute format('create trigger %1$s_count_ins after insert on %1$I
+                        referencing new table as new_rows
+                        for each statement execute function table_counts_on_insert()', t);
+        execute format('drop trigger if exists %1$s_count_del on %1$I', t);
+        execute format('create trigger %1$s_count_del after delete on %1$I
+                        referencing old table as old_rows
+                        for each statement execute function table_counts_on_delete()', t);
+        execute format('insert into table_counts (name, n) select %1$L, count(*) from %1$I
+                        on conflict (name) do update set n = excluded.n', t);
+    end loop;
+end;
+$$;
+
+-- All requested counts in one round trip.
+create or replace function get_table_counts(p_names text[])
+returns table (name text, n bigint)
+language sql
+stable
+as $$
+    select c.name, c.n from table_counts c where c.name = any(p_names);
+$$;
@@ -0,0 +1,74 @@
+-- Member counts on tribes, kept in step with viber_tribes by statement-level triggers.
+alter table tribes add column if not exists member_count integer not null default 0;
+
+create index if not exists viber_tribes_tribe_created on viber_tribes (tribe_id, created_at, viber_id);
+
+create or replace function tribe_members_on_insert()
+returns trigger
+language plpgsql
+as $$
+begin
+    update tribes t set member_count = t.member_count + d.n
+    from (select tribe_id, count(*) as n from new_rows group by tribe_id) d
+    where t.tribe_id = d.tribe_id;
+    return null;
+end;
+$$;
+
+create or replace function tribe_members_on_delete()
+returns trigger
+language plpgsql
+as $$
+begin
+    update tribes t set member_count = greatest(t.member_count - d.n, 0)
+    from (select tribe_id, count(*) as n from old_rows group by tribe_id) d
+    where t.tribe_id = d.tribe_id;
+    return null;
+end;
+$$;
+
+drop trigger if exists viber_tribes_members_ins on viber_tribes;
+create trigger viber_tribes_members_ins after insert on viber_tribes
+    referencing new table as new_rows
+    for each statement execute function tribe_members_on_insert();
+drop trigger if exists viber_tribes_members_del on viber_tribes;
+create trigger viber_tribes_members_del after delete on viber_tribes
+    referencing old table as old_rows
+    for each statement execute function tribe_members_on_delete();
+
+update tribes t set member_count = (select count(*) from viber_tribes vt where vt.tribe_id = t.tribe_id);
+
+-- Idempotent join/leave: return the membership row only when something changed.
+create or replace function join_tribe(p_viber_id bigint, p_tribe_id bigint)
+returns setof viber_tribes
+language sql
+as $$
+    insert into viber_tribes (viber_id, tribe_id) values (p_viber_id, p_tribe_id)
+    on conflict (viber_id, tribe_id) do nothing
+    returning *;
+$$;
+
+create or replace function leave_tribe(p_viber_id bigint, p_tribe_id bigint)
+returns setof viber_tribes
+language sql
+as $$
+    delete from viber_tribes where viber_id = p_viber_id and tribe_id = p_tribe_id
+    returning *;
+$$;
+
+-- Tribes with member counts and the viber's membership in one round trip.
+create or replace function tribes_for_viber(p_viber_id bigint, p_joined_only boolean default false)
+returns table (
+    tribe_id bigint, name text, description text, member_count integer, created_at timestamptz,
+    is_member boolean, joined_at timestamptz
+)
+language sql
+stable
+as $$
+    select t.tribe_id, t.name, t.description, t.member_count, t.created_at,
+           vt.viber_id is not null, vt.created_at
+    from tribes t
+    left join viber_tribes vt on vt.tribe_id = t.tribe_id and vt.viber_id = p_viber_id
+    where not p_joined_only or vt.viber_id is not null
+    order by t.tribe_id;
+$$;
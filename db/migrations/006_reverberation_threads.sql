@@ -0,0 +1,96 @@
+-- Reply threading on reverberations, plus counters kept in step by statement-level triggers:
+-- thoughts.reverberation_count (all reverberations) and reverberations.reply_count (direct replies).
+alter table reverberations add column if not exists parent_id bigint
+    references reverberations (reverberation_id) on delete cascade;
+alter table reverberations add column if not exists reply_count integer not null default 0;
+alter table thoughts add column if not exists reverberation_count integer not null default 0;
+
+create index if not exists reverberations_roots on reverberations (thought_id, created_at, reverberation_id)
+    where parent_id is null;
+create index if not exists reverberations_parent on reverberations (parent_id, created_at, reverberation_id)
+    where parent_id is not null;
+
+create or replace function reverberations_on_insert()
+returns trigger
+language plpgsql
+as $$
+begin
+    update thoughts t set reverberation_count = t.reverberation_count + d.n
+    from (select thought_id, count(*) as n from new_rows group by thought_id) d
+    where t.thought_id = d.thought_id;
+    update reverberations r set reply_count = r.reply_count + d.n
+    from (select parent_id, count(*) as n from new_rows where parent_id is not null group by parent_id) d
+    where r.reverberation_id = d.parent_id;
+    return null;
+end;
+$$;
+
+create or replace function reverberations_on_delete()
+returns trigger
+language plpgsql
+as $$
+begin
+    update thoughts t set reverberation_count = greatest(t.reverberation_count - d.n, 0)
+    from (select thought_id, count(*) as n from old_rows group by thought_id) d
+    where t.thought_id = d.thought_id;
+    update reverberations r set reply_count = greatest(r.reply_count - d.n, 0)
+    from (select parent_id, count(*) as n from old_rows where parent_id is not null group by parent_id) d
+    where r.reverberation_id = d.parent_id;
+    return null;
+end;
+$$;
+
+drop trigger if exists reverberations_counts_ins on reverberations;
+create trigger reverberations_counts_ins after insert on reverberations
+    referencing new table as new_rows
+    for each statement execute function reverberations_on_insert();
+drop trigger if exists reverberations_counts_del on reverberations;
+create trigger reverberations_counts_del after delete on reverberations
+    referencing old table as old_rows
+    for each statement execute function reverberations_on_delete();
+
+update thoughts t set reverberation_count = (select count(*) from reverberations r where r.thought_id = t.thought_id);
+update reverberations r set reply_count = (select count(*) from reverberations c where c.parent_id = r.reverberation_id);
+
+-- Bulk insert. A reply whose parent is not on the same thought is skipped, not inserted.
+-- p_rows is [{"thought_id": 1, "viber_id": 2, "content": "...", "parent_id": null}, ...]
+create or replace function add_reverberations(p_rows jsonb)
+returns setof reverberations
+language sql
+as $$
+    insert into reverberations (thought_id, viber_id, content, parent_id)
+    select r.thought_id, r.viber_id, r.content, r.parent_id
+    from jsonb_to_recordset(p_rows) as r(thought_id bigint, viber_id bigint, content text, parent_id bigint)
+    where r.parent_id is null
+       or exists (select 1 from reverberations p
+                  where p.reverberation_id = r.parent_id and p.thought_id = r.thought_id)
+    returning *;
+$$;
+
+-- Reverberation counts for a page of thoughts in one round trip; thoughts without any are omitted.
+create or replace function reverberation_counts(p_thought_ids bigint[])
+returns table (thought_id bigint, n integer)
+language sql
+stable
+as $$
+    select r.thought_id, count(*)::int
+    from reverberations r
+    where r.thought_id = any(p_thought_ids)
+    group by r.thought_id;
+$$;
+
+-- The oldest p_per_parent direct replies of each parent, for rendering a page of threads.
+create or replace function reverberation_replies(p_parent_ids bigint[], p_per_parent integer default 3)
+returns setof reverberations
+language sql
+stable
+as $$
+    select (r).*
+    from (
+        select r, row_number() over (partition by r.parent_id order by r.created_at, r.reverberation_id) as rn
+        from reverberations r
+        where r.parent_id = any(p_parent_ids)
+    ) ranked
+    where rn <= p_per_parent
+    order by (r).parent_id, (r).created_at, (r).reverberation_id;
+$$;
@@ -0,0 +1,39 @@
+-- One echo per (thought, viber, emotion): EchoDAO.react_many upserts on this key.
+-- The old plain insert allowed duplicates, so drop them (keeping the oldest) before the index.
+begin;
+
+create temporary table echo_dupe_thoughts on commit drop as
+    select distinct thought_id from echoes
+    group by thought_id, viber_id, emotion_tag
+    having count(*) > 1;
+
+delete from echoes e
+using echoes keep
+where keep.thought_id = e.thought_id
+  and keep.viber_id = e.viber_id
+  and keep.emotion_tag = e.emotion_tag
+  and keep.echo_id < e.echo_id;
+
+-- Recount the thoughts that lost duplicates; weights match EMOTION_WEIGHTS in echo_buffer.py.
+update thoughts t
+set echoes = c.n,
+    vibe_score = c.score,
+    echo_counts = c.emotions
+from (
+    select thought_id,
+           sum(n)::int as n,
+           sum(n * case emotion_tag when 'Joy' then 3 when 'Curiosity' then 2 when 'Nostalgia' then 2 else 1 end)::int as score,
+           jsonb_object_agg(emotion_tag, n) as emotions
+    from (
+        select thought_id, emotion_tag, count(*) as n
+        from echoes
+        where thought_id in (select thought_id from echo_dupe_thoughts)
+        group by thought_id, emotion_tag
+    ) per_emotion
+    group by thought_id
+) c
+where t.thought_id = c.thought_id;
+
+create unique index if not exists echoes_thought_viber_emotion on echoes (thought_id, viber_id, emotion_tag);
+
+commit;
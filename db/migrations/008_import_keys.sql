@@ -0,0 +1,51 @@
+-- Keys the bulk importer (src/cli/importer.py) relies on to make retried and resumed batches idempotent.
+begin;
+
+-- Plain-insert tables get a client-supplied key: "<source file sha1>:<record number>".
+alter table thoughts add column if not exists import_key text;
+alter table posts add column if not exists import_key text;
+alter table reverberations add column if not exists import_key text;
+create unique index if not exists thoughts_import_key on thoughts (import_key);
+create unique index if not exists posts_import_key on posts (import_key);
+create unique index if not exists reverberations_import_key on reverberations (import_key);
+
+-- Upsert targets of BadgeDAO, TribeDAO and SoulLinkDAO.create_many. Older rows may
+-- hold duplicates, so keep the oldest of each before adding the constraint.
+delete from badges b using badges keep
+where keep.name = b.name and keep.badge_id < b.badge_id;
+create unique index if not exists badges_name_key on badges (name);
+
+-- Members of a duplicate tribe move to the oldest one; the member_count triggers follow along.
+insert into viber_tribes (viber_id, tribe_id, created_at)
+select vt.viber_id, keep.tribe_id, vt.created_at
+from viber_tribes vt
+join tribes t on t.tribe_id = vt.tribe_id
+join tribes keep on keep.name = t.name and keep.tribe_id < t.tribe_id
+on conflict (viber_id, tribe_id) do nothing;
+delete from viber_tribes vt using tribes t, tribes keep
+where vt.tribe_id = t.tribe_id and keep.name = t.name and keep.tribe_id < t.tribe_id;
+delete from tribes t using tribes keep
+where keep.name = t.name and keep.tribe_id < t.tribe_id;
+create unique index if not exists tribes_name_key on tribes (name);
+
+delete from soul_links l using soul_links keep
+where keep.viber_id = l.viber_id and keep.friend_id = l.friend_id and keep.link_id < l.link_id;
+create unique index if not exists soul_links_viber_friend_key on soul_links (viber_id, friend_id);
+
+-- add_reverberations from 006, now passing import_key through and skipping keys already written.
+create or replace function add_reverberations(p_rows jsonb)
+returns setof reverberations
+language sql
+as $$
+    insert into reverberations (thought_id, viber_id, content, parent_id, import_key)
+    select r.thought_id, r.viber_id, r.content, r.parent_id, r.import_key
+    from jsonb_to_recordset(p_rows)
+        as r(thought_id bigint, viber_id bigint, content text, parent_id bigint, import_key text)
+    where r.parent_id is null
+       or exists (select 1 from reverberations p
+                  where p.reverberation_id = r.parent_id and p.thought_id = r.thought_id)
+    on conflict (import_key) do nothing
+    returning *;
+$$;
+
+commit;
@@ -0,0 +1,74 @@
+"""Asyncio helpers for running independent DAO/service calls concurrently.
+
+The DAOs sit on synchronous clients (supabase-py's sync client and the
+local backends), so coroutines hand each call to a bounded thread pool
+sized like the HTTP connection pool. A page that needs N independent
+queries then waits for roughly the slowest one instead of the sum.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List
+from src.config import POOL_SIZE
+
+MAX_CONCURRENCY = int(os.getenv("VIBENET_MAX_CONCURRENCY", str(POOL_SIZE)))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="vibenet-io")
+
+
+async def run_sync(fn: Callable, *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the instrumentation render scope) into the worker.
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+class AsyncProxy:
+    """Coroutine versions of every public method of a DAO or service class."""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await run_sync(attr, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
+
+    def __repr__(self) -> str:
+        return f"Async({self._target!r})"
+
+
+async def gather_limited(*aws: Awaitable, limit: int = MAX_CONCURRENCY,
+                         return_exceptions: bool = False) -> List[Any]:
+    """asyncio.gather with at most `limit` awaitables in flight."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(aw: Awaitable):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(bounded(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+def run_all(*aws: Awaitable, limit: int = MAX_CONCURRENCY, return_exceptions: bool = False) -> List[Any]:
+    """Run awaitables concurrently from synchronous code (e.g. a Streamlit script)."""
+    return asyncio.run(gather_limited(*aws, limit=limit, return_exceptions=return_exceptions))
+
+
+def run_page(limit: int = MAX_CONCURRENCY, **queries: Awaitable) -> Dict[str, Any]:
+    """Run a page's independent queries concurrently, keyed by name.
+
+    A failing query yields its exception as the value, so one broken tile
+    does not take down the rest of the page.
+    """
+    results = run_all(*queries.values(), limit=limit, return_exceptions=True)
+    return dict(zip(queries, results))
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.dao.projections import ALL, column_set
+from src.singleflight import flights
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def incr(self, key: Hashable, delta: int = 1) -> Optional[int]:
+        """Adjust a cached number in place, keeping its expiry. No-op if absent."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._data[key] = (entry[0], entry[1] + delta)
+            return entry[1] + delta
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class ViberCache:
+    """Viber rows keyed by id, with a username -> id index on the side.
+
+    Rows fetched with a column projection are cached as partial rows
+    together with the columns they cover; a read is a hit only when the
+    cached row covers every column it asks for, and projected reads get
+    back just those columns.
+
+    Readers take generation() before fetching and pass it to put(); an
+    invalidate() in between bumps it, so a row read before a write is dropped
+    instead of being cached over the newer one.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self._rows = TTLCache(maxsize, ttl)
+        self._ids = TTLCache(maxsize, ttl)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _project(entry: Optional[tuple], columns: str) -> Optional[Dict]:
+        if entry is None:
+            return None
+        row, covered = entry
+        wanted = column_set(columns)
+        if wanted is None:
+            return row if covered is None else None
+        if covered is not None and not wanted <= covered:
+            return None
+        return {k: v for k, v in row.items() if k in wanted}
+
+    def get(self, viber_id: int, columns: str = ALL) -> Optional[Dict]:
+        return self._project(self._rows.get(viber_id), columns)
+
+    def get_by_username(self, username: str, columns: str = ALL) -> Optional[Dict]:
+        viber_id = self._ids.get(username)
+        entry = self._rows.get(viber_id) if viber_id is not None else None
+        # A renamed viber leaves a stale username entry behind; ignore it.
+        if entry is not None and entry[0].get("username") == username:
+            return self._project(entry, columns)
+        return None
+
+    def generation(self) -> int:
+        return self._generation
+
+    def put(self, row: Optional[Dict], columns: str = ALL, generation: Optional[int] = None):
+        if not row or row.get("viber_id") is None:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            covered = column_set(columns)
+            if covered is not None:
+                # Widen what is already cached rather than replacing a fuller row.
+                cached = self._rows.get(row["viber_id"])
+                if cached is not None:
+                    row = {**cached[0], **row}
+                    covered = None if cached[1] is None else cached[1] | covered
+            self._rows.set(row["viber_id"], (row, covered))
+            if row.get("username"):
+                self._ids.set(row["username"], row["viber_id"])
+
+    def invalidate(self, viber_id: int):
+        with self._lock:
+            self._generation += 1
+            entry = self._rows.pop(viber_id)
+            if entry and entry[0].get("username"):
+                self._ids.pop(entry[0]["username"])
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._rows.clear()
+            self._ids.clear()
+
+    def stats(self) -> Dict:
+        return {"rows": self._rows.stats(), "usernames": self._ids.stats()}
+
+
+viber_cache = ViberCache(
+    maxsize=int(os.getenv("VIBER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("VIBER_CACHE_TTL", "60")),
+)
+
+
+# Seconds each catalog-style read may be served from the shared cache.
+ENTITY_TTLS = {
+    "badges": float(os.getenv("BADGE_CATALOG_TTL", "300")),
+    "tribes": float(os.getenv("TRIBE_LIST_TTL", "120")),
+    "recent_thoughts": float(os.getenv("RECENT_THOUGHTS_TTL", "10")),
+    "analytics": float(os.getenv("ANALYTICS_TTL", "300")),
+}
+
+
+class SharedCache:
+    """Process-wide read-through cache for catalog-style reads, one TTLCache per entity.
+
+    Streamlit runs every browser session in the same process and keeps
+    imported modules across reruns, so one instance serves all sessions:
+    N users clicking around the Tribes page cost one fetch per TTL window,
+    not one per rerun. Misses go through single-flight, so concurrent
+    sessions share the refill. Values are shared between sessions; treat
+    them as read-only. Writers call invalidate(entity) after a change.
+    """
+
+    def __init__(self, ttls: Dict[str, float], maxsize: int = 64):
+        self._caches = {entity: TTLCache(maxsize, ttl) for entity, ttl in ttls.items()}
+        # Bumped by invalidate() so a load that started before a write is not stored.
+        self._generations = {entity: 0 for entity in ttls}
+
+    def get_or_load(self, entity: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        cache = self._caches[entity]
+        value = cache.get(key)
+        if value is None:
+            generation = self._generations[entity]
+            value = flights.do(("SharedCache", entity, generation, key), loader)
+            if value is not None and self._generations[entity] == generation:
+                cache.set(key, value)
+        return value
+
+    def peek(self, entity: str, key: Hashable) -> Any:
+        """The cached value, or None; never loads."""
+        return self._caches[entity].get(key)
+
+    def invalidate(self, entity: str):
+        self._generations[entity] += 1
+        self._caches[entity].clear()
+
+    def clear(self):
+        for cache in self._caches.values():
+            cache.clear()
+
+    def stats(self) -> Dict:
+        return {entity: {**cache.stats(), "ttl": cache.ttl} for entity, cache in self._caches.items()}
+
+
+shared_cache = SharedCache(ENTITY_TTLS)
@@ -0,0 +1,158 @@
+"""Streaming export for `python -m src.cli.main export`.
+
+Each table is walked with keyset pagination (oldest first) while a
+background thread prefetches the next page, and every page is written
+straight to NDJSON and/or the columnar `.vnc` format (src/columnar.py).
+Memory is bounded by the prefetch depth plus one columnar row group.
+"""
+import bz2
+import gzip
+import json
+import lzma
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from src.columnar import DEFAULT_ROW_GROUP_SIZE, ColumnarWriter
+from src.dao.pagination import BULK_PAGE_SIZE
+from src.storage.schema import TABLES
+
+# entity -> table, in dependency order
+ENTITIES = {
+    "viber": "vibers",
+    "thought": "thoughts",
+    "post": "posts",
+    "echo": "echoes",
+    "reverberation": "reverberations",
+    "soul": "soul_links",
+    "membership": "viber_tribes",
+}
+SECRET_COLUMNS = {"vibers": {"password"}}
+
+# --compress -> (NDJSON opener, file suffix, columnar codec)
+COMPRESSION = {
+    "none": (open, "", "none"),
+    "gzip": (gzip.open, ".gz", "zlib"),
+    "bz2": (bz2.open, ".bz2", "bz2"),
+    "xz": (lzma.open, ".xz", "lzma"),
+}
+PREFETCH_DEPTH = 2
+_DONE = object()
+
+
+def pages_for(entity: str, page_size: int) -> Iterator[List[Dict]]:
+    if entity == "viber":
+        from src.dao.viber_dao import ViberDAO
+        return ViberDAO().iter_all(page_size, desc=False)
+    if entity == "thought":
+        from src.dao.thought_dao import ThoughtDAO
+        return ThoughtDAO().iter_all(page_size, desc=False)
+    if entity == "post":
+        from src.dao.post_dao import PostDAO
+        return PostDAO().iter_all(page_size, desc=False)
+    if entity == "echo":
+        from src.dao.echo_dao import EchoDAO
+        return EchoDAO().iter_all(page_size, desc=False)
+    if entity == "reverberation":
+        from src.dao.reverberation_dao import ReverberationDAO
+        return ReverberationDAO().iter_all(page_size, desc=False)
+    if entity == "soul":
+        from src.dao.soul_link_dao import SoulLinkDAO
+        return SoulLinkDAO().iter_all(page_size)
+    if entity == "membership":
+        from src.dao.tribe_dao import TribeDAO
+        return TribeDAO().iter_memberships(page_size)
+    raise ValueError(f"unknown entity {entity!r}")
+
+
+def prefetch(pages: Iterator[List[Dict]], depth: int = PREFETCH_DEPTH) -> Iterator[List[Dict]]:
+    """Fetch up to `depth` pages ahead on a background thread."""
+    q: "queue.Queue" = queue.Queue(maxsize=depth)
+
+    def produce():
+        try:
+            for page in pages:
+                q.put(page)
+            q.put(_DONE)
+        except BaseException as e:
+            q.put(e)
+
+    threading.Thread(target=produce, name="export-prefetch", daemon=True).start()
+    while True:
+        item = q.get()
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def export_columns(table: str, row: Dict, hidden: Set[str]) -> List[Tuple[str, str]]:
+    """Columns as the server returned them; types come from the schema mirror, json for any it lacks."""
+    known = TABLES[table]["columns"]
+    return [(c, known.get(c, "json")) for c in row if c not in hidden]
+
+
+def export_entity(entity: str, out_dir: str, formats: Sequence[str] = ("ndjson", "columnar"),
+                  compress: str = "none", page_size: int = BULK_PAGE_SIZE,
+                  row_group_size: int = DEFAULT_ROW_GROUP_SIZE, include_secrets: bool = False,
+                  progress: Optional[Callable[[str], None]] = None) -> Dict:
+    table = ENTITIES[entity]
+    hidden = set() if include_secrets else SECRET_COLUMNS.get(table, set())
+    opener, suffix, codec = COMPRESSION[compress]
+    paths = []
+    columns: Optional[List[Tuple[str, str]]] = None
+    ndjson = columnar = None
+
+    def open_outputs(cols: List[Tuple[str, str]]):
+        nonlocal ndjson, columnar
+        if "ndjson" in formats:
+            paths.append(os.path.join(out_dir, f"{table}.ndjson{suffix}"))
+            ndjson = opener(paths[-1], "wt", encoding="utf-8")
+        if "columnar" in formats:
+            paths.append(os.path.join(out_dir, f"{table}.vnc"))
+            columnar = ColumnarWriter(paths[-1], cols, codec=codec, row_group_size=row_group_size)
+
+    started, rows, last_report = time.perf_counter(), 0, time.perf_counter()
+    try:
+        for page in prefetch(pages_for(entity, page_size)):
+            if columns is None:
+                # Taken from the rows, so production columns missing from the local schema are kept.
+                columns = export_columns(table, page[0], hidden)
+                names = set(page[0])
+                open_outputs(columns)
+            if page[0].keys() != names:
+                raise ValueError(f"{table}: columns changed mid-export: {sorted(page[0])}")
+            if ndjson:
+                ndjson.writelines(
+                    json.dumps({c: row.get(c) for c, _ in columns}, default=str) + "\n" for row in page
+                )
+            if columnar:
+                columnar.write_rows(page)
+            rows += len(page)
+            if progress and time.perf_counter() - last_report >= 2.0:
+                last_report = time.perf_counter()
+                progress(f"  {table}: {rows} rows")
+        if columns is None:
+            open_outputs([(c, t) for c, t in TABLES[table]["columns"].items() if c not in hidden])
+    finally:
+        if ndjson:
+            ndjson.close()
+        if columnar:
+            columnar.close()
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_sec": round(rows / max(seconds, 1e-9), 1),
+        "files": {p: os.path.getsize(p) for p in paths},
+    }
+
+
+def run_export(out_dir: str, entities: Sequence[str] = tuple(ENTITIES), **options) -> Dict[str, Dict]:
+    os.makedirs(out_dir, exist_ok=True)
+    progress = None if options.pop("quiet", False) else (lambda msg: print(msg, file=sys.stderr))
+    return {e: export_entity(e, out_dir, progress=progress, **options) for e in entities}
@@ -0,0 +1,370 @@
+"""Streaming bulk import for `python -m src.cli.main import <entity> <file>`.
+
+Records flow through generators (read -> validate -> batch), and at most
+`2 * workers` batches are in flight, so memory stays flat whatever the
+file size. Completed record ranges go to a checkpoint file; a re-run
+resumes after them and the file is removed once the import finishes.
+
+Every writer is idempotent: vibers, echoes, soul links, tribes and badges
+upsert on their natural keys, and thoughts, posts and reverberations carry
+an import_key ("<file sha1>:<record number>"). A batch retried after a
+timeout, or re-sent when resuming, never duplicates rows.
+"""
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+EMOTIONS = ("Joy", "Curiosity", "Nostalgia", "Rage")
+LINK_STATUSES = ("PENDING", "ACCEPTED", "REJECTED")
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+MAX_RETRIES = 3
+PROGRESS_EVERY = 2.0
+
+Record = Tuple[int, Dict]
+
+# Entities without a natural unique key; their rows get an import_key instead.
+KEYED_ENTITIES = frozenset({"thought", "post", "reverberation"})
+
+
+class RowError(ValueError):
+    pass
+
+
+# --- field helpers ---
+def _text(row: Dict, key: str, required: bool = True) -> Optional[str]:
+    value = row.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise RowError(f"missing {key}")
+        return None
+    return str(value)
+
+
+def _int(row: Dict, key: str, required: bool = True) -> Optional[int]:
+    value = row.get(key)
+    if value is None or value == "":
+        if required:
+            raise RowError(f"missing {key}")
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{key} must be an integer, got {value!r}")
+
+
+def _choice(row: Dict, key: str, choices: Tuple[str, ...], default: Optional[str] = None) -> str:
+    value = row.get(key) or default
+    if value not in choices:
+        raise RowError(f"{key} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+
+# --- per-entity validation: raw record -> insert payload ---
+def _viber(row: Dict) -> Dict:
+    return {
+        "username": _text(row, "username"),
+        "email": _text(row, "email"),
+        "password": _text(row, "password"),
+        "aura_color": _text(row, "aura_color", required=False) or "Neutral",
+        "vibe_level": _int(row, "vibe_level", required=False) or 1,
+        "badges": [],
+    }
+
+
+def _thought(row: Dict) -> Dict:
+    return {
+        "viber_id": _int(row, "viber_id"),
+        "content": _text(row, "content"),
+        "emotion_tag": _choice(row, "emotion_tag", EMOTIONS),
+    }
+
+
+def _post(row: Dict) -> Dict:
+    return {"user_id": _int(row, "user_id"), "content": _text(row, "content")}
+
+
+def _echo(row: Dict) -> Dict:
+    return {
+        "thought_id": _int(row, "thought_id"),
+        "viber_id": _int(row, "viber_id"),
+        "emotion_tag": _choice(row, "emotion_tag", EMOTIONS),
+    }
+
+
+def _reverberation(row: Dict) -> Dict:
+    return {"thought_id": _int(row, "thought_id"), "viber_id": _int(row, "viber_id"),
+            "content": _text(row, "content")}
+
+
+def _soul_link(row: Dict) -> Dict:
+    link = {
+        "viber_id": _int(row, "viber_id"),
+        "friend_id": _int(row, "friend_id"),
+        "status": _choice(row, "status", LINK_STATUSES, default="PENDING"),
+    }
+    if link["viber_id"] == link["friend_id"]:
+        raise RowError("viber_id and friend_id must differ")
+    return link
+
+
+def _tribe(row: Dict) -> Dict:
+    return {"name": _text(row, "name"), "description": _text(row, "description", required=False) or ""}
+
+
+def _badge(row: Dict) -> Dict:
+    return {
+        "name": _text(row, "name"),
+        "description": _text(row, "description", required=False) or "",
+        "aura_color": _text(row, "aura_color", required=False) or "Neutral",
+        "vibe_level_required": _int(row, "vibe_level_required", required=False) or 1,
+    }
+
+
+VALIDATORS: Dict[str, Callable[[Dict], Dict]] = {
+    "viber": _viber,
+    "thought": _thought,
+    "post": _post,
+    "echo": _echo,
+    "reverberation": _reverberation,
+    "soul": _soul_link,
+    "tribe": _tribe,
+    "badge": _badge,
+}
+
+
+def writer_for(entity: str) -> Callable[[List[Dict]], int]:
+    """Batch insert function for `entity`; returns the number of rows written."""
+    if entity == "echo":
+        from src.dao.echo_dao import EchoDAO
+        from src.services.echo_buffer import aggregate_counts
+        echo_dao = EchoDAO()
+
+        def write_echoes(rows: List[Dict]) -> int:
+            inserted = echo_dao.react_many(rows)
+            echo_dao.bump_counters(aggregate_counts(inserted))
+            return len(inserted)
+        return write_echoes
+
+    # Imported here so `--help` and other commands don't build every DAO.
+    from src.dao.badge_dao import BadgeDAO
+    from src.dao.post_dao import PostDAO
+    from src.dao.reverberation_dao import ReverberationDAO
+    from src.dao.soul_link_dao import SoulLinkDAO
+    from src.dao.thought_dao import ThoughtDAO
+    from src.dao.tribe_dao import TribeDAO
+    from src.dao.viber_dao import ViberDAO
+    daos = {
+        "viber": ViberDAO, "thought": ThoughtDAO, "post": PostDAO, "reverberation": ReverberationDAO,
+        "soul": SoulLinkDAO, "tribe": TribeDAO, "badge": BadgeDAO,
+    }
+    create_many = daos[entity]().create_many
+    return lambda rows: len(create_many(rows))
+
+
+# --- pipeline stages ---
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def read_records(path: str, fmt: str) -> Iterator[Record]:
+    """(record number, raw dict) pairs, numbered from 1. Blank lines are skipped."""
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), 1):
+                yield n, row
+            return
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    record = {"__error__": f"invalid JSON: {e.msg}"}
+                if not isinstance(record, dict):
+                    record = {"__error__": "expected a JSON object"}
+                yield n, record
+
+
+def validate(records: Iterable[Record], entity: str, stats: "ImportStats") -> Iterator[Record]:
+    check = VALIDATORS[entity]
+    for n, raw in records:
+        stats.read += 1
+        try:
+            if "__error__" in raw:
+                raise RowError(raw["__error__"])
+            yield n, check(raw)
+        except RowError as e:
+            stats.reject(n, str(e))
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()[:16]
+
+
+def with_import_keys(records: Iterable[Record], prefix: str) -> Iterator[Record]:
+    for n, row in records:
+        yield n, {**row, "import_key": f"{prefix}:{n}"}
+
+
+def batched(records: Iterable[Record], size: int, start: int = 0) -> Iterator[Tuple[int, int, List[Dict]]]:
+    """(first, last, rows) where first..last is the record range the batch covers.
+
+    Ranges are contiguous, so rejected or skipped records are covered too.
+    """
+    first, rows, last = start + 1, [], start
+    for n, row in records:
+        rows.append(row)
+        last = n
+        if len(rows) >= size:
+            yield first, last, rows
+            first, rows = last + 1, []
+    if rows:
+        yield first, last, rows
+
+
+class Checkpoint:
+    """Record ranges already imported; everything up to `through` is done."""
+
+    def __init__(self, path: str, entity: str, source: str):
+        self.path, self.entity, self.source = path, entity, os.path.abspath(source)
+        self.through = 0
+        self.done: List[List[int]] = []
+        self._lock = threading.Lock()
+
+    def load(self) -> "Checkpoint":
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            if state.get("entity") != self.entity or state.get("source") != self.source:
+                raise ValueError(f"checkpoint {self.path} belongs to another import; pass --restart")
+            self.through, self.done = state["through"], state["done"]
+        return self
+
+    def skip(self, n: int) -> bool:
+        return n <= self.through or any(a <= n <= b for a, b in self.done)
+
+    def complete(self, first: int, last: int):
+        with self._lock:
+            self.done.append([first, last])
+            self.done.sort()
+            while self.done and self.done[0][0] <= self.through + 1:
+                self.through = max(self.through, self.done.pop(0)[1])
+            self._save()
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"entity": self.entity, "source": self.source, "through": self.through, "done": self.done}, f)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ImportStats:
+    def __init__(self, report_errors: int = 10):
+        self.read = self.written = self.rejected = self.batches = 0
+        self.report_errors = report_errors
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def reject(self, n: int, reason: str):
+        self.rejected += 1
+        if self.rejected <= self.report_errors:
+            print(f"  record {n}: {reason}", file=sys.stderr)
+
+    def add_batch(self, written: int):
+        with self._lock:
+            self.written += written
+            self.batches += 1
+
+    def rate(self) -> float:
+        return self.written / max(time.perf_counter() - self.started, 1e-9)
+
+    def summary(self) -> Dict:
+        return {
+            "read": self.read,
+            "written": self.written,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "seconds": round(time.perf_counter() - self.started, 2),
+            "rows_per_sec": round(self.rate(), 1),
+        }
+
+
+def _write_with_retry(write: Callable[[List[Dict]], int], rows: List[Dict]) -> int:
+    # Safe even when the failed attempt was committed: every writer skips rows it already has.
+    for attempt in range(MAX_RETRIES):
+        try:
+            return write(rows)
+        except Exception:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def run_import(entity: str, path: str, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = DEFAULT_WORKERS,
+               fmt: Optional[str] = None, checkpoint_path: Optional[str] = None, restart: bool = False,
+               quiet: bool = False) -> Dict:
+    if entity not in VALIDATORS:
+        raise ValueError(f"unknown entity {entity!r}")
+    checkpoint = Checkpoint(checkpoint_path or f"{path}.{entity}.checkpoint", entity, path)
+    if restart:
+        checkpoint.remove()
+    checkpoint.load()
+    if checkpoint.through and not quiet:
+        print(f"Resuming after record {checkpoint.through}", file=sys.stderr)
+
+    write = writer_for(entity)
+    stats = ImportStats()
+    fmt = detect_format(path, fmt)
+    records = ((n, row) for n, row in read_records(path, fmt) if not checkpoint.skip(n))
+    valid = validate(records, entity, stats)
+    if entity in KEYED_ENTITIES:
+        valid = with_import_keys(valid, file_digest(path))
+    batches = batched(valid, batch_size, checkpoint.through)
+
+    last_report = time.perf_counter()
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for first, last, rows in batches:
+                if len(in_flight) >= 2 * workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _finish(future, in_flight.pop(future), stats, checkpoint)
+                in_flight[pool.submit(_write_with_retry, write, rows)] = (first, last)
+                if not quiet and time.perf_counter() - last_report >= PROGRESS_EVERY:
+                    last_report = time.perf_counter()
+                    print(f"  {stats.written} rows written, {stats.rate():.0f} rows/s", file=sys.stderr)
+        finally:
+            # Let in-flight batches land (or fail) so the checkpoint is accurate.
+            errors = []
+            for future in list(in_flight):
+                try:
+                    _finish(future, in_flight.pop(future), stats, checkpoint)
+                except Exception as e:
+                    errors.append(e)
+            if errors:
+                raise errors[0]
+    checkpoint.remove()
+    return stats.summary()
+
+
+def _finish(future, span: Tuple[int, int], stats: ImportStats, checkpoint: Checkpoint):
+    stats.add_batch(future.result())
+    checkpoint.complete(*span)
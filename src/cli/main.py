@@ -1,71 +1,180 @@
 
 import argparse
-from src.services.viber_service import ViberService
-from src.services.thought_service import ThoughtService
-from src.services.post_service import PostService
-from src.services.reverberation_service import ReverberationService
-from src.services.soul_link_service import SoulLinkService
-from src.services.echo_service import EchoService
-from src.services.badge_service import BadgeService
-from src.services.tribe_service import TribeService
+import os
+from src.dao.pagination import DEFAULT_PAGE_SIZE
 
+# Services are imported inside each handler so a command only loads the
+# modules (and builds the DAOs) it actually uses, and --help loads none.
+
+
+def add_page_args(parser):
+    parser.add_argument("--page-size", "--page_size", dest="page_size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--cursor")
+
+def print_next_cursor(next_cursor):
+    if next_cursor:
+        print("➡️ Next page: --cursor", next_cursor)
 
 def handle_viber(args):
+    from src.services.viber_service import ViberService
     if args.action == "register":
         viber = ViberService.register(args.username, args.email, args.password, args.aura_color)
         print("✅ Viber Registered:", viber)
     elif args.action == "list":
-        vibers = ViberService.list()
+        vibers, next_cursor = ViberService.list_page(args.page_size, args.cursor)
         for v in vibers:
             print(v)
+        print_next_cursor(next_cursor)
     elif args.action == "get":
         viber = ViberService.get(args.viber_id)
         print(viber or "❌ Not found")
 
 def handle_thought(args):
+    from src.services.thought_service import ThoughtService
     if args.action == "create":
         thought = ThoughtService.create(args.viber_id, args.content, args.emotion_tag)
         print("✅ Thought Created:", thought)
     elif args.action == "list":
-        thoughts = ThoughtService.list_recent()
+        thoughts, next_cursor = ThoughtService.list_page(args.page_size, args.cursor)
         for t in thoughts:
             print(t)
+        print_next_cursor(next_cursor)
 
 def handle_post(args):
+    from src.services.post_service import PostService
     if args.action == "create":
         post = PostService.create(args.user_id, args.content)
         print("✅ Post Created:", post)
     elif args.action == "list":
-        posts = PostService.list_recent()
+        posts, next_cursor = PostService.list_page(args.page_size, args.cursor)
         for p in posts:
             print(p)
+        print_next_cursor(next_cursor)
     elif args.action == "like":
         post = PostService.like(args.post_id)
         print("👍 Post Liked:", post)
 
 
 def handle_reverberation(args):
+    from src.services.reverberation_service import ReverberationService
     if args.action == "create":
-        r = ReverberationService.create(args.thought_id, args.viber_id, args.content)
+        r = ReverberationService.create(args.thought_id, args.viber_id, args.content, args.parent_id)
         print(r)
     elif args.action == "list":
-        r = ReverberationService.list(args.thought_id)
+        r, next_cursor = ReverberationService.list_page(args.thought_id, args.page_size, args.cursor)
+        print(r)
+        print_next_cursor(next_cursor)
+    elif args.action == "thread":
+        r, next_cursor = ReverberationService.thread_page(args.thought_id, args.page_size, args.cursor)
         print(r)
+        print_next_cursor(next_cursor)
+    elif args.action == "replies":
+        r, next_cursor = ReverberationService.replies_page(args.parent_id, args.page_size, args.cursor)
+        print(r)
+        print_next_cursor(next_cursor)
+    elif args.action == "counts":
+        print(ReverberationService.count_by_thoughts(args.thought_ids))
 
 def handle_soul_link(args):
+    from src.services.social_graph_service import SocialGraphService
+    from src.services.soul_link_service import SoulLinkService
     if args.action == "create":
         s = SoulLinkService.create(args.viber_id, args.friend_id)
         print(s)
     elif args.action == "update":
         s = SoulLinkService.update_status(args.link_id, args.status)
         print(s)
+    elif args.action == "friends":
+        print(SocialGraphService.friends(args.viber_id, args.limit))
+    elif args.action == "inbox":
+        print(SocialGraphService.pending_inbox(args.viber_id, args.limit))
+    elif args.action == "outbox":
+        print(SocialGraphService.pending_outbox(args.viber_id, args.limit))
+    elif args.action == "mutual":
+        print(SocialGraphService.mutual_friends(args.viber_id, args.friend_id))
+    elif args.action == "suggest":
+        print(SocialGraphService.suggestions(args.viber_id, args.limit or 10))
+
+def handle_import(args):
+    from src.cli.importer import run_import
+    summary = run_import(
+        args.import_entity, args.file, batch_size=args.batch_size, workers=args.workers,
+        fmt=args.format, checkpoint_path=args.checkpoint, restart=args.restart,
+    )
+    print(f"✅ Imported {summary['written']} {args.import_entity} rows "
+          f"({summary['rejected']} rejected) in {summary['seconds']}s — {summary['rows_per_sec']} rows/sec")
+
+def handle_export(args):
+    from src.cli.exporter import ENTITIES, run_export
+    formats = ["ndjson", "columnar"] if args.format == "both" else [args.format]
+    results = run_export(
+        args.out, args.entities or list(ENTITIES), formats=formats, compress=args.compress,
+        page_size=args.page_size, row_group_size=args.row_group_size, include_secrets=args.include_secrets,
+    )
+    for entity, r in results.items():
+        size = sum(r["files"].values())
+        print(f"✅ {entity}: {r['rows']} rows in {r['seconds']}s — {r['rows_per_sec']} rows/sec, {size / 1e6:.2f} MB")
+
+def handle_stats(args):
+    import json
+    from src.instrumentation import format_snapshot, load
+    try:
+        snap = load(args.file)
+    except FileNotFoundError:
+        print(f"❌ No metrics at {args.file}; run the app with VIBENET_INSTRUMENT=1 first")
+        return
+    if args.json:
+        print(json.dumps(snap, indent=2))
+    else:
+        print("\n".join(format_snapshot(snap, args.top)))
+
+def print_table(rows):
+    if not rows:
+        print("(no data)")
+        return
+    cols = list(rows[0])
+    widths = [max(len(str(c)), *(len(str(r.get(c))) for r in rows)) for c in cols]
+    print("  ".join(str(c).ljust(w) for c, w in zip(cols, widths)))
+    for r in rows:
+        print("  ".join(str(r.get(c)).ljust(w) for c, w in zip(cols, widths)))
+
+def handle_analytics(args):
+    import json
+    import time
+    try:
+        from src.services.analytics_service import AnalyticsService
+    except ImportError as e:
+        print(f"❌ Analytics needs NumPy ({e}); install it with: pip install numpy")
+        return
+    since = time.time() - args.days * 86400 if args.days else None
+    if args.action == "summary":
+        result = AnalyticsService.summary(args.source)
+    elif args.action == "timeline":
+        result = AnalyticsService.distribution_over_time(args.kind, args.bucket, since, args.source)
+    elif args.action == "mood":
+        result = AnalyticsService.mood_shift(args.kind, args.bucket, since, args.source)
+    elif args.action == "tribes":
+        result = AnalyticsService.distribution_by_tribe(args.kind, since, args.source)[:args.limit]
+    elif args.action == "vibers":
+        result = AnalyticsService.distribution_by_viber(args.viber_id, args.kind, args.limit, since, args.source)
+    else:
+        result = AnalyticsService.top_influencers(args.limit, args.emotion, since, args.source)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif isinstance(result, dict):
+        for k, v in result.items():
+            print(f"{k}: {v}")
+    else:
+        print_table(result)
 
 def handle_echo(args):
+    from src.services.echo_service import EchoService
     if args.action == "react":
         e = EchoService.react(args.thought_id, args.viber_id, args.emotion)
-        print(e)
+        print(e or "Already echoed with this emotion.")
 
 def handle_badge(args):
+    from src.services.badge_service import BadgeService
     if args.action == "create":
         b = BadgeService.create(args.name, args.description, args.aura_color, args.vibe_level)
         print(b)
@@ -73,6 +182,7 @@ def handle_badge(args):
         b = BadgeService.list()
         print(b)
 def handle_tribe(args):
+    from src.services.tribe_service import TribeService
     if args.action == "create":
         tribe = TribeService.create(args.name, args.description)
         print("🏕 Tribe Created:", tribe)
@@ -82,7 +192,18 @@ def handle_tribe(args):
             print(t)
     elif args.action == "join":
         membership = TribeService.join(args.viber_id, args.tribe_id)
-        print("🤝 Joined Tribe:", membership)
+        if membership:
+            print("🤝 Joined Tribe:", membership)
+        else:
+            print("Already a member")
+    elif args.action == "leave":
+        left = TribeService.leave(args.viber_id, args.tribe_id)
+        print("👋 Left Tribe" if left else "Not a member")
+    elif args.action == "members":
+        members, next_cursor = TribeService.members_page(args.tribe_id, args.page_size, args.cursor)
+        for m in members:
+            print(m)
+        print_next_cursor(next_cursor)
     elif args.action == "mytribes":
         tribes = TribeService.list_viber_tribes(args.viber_id)
         print("📜 Tribes Joined:", tribes)
@@ -101,7 +222,7 @@ def main():
     reg.add_argument("--password", required=True)
     reg.add_argument("--aura_color", default="Neutral")
 
-    viber_sub.add_parser("list")
+    add_page_args(viber_sub.add_parser("list"))
     get_cmd = viber_sub.add_parser("get")
     get_cmd.add_argument("--viber_id", type=int, required=True)
 
@@ -114,7 +235,7 @@ def main():
     create_t.add_argument("--content", required=True)
     create_t.add_argument("--emotion_tag", choices=["Joy", "Curiosity", "Nostalgia", "Rage"], required=True)
 
-    thought_sub.add_parser("list")
+    add_page_args(thought_sub.add_parser("list"))
 
     # Post
     post_parser = subparsers.add_parser("post")
@@ -124,7 +245,7 @@ def main():
     create_p.add_argument("--user_id", type=int, required=True)
     create_p.add_argument("--content", required=True)
 
-    post_sub.add_parser("list")
+    add_page_args(post_sub.add_parser("list"))
 
     like_p = post_sub.add_parser("like")
     like_p.add_argument("--post_id", type=int, required=True)
@@ -132,18 +253,22 @@ def main():
     
      
     rev_parser = subparsers.add_parser("reverberation")
-    rev_parser.add_argument("action", choices=["create", "list"])
+    rev_parser.add_argument("action", choices=["create", "list", "thread", "replies", "counts"])
     rev_parser.add_argument("--thought_id", type=int)
+    rev_parser.add_argument("--thought_ids", type=int, nargs="+")
+    rev_parser.add_argument("--parent_id", type=int, help="reply to this reverberation")
     rev_parser.add_argument("--viber_id", type=int)
     rev_parser.add_argument("--content")
+    add_page_args(rev_parser)
 
     # Soul links
     soul_parser = subparsers.add_parser("soul")
-    soul_parser.add_argument("action", choices=["create", "update"])
+    soul_parser.add_argument("action", choices=["create", "update", "friends", "inbox", "outbox", "mutual", "suggest"])
     soul_parser.add_argument("--viber_id", type=int)
     soul_parser.add_argument("--friend_id", type=int)
     soul_parser.add_argument("--link_id", type=int)
     soul_parser.add_argument("--status", choices=["PENDING", "ACCEPTED", "REJECTED"])
+    soul_parser.add_argument("--limit", type=int)
 
     # Echo
     echo_parser = subparsers.add_parser("echo")
@@ -175,11 +300,57 @@ def main():
     join_tr.add_argument("--viber_id", type=int, required=True)
     join_tr.add_argument("--tribe_id", type=int, required=True)
 
+    leave_tr = tribe_sub.add_parser("leave")
+    leave_tr.add_argument("--viber_id", type=int, required=True)
+    leave_tr.add_argument("--tribe_id", type=int, required=True)
+
+    members_tr = tribe_sub.add_parser("members")
+    members_tr.add_argument("--tribe_id", type=int, required=True)
+    add_page_args(members_tr)
+
     mytribes = tribe_sub.add_parser("mytribes")
     mytribes.add_argument("--viber_id", type=int, required=True)
 
-    
-    
+    # Bulk import
+    import_parser = subparsers.add_parser("import")
+    import_parser.add_argument("import_entity", metavar="entity",
+                               choices=["viber", "thought", "post", "echo", "reverberation", "soul", "tribe", "badge"])
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=["ndjson", "csv"], help="default: from the file extension")
+    import_parser.add_argument("--batch-size", "--batch_size", dest="batch_size", type=int, default=500)
+    import_parser.add_argument("--workers", type=int, default=4)
+    import_parser.add_argument("--checkpoint", help="default: <file>.<entity>.checkpoint")
+    import_parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+
+    # Export
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("--out", default="export")
+    export_parser.add_argument("--entities", nargs="+",
+                               choices=["viber", "thought", "post", "echo", "reverberation", "soul", "membership"])
+    export_parser.add_argument("--format", choices=["ndjson", "columnar", "both"], default="both")
+    export_parser.add_argument("--compress", choices=["none", "gzip", "bz2", "xz"], default="gzip")
+    export_parser.add_argument("--page-size", "--page_size", dest="page_size", type=int, default=1000)
+    export_parser.add_argument("--row-group-size", dest="row_group_size", type=int, default=65536)
+    export_parser.add_argument("--include-secrets", action="store_true", help="also export viber passwords")
+
+    # Emotion analytics (needs NumPy)
+    analytics_parser = subparsers.add_parser("analytics")
+    analytics_parser.add_argument("action", choices=["summary", "timeline", "mood", "tribes", "vibers", "influencers"])
+    analytics_parser.add_argument("--kind", choices=["echoes", "thoughts"], default="echoes")
+    analytics_parser.add_argument("--bucket", choices=["hour", "day", "week"], default="day")
+    analytics_parser.add_argument("--days", type=int, help="only the last N days")
+    analytics_parser.add_argument("--limit", type=int, default=10)
+    analytics_parser.add_argument("--emotion", choices=["Joy", "Curiosity", "Nostalgia", "Rage"])
+    analytics_parser.add_argument("--viber_id", type=int, nargs="+")
+    analytics_parser.add_argument("--source", help="export directory with .vnc files (default: the database)")
+    analytics_parser.add_argument("--json", action="store_true")
+
+    # Instrumentation snapshot written by the app (VIBENET_INSTRUMENT=1)
+    stats_parser = subparsers.add_parser("stats")
+    stats_parser.add_argument("--file", default=os.getenv("VIBENET_METRICS_FILE", ".vibenet-metrics.json"))
+    stats_parser.add_argument("--top", type=int, default=15)
+    stats_parser.add_argument("--json", action="store_true", help="print the raw snapshot")
+
     args = parser.parse_args()
 
     if args.entity == "viber":
@@ -199,6 +370,14 @@ def main():
         handle_badge(args)
     elif args.entity == "tribe":
         handle_tribe(args)
+    elif args.entity == "import":
+        handle_import(args)
+    elif args.entity == "export":
+        handle_export(args)
+    elif args.entity == "stats":
+        handle_stats(args)
+    elif args.entity == "analytics":
+        handle_analytics(args)
 
     else:
         parser.print_help()
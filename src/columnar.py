@@ -0,0 +1,206 @@
+"""A small dependency-free columnar file format for exports (`.vnc`).
+
+Layout, Parquet-style: rows are split into row groups, and each column
+of a row group is stored as its own (optionally compressed) chunk, so a
+reader can load just the columns it needs.
+
+    "VNC1" | chunk ... | footer JSON | uint32 footer length | "VNC1"
+
+A chunk is a null bitmap (one bit per row) followed by the values:
+int and timestamp columns as little-endian int64 deltas (timestamps in
+microseconds since the epoch), text and json columns as uint32 byte
+lengths plus one UTF-8 blob.
+"""
+import bz2
+import json
+import lzma
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"VNC1"
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+CODECS = {
+    "none": (lambda b: b, lambda b: b),
+    "zlib": (lambda b: zlib.compress(b, 6), zlib.decompress),
+    "bz2": (bz2.compress, bz2.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICRO = timedelta(microseconds=1)
+
+
+def _to_micros(value: Any) -> int:
+    if isinstance(value, (int, float)):
+        return int(value * 1_000_000)
+    ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH) // _MICRO
+
+
+def _from_micros(micros: int) -> str:
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def encode_column(kind: str, values: Sequence[Any]) -> bytes:
+    nulls = bytearray((len(values) + 7) // 8)
+    for i, v in enumerate(values):
+        if v is None:
+            nulls[i >> 3] |= 1 << (i & 7)
+    if kind in ("int", "timestamp"):
+        deltas, prev = array("q"), 0
+        for v in values:
+            if v is not None:
+                n = int(v) if kind == "int" else _to_micros(v)
+                deltas.append(n - prev)
+                prev = n
+            else:
+                deltas.append(0)
+        return bytes(nulls) + _little_endian(deltas)
+    texts = [b"" if v is None else (json.dumps(v) if kind == "json" else str(v)).encode() for v in values]
+    lengths = array("I", (len(t) for t in texts))
+    return bytes(nulls) + _little_endian(lengths) + b"".join(texts)
+
+
+def decode_column(kind: str, data: bytes, rows: int, raw_timestamps: bool = False) -> List[Any]:
+    nbytes = (rows + 7) // 8
+    nulls, body = data[:nbytes], data[nbytes:]
+    null_rows = [i for i in range(rows) if nulls[i >> 3] & (1 << (i & 7))] if any(nulls) else []
+
+    if kind in ("int", "timestamp"):
+        out = list(accumulate(_from_little_endian("q", body[:rows * 8])))
+        if kind == "timestamp" and not raw_timestamps:
+            out = [_from_micros(v) for v in out]
+    else:
+        lengths = _from_little_endian("I", body[:rows * 4])
+        blob = memoryview(body)[rows * 4:]
+        out, pos = [], 0
+        for n in lengths:
+            out.append(str(blob[pos:pos + n], "utf-8"))
+            pos += n
+        if kind == "json":
+            out = [json.loads(text) if text else text for text in out]
+    for i in null_rows:
+        out[i] = None
+    return out
+
+
+class ColumnarWriter:
+    """Buffers at most one row group in memory; call close() (or use `with`)."""
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]], codec: str = "zlib",
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec {codec!r}")
+        self.columns, self.codec, self.row_group_size = columns, codec, row_group_size
+        self._compress = CODECS[codec][0]
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._buffer: Dict[str, List[Any]] = {name: [] for name, _ in columns}
+        self._buffered = 0
+        self._row_groups: List[Dict] = []
+        self.rows = 0
+
+    def write_rows(self, rows: Sequence[Dict]):
+        for row in rows:
+            for name, _ in self.columns:
+                self._buffer[name].append(row.get(name))
+            self._buffered += 1
+            if self._buffered >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        chunks = []
+        for name, kind in self.columns:
+            data = self._compress(encode_column(kind, self._buffer[name]))
+            chunks.append([self._file.tell(), len(data)])
+            self._file.write(data)
+            self._buffer[name] = []
+        self._row_groups.append({"rows": self._buffered, "chunks": chunks})
+        self.rows += self._buffered
+        self._buffered = 0
+
+    def close(self) -> int:
+        if self._file.closed:
+            return self.rows
+        self._flush()
+        footer = json.dumps({
+            "version": 1,
+            "codec": self.codec,
+            "columns": [{"name": n, "type": k} for n, k in self.columns],
+            "rows": self.rows,
+            "row_groups": self._row_groups,
+        }).encode()
+        self._file.write(footer + struct.pack("<I", len(footer)) + MAGIC)
+        self._file.close()
+        return self.rows
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarReader:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{path} is not a columnar export")
+            f.seek(-8, 2)
+            size, magic = struct.unpack("<I4s", f.read(8))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is truncated")
+            f.seek(-8 - size, 2)
+            self.meta = json.loads(f.read(size))
+        self.columns: List[Tuple[str, str]] = [(c["name"], c["type"]) for c in self.meta["columns"]]
+        self.num_rows: int = self.meta["rows"]
+        self._decompress = CODECS[self.meta["codec"]][1]
+
+    def iter_row_groups(self, columns: Optional[Sequence[str]] = None,
+                        raw_timestamps: bool = False) -> Iterator[Dict[str, List[Any]]]:
+        """Column lists per row group, reading only the requested columns.
+
+        With raw_timestamps, timestamp columns come back as int microseconds
+        since the epoch instead of ISO strings.
+        """
+        wanted = [(i, n, k) for i, (n, k) in enumerate(self.columns) if columns is None or n in columns]
+        with open(self.path, "rb") as f:
+            for group in self.meta["row_groups"]:
+                out = {}
+                for i, name, kind in wanted:
+                    offset, length = group["chunks"][i]
+                    f.seek(offset)
+                    out[name] = decode_column(kind, self._decompress(f.read(length)), group["rows"], raw_timestamps)
+                yield out
+
+    def iter_rows(self, columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        for group in self.iter_row_groups(columns):
+            names = list(group)
+            for values in zip(*(group[n] for n in names)):
+                yield dict(zip(names, values))
@@ -1,9 +1,126 @@
 
 
 import os
-from supabase import create_client, Client
+import threading
+from typing import Dict, Tuple
 
-def get_supabase() -> Client:
-    url = os.getenv("SUPABASE_URL", "https://your-project-id.supabase.co")
-    key = os.getenv("SUPABASE_KEY", "your-anon-or-service-key")
-    return create_client(url, key)
+from src.instrumentation import instrument_client
+
+POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+KEEPALIVE_SECONDS = float(os.getenv("SUPABASE_KEEPALIVE", "30"))
+REQUEST_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+
+class PoolStats:
+    """Counts clients handed out and HTTP connections opened vs. reused."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clients_created = 0
+        self.client_reuses = 0
+        self.requests = 0
+        self.connections_opened = 0
+
+    def _trace(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+
+    def on_request(self, request):
+        # httpcore reports every new TCP connect through the trace extension;
+        # any request that did not trigger one went over a pooled connection.
+        request.extensions["trace"] = self._trace
+        with self._lock:
+            self.requests += 1
+
+    def on_client(self, created: bool):
+        with self._lock:
+            if created:
+                self.clients_created += 1
+            else:
+                self.client_reuses += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "clients_created": self.clients_created,
+                "client_reuses": self.client_reuses,
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": max(self.requests - self.connections_opened, 0),
+            }
+
+
+pool_stats = PoolStats()
+
+_clients: Dict[Tuple[str, str], object] = {}
+_clients_lock = threading.Lock()
+
+
+def _build_supabase_client(url: str, key: str):
+    # Imported here so local backends (and --help) never load the HTTP stack.
+    import httpx
+    from supabase import create_client, ClientOptions
+
+    http = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=POOL_SIZE,
+            max_keepalive_connections=POOL_SIZE,
+            keepalive_expiry=KEEPALIVE_SECONDS,
+        ),
+        timeout=REQUEST_TIMEOUT,
+        event_hooks={"request": [pool_stats.on_request]},
+    )
+    options = ClientOptions(postgrest_client_timeout=REQUEST_TIMEOUT, httpx_client=http)
+    return create_client(url, key, options=options)
+
+
+def _client_key() -> Tuple[str, str]:
+    backend = os.getenv("VIBENET_BACKEND", "supabase").lower()
+    if backend == "supabase":
+        url = os.getenv("SUPABASE_URL", "https://your-project-id.supabase.co")
+        key = os.getenv("SUPABASE_KEY", "your-anon-or-service-key")
+        return url, key
+    return backend, os.getenv("VIBENET_SQLITE_PATH", "vibenet.db") if backend == "sqlite" else ""
+
+
+def _build_client(key: Tuple[str, str]):
+    backend = os.getenv("VIBENET_BACKEND", "supabase").lower()
+    if backend == "supabase":
+        return _build_supabase_client(*key)
+    from src.storage import create_local_client
+    return create_local_client(backend)
+
+
+def get_supabase():
+    """The shared client for the configured backend (VIBENET_BACKEND).
+
+    Defaults to Supabase; `sqlite` and `memory` return a local client with
+    the same table()/rpc() API.
+    """
+    key = _client_key()
+    client = _clients.get(key)
+    created = False
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _build_client(key)
+                _clients[key] = client
+                created = True
+    pool_stats.on_client(created)
+    return instrument_client(client)
+
+
+def set_client(client):
+    """Make get_supabase() return `client` for the configured backend.
+
+    Used by the offline benchmarks to install an instrumented stand-in;
+    call it before the first DAO is built.
+    """
+    with _clients_lock:
+        _clients[_client_key()] = client
+
+
+def get_pool_stats() -> Dict:
+    return pool_stats.snapshot()
@@ -0,0 +1,56 @@
+"""Async variants of the DAOs: every public method is awaitable."""
+from src.aio import AsyncProxy
+from src.dao.badge_dao import BadgeDAO
+from src.dao.echo_dao import EchoDAO
+from src.dao.post_dao import PostDAO
+from src.dao.reverberation_dao import ReverberationDAO
+from src.dao.soul_link_dao import SoulLinkDAO
+from src.dao.stats_dao import StatsDAO
+from src.dao.thought_dao import ThoughtDAO
+from src.dao.tribe_dao import TribeDAO
+from src.dao.viber_dao import ViberDAO
+
+
+class AsyncViberDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(ViberDAO())
+
+
+class AsyncThoughtDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(ThoughtDAO())
+
+
+class AsyncPostDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(PostDAO())
+
+
+class AsyncEchoDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(EchoDAO())
+
+
+class AsyncReverberationDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(ReverberationDAO())
+
+
+class AsyncSoulLinkDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(SoulLinkDAO())
+
+
+class AsyncBadgeDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(BadgeDAO())
+
+
+class AsyncTribeDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(TribeDAO())
+
+
+class AsyncStatsDAO(AsyncProxy):
+    def __init__(self):
+        super().__init__(StatsDAO())
@@ -1,7 +1,10 @@
 
 
+from typing import Dict, List
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
 
+@instrument_dao
 class BadgeDAO:
     def __init__(self):
         self._db = get_supabase()
@@ -15,5 +18,19 @@ class BadgeDAO:
         }).execute()
         return resp.data
 
+    def create_many(self, rows: List[Dict]) -> List[Dict]:
+        resp = self._db.table("badges").upsert(rows, on_conflict="name", ignore_duplicates=True).execute()
+        return resp.data or []
+
     def list(self):
         return self._db.table("badges").select("*").execute().data
+
+    def award(self, viber_id: int, badge_names: List[str]) -> List[str]:
+        # Appends only the badges the viber is missing and returns those names.
+        resp = self._db.rpc("award_badges", {"p_viber_id": viber_id, "p_badges": list(badge_names)}).execute()
+        return resp.data or []
+
+    def award_many(self, awards: Dict[int, List[str]]) -> List[Dict]:
+        payload = [{"viber_id": viber_id, "badges": list(names)} for viber_id, names in awards.items()]
+        resp = self._db.rpc("award_badges_many", {"p_awards": payload}).execute()
+        return resp.data or []
@@ -1,13 +1,44 @@
+from typing import Dict, Iterator, List
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
+from src.dao.pagination import BULK_PAGE_SIZE, iter_pages
+from src.dao.projections import ALL
 
+@instrument_dao
 class EchoDAO:
     def __init__(self):
         self._db = get_supabase()
 
-    def react(self, thought_id: int, viber_id: int, emotion: str):
-        resp = self._db.table("echoes").insert({
+    def react(self, thought_id: int, viber_id: int, emotion: str) -> List[Dict]:
+        # [] when this viber already echoed the thought with this emotion.
+        return self.react_many([{
             "thought_id": thought_id,
             "viber_id": viber_id,
             "emotion_tag": emotion
-        }).execute()
-        return resp.data
+        }])
+
+    def react_many(self, rows: List[Dict]) -> List[Dict]:
+        # Duplicates are skipped by the unique key; only newly inserted rows come back.
+        resp = (self._db.table("echoes")
+                .upsert(rows, on_conflict="thought_id,viber_id,emotion_tag", ignore_duplicates=True)
+                .execute())
+        return resp.data or []
+
+    def bump_counters(self, counts: List[Dict]):
+        if counts:
+            self._db.rpc("bump_echo_counters", {"p_counts": counts}).execute()
+
+    def list_by_thoughts(self, thought_ids: List[int]) -> List[Dict]:
+        # Paged per chunk of ids: a single in_() read would be cut at the server's max rows.
+        ids, rows = list(thought_ids), []
+        for i in range(0, len(ids), BULK_PAGE_SIZE):
+            chunk = ids[i:i + BULK_PAGE_SIZE]
+            for page in iter_pages(lambda: self._db.table("echoes")
+                                   .select("echo_id,thought_id,emotion_tag,created_at")
+                                   .in_("thought_id", chunk), "echo_id", desc=False):
+                rows.extend(page)
+        return rows
+
+    def iter_all(self, page_size: int = BULK_PAGE_SIZE, desc: bool = True,
+                 columns: str = ALL) -> Iterator[List[Dict]]:
+        return iter_pages(lambda: self._db.table("echoes").select(columns), "echo_id", page_size, desc)
@@ -0,0 +1,81 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# PostgREST cuts every response at the project's max-rows setting (1000 on Supabase).
+SERVER_MAX_ROWS = int(os.getenv("SUPABASE_MAX_ROWS", "1000"))
+# Internal bulk walks (index warm-up, exports) may use bigger pages than the UI,
+# but stay below the server cap so the look-ahead row is never cut off.
+MAX_BULK_PAGE_SIZE = max(SERVER_MAX_ROWS - 1, 1)
+BULK_PAGE_SIZE = min(500, MAX_BULK_PAGE_SIZE)
+
+
+def clamp_page_size(page_size: Optional[int], max_page_size: int = MAX_PAGE_SIZE) -> int:
+    return max(1, min(int(page_size or DEFAULT_PAGE_SIZE), max_page_size))
+
+
+def encode_cursor(row: Dict, id_col: str) -> str:
+    raw = json.dumps([row.get("created_at"), row.get(id_col)]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Union[str, float], int]:
+    # Cursors come back from clients, so check the types before they reach a filter string.
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if type(row_id) is not int:
+            raise ValueError
+        if isinstance(created_at, str):
+            datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        elif type(created_at) not in (int, float):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, row_id
+
+
+def keyset_page(query, id_col: str, page_size: int, cursor: Optional[str] = None,
+                desc: bool = True, max_page_size: int = MAX_PAGE_SIZE) -> Tuple[List[Dict], Optional[str]]:
+    """Fetch one page ordered by (created_at, id_col) starting after `cursor`.
+
+    Each page is a bounded index range scan, so deep pages cost the same as
+    the first one. Returns the rows and the cursor for the next page (None
+    when there are no more rows).
+    """
+    page_size = clamp_page_size(page_size, max_page_size)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        if not isinstance(created_at, str):
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        op = "lt" if desc else "gt"
+        query = query.or_(
+            f'created_at.{op}."{created_at}",'
+            f'and(created_at.eq."{created_at}",{id_col}.{op}.{last_id})'
+        )
+    # One extra row tells us whether another page exists without a count query.
+    rows = (query.order("created_at", desc=desc)
+                 .order(id_col, desc=desc)
+                 .limit(page_size + 1)
+                 .execute().data or [])
+    next_cursor = encode_cursor(rows[page_size - 1], id_col) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def iter_pages(make_query, id_col: str, page_size: int = BULK_PAGE_SIZE,
+               desc: bool = True) -> Iterator[List[Dict]]:
+    """Walk a whole table page by page; `make_query` builds a fresh filtered query."""
+    page_size = clamp_page_size(page_size, MAX_BULK_PAGE_SIZE)
+    cursor = None
+    while True:
+        rows, cursor = keyset_page(make_query(), id_col, page_size, cursor, desc, max_page_size=MAX_BULK_PAGE_SIZE)
+        if rows:
+            yield rows
+        if not cursor and len(rows) == page_size:
+            # A full page without its look-ahead row: a lower server cap cut it, so probe on.
+            cursor = encode_cursor(rows[-1], id_col)
+        if not cursor:
+            return
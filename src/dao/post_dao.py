@@ -1,33 +1,56 @@
 
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
+from src.dao.pagination import BULK_PAGE_SIZE, iter_pages, keyset_page
+from src.dao.projections import ALL
 
+@instrument_dao
 class PostDAO:
     def __init__(self):
         self._db = get_supabase()
 
     def create(self, user_id: int, content: str) -> Optional[Dict]:
         payload = {"user_id": user_id, "content": content}
-        self._db.table("posts").insert(payload).execute()
-        return self.list_recent(1)[0] if self.list_recent(1) else None
-
-    def get_by_id(self, post_id: int) -> Optional[Dict]:
-        resp = self._db.table("posts").select("*").eq("post_id", post_id).limit(1).execute()
+        resp = self._db.table("posts").insert(payload).execute()
         return resp.data[0] if resp.data else None
 
-    def list_recent(self, limit: int = 10) -> List[Dict]:
-        resp = self._db.table("posts").select("*").order("created_at", desc=True).limit(limit).execute()
+    def create_many(self, rows: List[Dict]) -> List[Dict]:
+        # Rows with an import_key already written are skipped, so retried import batches are safe.
+        resp = self._db.table("posts").upsert(rows, on_conflict="import_key", ignore_duplicates=True).execute()
         return resp.data or []
 
+    def get_by_id(self, post_id: int, columns: str = ALL) -> Optional[Dict]:
+        resp = self._db.table("posts").select(columns).eq("post_id", post_id).limit(1).execute()
+        return resp.data[0] if resp.data else None
+
+    def list_recent(self, limit: int = 10, columns: str = ALL) -> List[Dict]:
+        # Walks pages until `limit` is reached; list_page alone would clamp it to MAX_PAGE_SIZE.
+        rows: List[Dict] = []
+        for page in iter_pages(lambda: self._db.table("posts").select(columns), "post_id",
+                               min(limit, BULK_PAGE_SIZE)):
+            rows.extend(page)
+            if len(rows) >= limit:
+                break
+        return rows[:limit]
+
+    def list_page(self, page_size: int = 20, cursor: Optional[str] = None,
+                  columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        query = self._db.table("posts").select(columns)
+        return keyset_page(query, "post_id", page_size, cursor)
+
+    def iter_all(self, page_size: int = BULK_PAGE_SIZE, desc: bool = True) -> Iterator[List[Dict]]:
+        return iter_pages(lambda: self._db.table("posts").select("*"), "post_id", page_size, desc)
+
     def update(self, post_id: int, updates: Dict) -> Optional[Dict]:
-        self._db.table("posts").update(updates).eq("post_id", post_id).execute()
-        return self.get_by_id(post_id)
+        resp = self._db.table("posts").update(updates).eq("post_id", post_id).execute()
+        return resp.data[0] if resp.data else None
 
     def delete(self, post_id: int) -> bool:
         self._db.table("posts").delete().eq("post_id", post_id).execute()
         return True
 
     def like(self, post_id: int) -> Optional[Dict]:
-        # Increment likes
-        self._db.rpc("increment_likes", {"p_post_id": post_id}).execute()  # or raw update if function not present
-        return self.get_by_id(post_id)
+        # increment_likes returns the updated row (db/migrations/001_increment_likes_returning.sql)
+        resp = self._db.rpc("increment_likes", {"p_post_id": post_id}).execute()
+        return resp.data[0] if resp.data else None
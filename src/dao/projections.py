@@ -0,0 +1,26 @@
+"""Named column lists for the hot read paths.
+
+Pass one as `columns=` to a DAO or service read instead of the default
+"*". Projections used with paginated reads must keep `created_at` and
+the table's id column, which the keyset cursor is built from.
+"""
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+ALL = "*"
+
+# vibers
+AUTH = "viber_id,username,password,badges"  # sign-in: check the password, seed the session
+AUTHOR_CARD = "viber_id,username,aura_color,vibe_level"  # name and avatar next to content
+PROFILE = "viber_id,username,email,aura_color,vibe_level,badges,created_at"
+
+# thoughts
+FEED_ITEM = "thought_id,viber_id,content,emotion_tag,echoes,vibe_score,reverberation_count,created_at"
+
+
+@lru_cache(maxsize=256)
+def column_set(columns: Optional[str]) -> Optional[FrozenSet[str]]:
+    """The named columns, or None for every column."""
+    if not columns or columns.strip() == ALL:
+        return None
+    return frozenset(c.strip() for c in columns.split(",") if c.strip())
@@ -1,17 +1,72 @@
+from typing import Dict, Iterator, List, Optional, Tuple
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
+from src.dao.pagination import BULK_PAGE_SIZE, iter_pages, keyset_page
+from src.dao.projections import ALL
 
+@instrument_dao
 class ReverberationDAO:
     def __init__(self):
         self._db = get_supabase()
 
-    def create(self, thought_id: int, viber_id: int, content: str):
-        resp = self._db.table("reverberations").insert({
+    def create(self, thought_id: int, viber_id: int, content: str, parent_id: Optional[int] = None) -> List[Dict]:
+        # Returns [] when parent_id is not a reverberation on the same thought.
+        return self.create_many([{
             "thought_id": thought_id,
             "viber_id": viber_id,
-            "content": content
-        }).execute()
-        return resp.data
+            "content": content,
+            "parent_id": parent_id,
+        }])
 
-    def list_by_thought(self, thought_id: int):
-        resp = self._db.table("reverberations").select("*").eq("thought_id", thought_id).execute()
-        return resp.data
+    def create_many(self, rows: List[Dict]) -> List[Dict]:
+        # Through the RPC so the local backends keep the counters the SQL triggers maintain.
+        return self._db.rpc("add_reverberations", {"p_rows": rows}).execute().data or []
+
+    def list_by_thoughts(self, thought_ids: List[int]) -> List[Dict]:
+        # Paged per chunk of ids: a single in_() read would be cut at the server's max rows.
+        ids, rows = list(thought_ids), []
+        for i in range(0, len(ids), BULK_PAGE_SIZE):
+            chunk = ids[i:i + BULK_PAGE_SIZE]
+            for page in iter_pages(lambda: self._db.table("reverberations")
+                                   .select("reverberation_id,thought_id,created_at")
+                                   .in_("thought_id", chunk), "reverberation_id", desc=False):
+                rows.extend(page)
+        return rows
+
+    def count_by_thoughts(self, thought_ids: List[int]) -> Dict[int, int]:
+        ids = list({i for i in thought_ids if i is not None})
+        if not ids:
+            return {}
+        rows = self._db.rpc("reverberation_counts", {"p_thought_ids": ids}).execute().data or []
+        counts = dict.fromkeys(ids, 0)
+        counts.update((r["thought_id"], r["n"]) for r in rows)
+        return counts
+
+    def list_by_thought(self, thought_id: int, columns: str = ALL) -> List[Dict]:
+        # Every reverberation, oldest first; callers that render a page use list_page_by_thought.
+        pages = iter_pages(lambda: self._db.table("reverberations").select(columns).eq("thought_id", thought_id),
+                           "reverberation_id", desc=False)
+        return [row for page in pages for row in page]
+
+    def list_page_by_thought(self, thought_id: int, page_size: int = 20, cursor: Optional[str] = None,
+                             columns: str = ALL, roots_only: bool = False) -> Tuple[List[Dict], Optional[str]]:
+        # Oldest first so a conversation reads top to bottom.
+        query = self._db.table("reverberations").select(columns).eq("thought_id", thought_id)
+        if roots_only:
+            query = query.is_("parent_id", "null")
+        return keyset_page(query, "reverberation_id", page_size, cursor, desc=False)
+
+    def list_replies_page(self, parent_id: int, page_size: int = 20, cursor: Optional[str] = None,
+                          columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        query = self._db.table("reverberations").select(columns).eq("parent_id", parent_id)
+        return keyset_page(query, "reverberation_id", page_size, cursor, desc=False)
+
+    def list_first_replies(self, parent_ids: List[int], per_parent: int = 3) -> List[Dict]:
+        """The oldest `per_parent` direct replies of each parent, in one round trip."""
+        if not parent_ids:
+            return []
+        params = {"p_parent_ids": list(parent_ids), "p_per_parent": per_parent}
+        return self._db.rpc("reverberation_replies", params).execute().data or []
+
+    def iter_all(self, page_size: int = BULK_PAGE_SIZE, desc: bool = True) -> Iterator[List[Dict]]:
+        return iter_pages(lambda: self._db.table("reverberations").select("*"), "reverberation_id", page_size, desc)
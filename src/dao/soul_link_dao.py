@@ -1,5 +1,9 @@
+from typing import Dict, Iterator, List
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
+from src.dao.pagination import BULK_PAGE_SIZE, iter_pages
 
+@instrument_dao
 class SoulLinkDAO:
     def __init__(self):
         self._db = get_supabase()
@@ -11,6 +15,17 @@ class SoulLinkDAO:
         }).execute()
         return resp.data
 
+    def create_many(self, rows: List[Dict]) -> List[Dict]:
+        resp = (self._db.table("soul_links")
+                .upsert(rows, on_conflict="viber_id,friend_id", ignore_duplicates=True).execute())
+        return resp.data or []
+
     def update_status(self, link_id: int, status: str):
         resp = self._db.table("soul_links").update({"status": status}).eq("link_id", link_id).execute()
-        return resp.data
\ No newline at end of file
+        return resp.data
+
+    def iter_all(self, page_size: int = BULK_PAGE_SIZE) -> Iterator[List[Dict]]:
+        return iter_pages(
+            lambda: self._db.table("soul_links").select("link_id,viber_id,friend_id,status,created_at"),
+            "link_id", page_size, desc=False,
+        )
@@ -0,0 +1,59 @@
+import logging
+import os
+from typing import Dict, List
+from src.config import get_supabase
+from src.instrumentation import instrument_dao
+
+log = logging.getLogger(__name__)
+
+COUNT_METHOD = os.getenv("STATS_COUNT_METHOD", "estimated")
+MISSING_FUNCTION_CODES = ("PGRST202", "42883")
+
+ID_COLUMNS = {
+    "vibers": "viber_id",
+    "thoughts": "thought_id",
+    "posts": "post_id",
+    "tribes": "tribe_id",
+    "echoes": "echo_id",
+    "reverberations": "reverberation_id",
+}
+
+
+def is_missing_function(exc: Exception) -> bool:
+    # PGRST202: PostgREST found no such function; 42883: Postgres undefined_function.
+    return str(getattr(exc, "code", "") or "") in MISSING_FUNCTION_CODES
+
+
+@instrument_dao
+class StatsDAO:
+    def __init__(self):
+        self._db = get_supabase()
+        self._has_counters = True
+
+    def count(self, table: str, method: str = COUNT_METHOD) -> int:
+        """Row count without transferring rows (HEAD request with a count header)."""
+        resp = self._db.table(table).select(ID_COLUMNS[table], count=method, head=True).execute()
+        return resp.count or 0
+
+    def counts(self, tables: List[str]) -> Dict[str, int]:
+        """Counts for several tables, from the trigger-maintained table_counts in one call.
+
+        Falls back to per-table count queries for tables the counters do not
+        cover, or for good if the get_table_counts function is missing. Any
+        other error (a timeout, a blip) only falls back for this call.
+        """
+        found: Dict[str, int] = {}
+        if self._has_counters:
+            try:
+                rows = self._db.rpc("get_table_counts", {"p_names": list(tables)}).execute().data or []
+                found = {r["name"]: int(r["n"]) for r in rows}
+            except Exception as exc:
+                if is_missing_function(exc):
+                    log.warning("get_table_counts missing; using count queries from now on")
+                    self._has_counters = False
+                else:
+                    log.warning("get_table_counts failed; using count queries", exc_info=True)
+        for table in tables:
+            if table not in found:
+                found[table] = self.count(table)
+        return found
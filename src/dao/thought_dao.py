@@ -1,26 +1,62 @@
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
+from src.dao.pagination import BULK_PAGE_SIZE, iter_pages, keyset_page
+from src.dao.projections import ALL
 
+@instrument_dao
 class ThoughtDAO:
     def __init__(self):
         self._db = get_supabase()
 
     def create(self, viber_id: int, content: str, emotion_tag: str) -> Optional[Dict]:
         payload = {"viber_id": viber_id, "content": content, "emotion_tag": emotion_tag}
-        self._db.table("thoughts").insert(payload).execute()
-        return self.list_recent(1)[0] if self.list_recent(1) else None
+        resp = self._db.table("thoughts").insert(payload).execute()
+        return resp.data[0] if resp.data else None
+
+    def create_many(self, rows: List[Dict]) -> List[Dict]:
+        # Rows with an import_key already written are skipped, so retried import batches are safe.
+        resp = self._db.table("thoughts").upsert(rows, on_conflict="import_key", ignore_duplicates=True).execute()
+        return resp.data or []
 
-    def get_by_id(self, thought_id: int) -> Optional[Dict]:
-        resp = self._db.table("thoughts").select("*").eq("thought_id", thought_id).limit(1).execute()
+    def get_by_id(self, thought_id: int, columns: str = ALL) -> Optional[Dict]:
+        resp = self._db.table("thoughts").select(columns).eq("thought_id", thought_id).limit(1).execute()
         return resp.data[0] if resp.data else None
 
-    def list_recent(self, limit: int = 10) -> List[Dict]:
-        resp = self._db.table("thoughts").select("*").order("created_at", desc=True).limit(limit).execute()
+    def get_by_ids(self, thought_ids: List[int], columns: str = ALL) -> List[Dict]:
+        ids = list({i for i in thought_ids if i is not None})
+        if not ids:
+            return []
+        resp = self._db.table("thoughts").select(columns).in_("thought_id", ids).execute()
         return resp.data or []
 
+    def list_recent(self, limit: int = 10, columns: str = ALL) -> List[Dict]:
+        # Walks pages until `limit` is reached; list_page alone would clamp it to MAX_PAGE_SIZE.
+        rows: List[Dict] = []
+        for page in iter_pages(lambda: self._db.table("thoughts").select(columns), "thought_id",
+                               min(limit, BULK_PAGE_SIZE)):
+            rows.extend(page)
+            if len(rows) >= limit:
+                break
+        return rows[:limit]
+
+    def list_page(self, page_size: int = 20, cursor: Optional[str] = None,
+                  columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        query = self._db.table("thoughts").select(columns)
+        return keyset_page(query, "thought_id", page_size, cursor)
+
+    def list_page_by_viber(self, viber_id: int, page_size: int = 20,
+                           cursor: Optional[str] = None, columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        query = self._db.table("thoughts").select(columns).eq("viber_id", viber_id)
+        return keyset_page(query, "thought_id", page_size, cursor)
+
+    def iter_all(self, page_size: int = BULK_PAGE_SIZE, desc: bool = True,
+                 columns: str = ALL) -> Iterator[List[Dict]]:
+        return iter_pages(lambda: self._db.table("thoughts").select(columns), "thought_id", page_size, desc)
+
     def update(self, thought_id: int, updates: Dict) -> Optional[Dict]:
-        self._db.table("thoughts").update(updates).eq("thought_id", thought_id).execute()
-        return self.get_by_id(thought_id)
+        resp = self._db.table("thoughts").update(updates).eq("thought_id", thought_id).execute()
+        return resp.data[0] if resp.data else None
 
     def delete(self, thought_id: int) -> bool:
         self._db.table("thoughts").delete().eq("thought_id", thought_id).execute()
@@ -1,5 +1,9 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
+from src.dao.pagination import BULK_PAGE_SIZE, MAX_BULK_PAGE_SIZE, clamp_page_size, keyset_page
 
+@instrument_dao
 class TribeDAO:
     def __init__(self):
         self._db = get_supabase()
@@ -10,14 +14,60 @@ class TribeDAO:
             "description": description
         }).execute().data
 
+    def create_many(self, rows: List[Dict]) -> List[Dict]:
+        resp = self._db.table("tribes").upsert(rows, on_conflict="name", ignore_duplicates=True).execute()
+        return resp.data or []
+
     def list(self):
         return self._db.table("tribes").select("*").execute().data
 
     def join(self, viber_id, tribe_id):
-        return self._db.table("viber_tribes").insert({
-            "viber_id": viber_id,
-            "tribe_id": tribe_id
-        }).execute().data
+        # Idempotent; returns [] if the viber was already a member.
+        return self._db.rpc("join_tribe", {"p_viber_id": viber_id, "p_tribe_id": tribe_id}).execute().data or []
+
+    def leave(self, viber_id: int, tribe_id: int) -> List[Dict]:
+        return self._db.rpc("leave_tribe", {"p_viber_id": viber_id, "p_tribe_id": tribe_id}).execute().data or []
 
     def list_viber_tribes(self, viber_id):
-        return self._db.table("viber_tribes").select("*").eq("viber_id", viber_id).execute().data
+        """The viber's tribes, with member counts and joined_at."""
+        return self.list_with_membership(viber_id, joined_only=True)
+
+    def list_with_membership(self, viber_id: int, joined_only: bool = False) -> List[Dict]:
+        """All tribes with member_count and the viber's is_member flag."""
+        params = {"p_viber_id": viber_id, "p_joined_only": joined_only}
+        return self._db.rpc("tribes_for_viber", params).execute().data or []
+
+    def member_of(self, viber_id: int, tribe_ids: Iterable[int]) -> List[int]:
+        ids = list({i for i in tribe_ids if i is not None})
+        if not ids:
+            return []
+        rows = (self._db.table("viber_tribes").select("tribe_id")
+                .eq("viber_id", viber_id).in_("tribe_id", ids).execute().data or [])
+        return [r["tribe_id"] for r in rows]
+
+    def list_members_page(self, tribe_id: int, page_size: int = 20,
+                          cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        query = self._db.table("viber_tribes").select("viber_id,tribe_id,created_at").eq("tribe_id", tribe_id)
+        return keyset_page(query, "viber_id", page_size, cursor)
+
+    def list_by_vibers(self, viber_ids):
+        if not viber_ids:
+            return []
+        return (self._db.table("viber_tribes").select("viber_id,tribe_id")
+                .in_("viber_id", list(viber_ids)).execute().data or [])
+
+    def iter_memberships(self, page_size: int = BULK_PAGE_SIZE) -> Iterator[List[Dict]]:
+        # viber_tribes has no surrogate id; walk its (viber_id, tribe_id) key instead.
+        # Below the server's max-rows, so a short page really is the last one.
+        page_size = clamp_page_size(page_size, MAX_BULK_PAGE_SIZE)
+        last = None
+        while True:
+            query = self._db.table("viber_tribes").select("*")
+            if last:
+                query = query.or_(f"viber_id.gt.{last[0]},and(viber_id.eq.{last[0]},tribe_id.gt.{last[1]})")
+            rows = query.order("viber_id").order("tribe_id").limit(page_size).execute().data or []
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last = (rows[-1]["viber_id"], rows[-1]["tribe_id"])
@@ -1,6 +1,11 @@
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
+from src.cache import viber_cache
 from src.config import get_supabase
+from src.instrumentation import instrument_dao
+from src.dao.pagination import BULK_PAGE_SIZE, iter_pages, keyset_page
+from src.dao.projections import ALL
 
+@instrument_dao
 class ViberDAO:
     def __init__(self):
         self._db = get_supabase()
@@ -14,25 +19,46 @@ class ViberDAO:
             "vibe_level": 1,
             "badges": []
         }
-        self._db.table("vibers").insert(payload).execute()
-        return self.get_by_username(username)
+        resp = self._db.table("vibers").insert(payload).execute()
+        return resp.data[0] if resp.data else None
+
+    def create_many(self, rows: List[Dict]) -> List[Dict]:
+        # Existing usernames are skipped, so re-running an import is safe.
+        resp = self._db.table("vibers").upsert(rows, on_conflict="username", ignore_duplicates=True).execute()
+        return resp.data or []
 
-    def get_by_id(self, viber_id: int) -> Optional[Dict]:
-        resp = self._db.table("vibers").select("*").eq("viber_id", viber_id).limit(1).execute()
+    def get_by_id(self, viber_id: int, columns: str = ALL) -> Optional[Dict]:
+        resp = self._db.table("vibers").select(columns).eq("viber_id", viber_id).limit(1).execute()
         return resp.data[0] if resp.data else None
 
-    def get_by_username(self, username: str) -> Optional[Dict]:
-        resp = self._db.table("vibers").select("*").eq("username", username).limit(1).execute()
+    def get_by_username(self, username: str, columns: str = ALL) -> Optional[Dict]:
+        resp = self._db.table("vibers").select(columns).eq("username", username).limit(1).execute()
         return resp.data[0] if resp.data else None
 
-    def list_all(self, limit: int = 100) -> List[Dict]:
-        resp = self._db.table("vibers").select("*").limit(limit).execute()
+    def get_by_ids(self, viber_ids: List[int], columns: str = ALL) -> List[Dict]:
+        ids = list({i for i in viber_ids if i is not None})
+        if not ids:
+            return []
+        resp = self._db.table("vibers").select(columns).in_("viber_id", ids).execute()
         return resp.data or []
 
+    def list_all(self, limit: int = 100) -> List[Dict]:
+        return self.list_page(limit)[0]
+
+    def list_page(self, page_size: int = 20, cursor: Optional[str] = None,
+                  columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        query = self._db.table("vibers").select(columns)
+        return keyset_page(query, "viber_id", page_size, cursor)
+
+    def iter_all(self, page_size: int = BULK_PAGE_SIZE, desc: bool = True) -> Iterator[List[Dict]]:
+        return iter_pages(lambda: self._db.table("vibers").select("*"), "viber_id", page_size, desc)
+
     def update(self, viber_id: int, updates: Dict) -> Optional[Dict]:
-        self._db.table("vibers").update(updates).eq("viber_id", viber_id).execute()
-        return self.get_by_id(viber_id)
+        resp = self._db.table("vibers").update(updates).eq("viber_id", viber_id).execute()
+        viber_cache.invalidate(viber_id)
+        return resp.data[0] if resp.data else None
 
     def delete(self, viber_id: int) -> bool:
         self._db.table("vibers").delete().eq("viber_id", viber_id).execute()
+        viber_cache.invalidate(viber_id)
         return True
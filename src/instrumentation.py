@@ -0,0 +1,334 @@
+"""Opt-in query instrumentation for the DAOs.
+
+Enable with VIBENET_INSTRUMENT=1 (before the first DAO is built). Every
+execute()/rpc() then records a latency histogram, row counts and JSON
+payload sizes per (table, operation), every DAO method a latency
+histogram, and queries slower than VIBENET_SLOW_QUERY_MS are logged to
+the `vibenet.slow_query` logger with the DAO method that issued them.
+begin_render()/end_render() count the queries of one page render,
+including ones run on the src.aio thread pool.
+
+When disabled, get_supabase() hands out the raw client and
+instrument_dao() returns the class untouched, so there is no overhead.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+log = logging.getLogger("vibenet.slow_query")
+
+ENABLED = os.getenv("VIBENET_INSTRUMENT", "0").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("VIBENET_SLOW_QUERY_MS", "200"))
+METRICS_FILE = os.getenv("VIBENET_METRICS_FILE", ".vibenet-metrics.json")
+
+# Upper bounds in milliseconds; the last bucket is open-ended.
+BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+WRITE_OPS = ("insert", "upsert", "update")
+
+
+def enabled() -> bool:
+    return ENABLED
+
+
+def enable(on: bool = True):
+    """Switch instrumentation on for DAOs built (and classes decorated) after this call."""
+    global ENABLED
+    ENABLED = on
+
+
+class Histogram:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th value (max for the last one)."""
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(["<=%g" % b for b in BUCKETS_MS] + ["inf"], self.buckets)),
+        }
+
+
+class QueryStats:
+    __slots__ = ("latency", "rows", "bytes_in", "bytes_out", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = self.bytes_in = self.bytes_out = self.errors = 0
+
+    def summary(self) -> Dict:
+        return {**self.latency.summary(), "rows": self.rows, "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out, "errors": self.errors}
+
+
+class Render:
+    """Queries issued while one page renders."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.query_ms = 0.0
+        self.started = time.perf_counter()
+        self.ms = 0.0
+        self.token: Optional[contextvars.Token] = None
+        self._lock = threading.Lock()
+
+    def add(self, ms: float):
+        with self._lock:
+            self.queries += 1
+            self.query_ms += ms
+
+
+class Metrics:
+    def __init__(self, recent: int = 50):
+        self._lock = threading.Lock()
+        self.queries: Dict[str, QueryStats] = {}
+        self.dao_calls: Dict[str, Histogram] = {}
+        self.renders: Dict[str, Histogram] = {}
+        self.render_queries: Dict[str, int] = {}
+        self.slow: Deque[Dict] = deque(maxlen=recent)
+        self.last_renders: Deque[Dict] = deque(maxlen=recent)
+
+    def record_query(self, key: str, ms: float, rows: int, bytes_in: int, bytes_out: int, error: bool):
+        with self._lock:
+            stats = self.queries.get(key) or self.queries.setdefault(key, QueryStats())
+            stats.latency.add(ms)
+            stats.rows += rows
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.errors += error
+
+    def record_call(self, name: str, ms: float):
+        with self._lock:
+            (self.dao_calls.get(name) or self.dao_calls.setdefault(name, Histogram())).add(ms)
+
+    def record_slow(self, entry: Dict):
+        with self._lock:
+            self.slow.append(entry)
+
+    def record_render(self, render: Render):
+        with self._lock:
+            self.renders.setdefault(render.name, Histogram()).add(render.ms)
+            self.render_queries[render.name] = self.render_queries.get(render.name, 0) + render.queries
+            self.last_renders.append({"page": render.name, "ms": round(render.ms, 1),
+                                      "queries": render.queries, "query_ms": round(render.query_ms, 1)})
+
+    def reset(self):
+        # In place: threads already waiting on _lock must still find it guarding these fields.
+        with self._lock:
+            self.queries, self.dao_calls = {}, {}
+            self.renders, self.render_queries = {}, {}
+            self.slow.clear()
+            self.last_renders.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": ENABLED,
+                "slow_query_ms": SLOW_QUERY_MS,
+                "queries": {k: s.summary() for k, s in sorted(self.queries.items())},
+                "dao_calls": {k: h.summary() for k, h in sorted(self.dao_calls.items())},
+                "renders": {
+                    name: {**h.summary(), "mean_queries": round(self.render_queries[name] / h.count, 1)}
+                    for name, h in sorted(self.renders.items())
+                },
+                "last_renders": list(self.last_renders),
+                "slow_queries": list(self.slow),
+            }
+
+
+metrics = Metrics()
+_render: contextvars.ContextVar = contextvars.ContextVar("vibenet_render", default=None)
+_dao_call: contextvars.ContextVar = contextvars.ContextVar("vibenet_dao_call", default=None)
+
+
+def _size(value: Any) -> int:
+    if value is None:
+        return 0
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _record(table: str, op: str, payload: Any, started: float, resp: Any, error: bool):
+    ms = (time.perf_counter() - started) * 1000
+    data = getattr(resp, "data", None)
+    rows = len(data) if isinstance(data, list) else int(data is not None)
+    metrics.record_query(f"{table}.{op}", ms, rows, _size(data), _size(payload), error)
+    render = _render.get()
+    if render is not None:
+        render.add(ms)
+    if ms >= SLOW_QUERY_MS:
+        entry = {"query": f"{table}.{op}", "ms": round(ms, 1), "rows": rows,
+                 "dao": _dao_call.get(), "page": render.name if render else None, "at": time.time()}
+        metrics.record_slow(entry)
+        log.warning("slow query %s took %.1fms (%d rows) in %s", entry["query"], ms, rows, entry["dao"] or "?")
+
+
+class _Builder:
+    """Wraps a query builder chain; times execute() and remembers table/op."""
+
+    __slots__ = ("_inner", "_table", "_op", "_payload")
+
+    def __init__(self, inner: Any, table: str, op: str = "select", payload: Any = None):
+        self._inner, self._table, self._op, self._payload = inner, table, op, payload
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return _Builder(attr, self._table, self._op, self._payload) if hasattr(attr, "execute") else attr
+
+        def call(*args, **kwargs):
+            # Every step of a builder chain returns the next builder.
+            op, payload = self._op, self._payload
+            if name in WRITE_OPS or name in ("select", "delete"):
+                op, payload = name, (args[0] if name in WRITE_OPS and args else None)
+            return _Builder(attr(*args, **kwargs), self._table, op, payload)
+        return call
+
+    def execute(self):
+        started = time.perf_counter()
+        try:
+            resp = self._inner.execute()
+        except Exception:
+            _record(self._table, self._op, self._payload, started, None, True)
+            raise
+        _record(self._table, self._op, self._payload, started, resp, False)
+        return resp
+
+
+class InstrumentedClient:
+    """Same table()/rpc() API as the wrapped client."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, name: str) -> _Builder:
+        return _Builder(self._client.table(name), name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None, **kwargs) -> _Builder:
+        return _Builder(self._client.rpc(fn, params, **kwargs), f"rpc:{fn}", "call", params)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+def instrument_client(client: Any) -> Any:
+    return InstrumentedClient(client) if ENABLED else client
+
+
+def instrument_dao(cls):
+    """Class decorator: time every public DAO method (no-op when disabled)."""
+    if not ENABLED:
+        return cls
+    for name, fn in list(vars(cls).items()):
+        if name.startswith(("_", "iter_")) or not callable(fn):
+            continue
+        setattr(cls, name, _timed(f"{cls.__name__}.{name}", fn))
+    return cls
+
+
+def _timed(label: str, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _dao_call.set(label)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.record_call(label, (time.perf_counter() - started) * 1000)
+            _dao_call.reset(token)
+    return wrapper
+
+
+def begin_render(name: str) -> Optional[Render]:
+    """Start counting a page's queries; call end_render() in a `finally`."""
+    if not ENABLED:
+        return None
+    render = Render(name)
+    render.token = _render.set(render)
+    return render
+
+
+def end_render(render: Optional[Render]) -> Optional[Dict]:
+    if render is None:
+        return None
+    render.ms = (time.perf_counter() - render.started) * 1000
+    metrics.record_render(render)
+    _render.reset(render.token)
+    return {"page": render.name, "ms": round(render.ms, 1), "queries": render.queries}
+
+
+def snapshot() -> Dict:
+    return metrics.snapshot()
+
+
+def dump(path: str = METRICS_FILE) -> str:
+    """Write the snapshot as JSON (atomically) for `vibenet-cli stats`."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def load(path: str = METRICS_FILE) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def format_snapshot(snap: Dict, top: int = 15) -> List[str]:
+    """Plain-text tables for the CLI."""
+    lines = [f"instrumentation {'on' if snap.get('enabled') else 'off'}, slow query >= {snap.get('slow_query_ms')}ms"]
+    queries = sorted(snap.get("queries", {}).items(), key=lambda kv: -kv[1]["mean_ms"] * kv[1]["count"])
+    lines.append(f"\n{'query':<34} {'count':>7} {'mean ms':>8} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>8} "
+                 f"{'rows':>8} {'KB in':>8} {'KB out':>7}")
+    for key, s in queries[:top]:
+        lines.append(f"{key:<34} {s['count']:>7} {s['mean_ms']:>8} {s['p95_ms']:>7} {s['p99_ms']:>7} "
+                     f"{s['max_ms']:>8} {s['rows']:>8} {s['bytes_in'] / 1024:>8.1f} {s['bytes_out'] / 1024:>7.1f}")
+    calls = sorted(snap.get("dao_calls", {}).items(), key=lambda kv: -kv[1]["mean_ms"] * kv[1]["count"])
+    lines.append(f"\n{'DAO method':<34} {'count':>7} {'mean ms':>8} {'p95 ms':>7} {'max ms':>8}")
+    for key, s in calls[:top]:
+        lines.append(f"{key:<34} {s['count']:>7} {s['mean_ms']:>8} {s['p95_ms']:>7} {s['max_ms']:>8}")
+    if snap.get("renders"):
+        lines.append(f"\n{'page':<20} {'renders':>8} {'mean ms':>8} {'p95 ms':>7} {'queries':>8}")
+        for page, s in snap["renders"].items():
+            lines.append(f"{page:<20} {s['count']:>8} {s['mean_ms']:>8} {s['p95_ms']:>7} {s['mean_queries']:>8}")
+    if snap.get("slow_queries"):
+        lines.append("\nslow queries (most recent last)")
+        for e in snap["slow_queries"][-top:]:
+            lines.append(f"  {e['ms']:>8}ms {e['query']:<30} rows={e['rows']} dao={e['dao']} page={e['page']}")
+    return lines
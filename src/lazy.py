@@ -0,0 +1,27 @@
+import threading
+from typing import Any, Callable
+
+
+class lazy:
+    """Class attribute built on first access, e.g. `dao = lazy(ThoughtDAO)`.
+
+    Importing a service then costs nothing: the DAO (and the database
+    client behind it) is only created when a method first touches it.
+    After that the value replaces the descriptor on the class, so later
+    lookups are ordinary attribute reads.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self._lock = threading.Lock()
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        with self._lock:
+            value = owner.__dict__.get(self.name, self)
+            if value is self:
+                value = self.factory()
+                setattr(owner, self.name, value)
+        return value
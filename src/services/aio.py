@@ -0,0 +1,34 @@
+"""Async variants of the services, e.g. `await AsyncThoughtService.list_recent(10)`.
+
+They share the sync services' caches and in-memory indexes.
+"""
+from src.aio import AsyncProxy
+from src.services.badge_service import BadgeService
+from src.services.echo_service import EchoService
+from src.services.feed_service import FeedService
+from src.services.post_service import PostService
+from src.services.reverberation_service import ReverberationService
+from src.services.search_service import SearchService
+from src.services.social_graph_service import SocialGraphService
+from src.services.soul_link_service import SoulLinkService
+from src.services.stats_service import StatsService
+from src.services.thought_service import ThoughtService
+from src.services.timeline_service import TimelineService
+from src.services.trending_service import TrendingService
+from src.services.tribe_service import TribeService
+from src.services.viber_service import ViberService
+
+AsyncViberService = AsyncProxy(ViberService)
+AsyncThoughtService = AsyncProxy(ThoughtService)
+AsyncPostService = AsyncProxy(PostService)
+AsyncEchoService = AsyncProxy(EchoService)
+AsyncReverberationService = AsyncProxy(ReverberationService)
+AsyncSoulLinkService = AsyncProxy(SoulLinkService)
+AsyncBadgeService = AsyncProxy(BadgeService)
+AsyncTribeService = AsyncProxy(TribeService)
+AsyncStatsService = AsyncProxy(StatsService)
+AsyncFeedService = AsyncProxy(FeedService)
+AsyncTrendingService = AsyncProxy(TrendingService)
+AsyncSearchService = AsyncProxy(SearchService)
+AsyncSocialGraphService = AsyncProxy(SocialGraphService)
+AsyncTimelineService = AsyncProxy(TimelineService)
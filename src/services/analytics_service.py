@@ -0,0 +1,347 @@
+"""Emotion analytics over echoes and thoughts, vectorised with NumPy.
+
+Echoes, thoughts and tribe memberships are read page by page (from the
+database, or from the .vnc files of an export) straight into column
+arrays, with emotion tags encoded as small ints. Every report is then a
+few bincount/searchsorted passes over those arrays rather than a loop
+over row dicts. A loaded data set is shared through the "analytics"
+entity of the shared cache; treat it as read-only.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.cache import shared_cache
+from src.columnar import ColumnarReader
+from src.dao.echo_dao import EchoDAO
+from src.dao.thought_dao import ThoughtDAO
+from src.dao.tribe_dao import TribeDAO
+from src.lazy import lazy
+from src.timeutil import to_epoch
+
+EMOTIONS = ("Joy", "Curiosity", "Nostalgia", "Rage")
+_CODES = {e: i for i, e in enumerate(EMOTIONS)}
+_E = len(EMOTIONS)
+BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+# Columns kept per table. Emotion tags become int8 indexes into EMOTIONS,
+# timestamps int64 seconds since the epoch, everything else int64.
+COLUMNS = {
+    "echoes": ("thought_id", "viber_id", "emotion_tag", "created_at"),
+    "thoughts": ("thought_id", "viber_id", "emotion_tag", "created_at"),
+    "viber_tribes": ("viber_id", "tribe_id"),
+}
+
+Frame = Dict[str, np.ndarray]
+
+log = logging.getLogger(__name__)
+
+
+def _ints(values: Sequence) -> np.ndarray:
+    try:
+        return np.asarray(values, np.int64)
+    except TypeError:  # nulls
+        return np.fromiter((-1 if v is None else v for v in values), np.int64, len(values))
+
+
+def _codes(values: Sequence) -> np.ndarray:
+    return np.fromiter((_CODES.get(v, -1) for v in values), np.int8, len(values))
+
+
+def _seconds(values: Sequence) -> np.ndarray:
+    # ISO strings from the database, int microseconds from a raw columnar read.
+    if len(values) and isinstance(values[0], int):
+        try:
+            return np.asarray(values, np.int64) // 1_000_000
+        except TypeError:
+            pass
+    return np.fromiter(
+        (v // 1_000_000 if isinstance(v, int) else int(to_epoch(v, 0.0)) for v in values), np.int64, len(values)
+    )
+
+
+_CONVERTERS = {"emotion_tag": _codes, "created_at": _seconds}
+
+
+def _frame(batches: Iterable[Dict[str, Sequence]], columns: Sequence[str]) -> Frame:
+    """Concatenate column batches into arrays, dropping rows with an unknown emotion."""
+    parts: Dict[str, List[np.ndarray]] = {c: [] for c in columns}
+    for batch in batches:
+        for c in columns:
+            parts[c].append(_CONVERTERS.get(c, _ints)(batch[c]))
+    frame = {c: np.concatenate(p) if p else _CONVERTERS.get(c, _ints)([]) for c, p in parts.items()}
+    if "emotion_tag" in frame:
+        keep = frame["emotion_tag"] >= 0
+        if not keep.all():
+            frame = {c: a[keep] for c, a in frame.items()}
+    return frame
+
+
+def _row_batches(pages: Iterator[List[Dict]], columns: Sequence[str]) -> Iterator[Dict[str, List]]:
+    for page in pages:
+        yield {c: [row.get(c) for row in page] for c in columns}
+
+
+def _columnar_batches(path: str, columns: Sequence[str]) -> Iterator[Dict[str, List]]:
+    if os.path.exists(path):
+        yield from ColumnarReader(path).iter_row_groups(columns, raw_timestamps=True)
+
+
+def _iso(seconds: int) -> str:
+    return datetime.fromtimestamp(int(seconds), timezone.utc).isoformat()
+
+
+def _emotion_counts(row: np.ndarray) -> Dict[str, int]:
+    return {e: int(n) for e, n in zip(EMOTIONS, row)}
+
+
+def _dense(keys: np.ndarray) -> bool:
+    # Serial ids: a direct index table beats sorting or binary search.
+    return bool(len(keys)) and keys.min() >= 0 and keys.max() <= 4 * len(keys) + 1024
+
+
+def _factorize(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted distinct keys and each key's index into them."""
+    if _dense(keys):
+        present = np.bincount(keys) > 0
+        return np.flatnonzero(present), (np.cumsum(present) - 1)[keys]
+    return np.unique(keys, return_inverse=True)
+
+
+def _distinct(keys: np.ndarray) -> np.ndarray:
+    keys = np.sort(keys)
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+
+def _lookup(sorted_keys: np.ndarray, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of `keys` in the distinct `sorted_keys` and a mask of the keys that were found."""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), np.int64), np.zeros(len(keys), bool)
+    if _dense(sorted_keys):
+        # The extra last slot stays -1 and catches every out-of-range key.
+        table = np.full(int(sorted_keys[-1]) + 2, -1, np.int64)
+        table[sorted_keys] = np.arange(len(sorted_keys))
+        pos = table[np.clip(keys, -1, len(table) - 1)]
+        found = pos >= 0
+        return np.where(found, pos, 0), found
+    pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return pos, sorted_keys[pos] == keys
+
+
+def _per_key(keys: np.ndarray, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct keys and a (keys x emotions) count matrix."""
+    uniq, inv = _factorize(keys)
+    return uniq, np.bincount(inv * _E + codes, minlength=len(uniq) * _E).reshape(-1, _E)
+
+
+def _bucketed(ts: np.ndarray, codes: np.ndarray, seconds: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Bucket start times and a (buckets x emotions) count matrix, empty buckets included."""
+    if not len(ts):
+        return np.empty(0, np.int64), np.zeros((0, _E), np.int64)
+    bucket = ts // seconds
+    first = bucket.min()
+    idx = bucket - first
+    n = int(idx.max()) + 1
+    counts = np.bincount(idx * _E + codes, minlength=n * _E).reshape(n, _E)
+    return (first + np.arange(n)) * seconds, counts
+
+
+class EmotionData:
+    """Echo, thought and membership columns; thoughts are sorted by id for joins."""
+
+    def __init__(self, echoes: Frame, thoughts: Frame, memberships: Frame):
+        order = np.argsort(thoughts["thought_id"], kind="stable")
+        self.echoes = echoes
+        self.thoughts = {c: a[order] for c, a in thoughts.items()}
+        self.memberships = memberships
+
+    def rows(self, kind: str, since: Optional[float] = None) -> Frame:
+        if kind not in ("echoes", "thoughts"):
+            raise ValueError(f"unknown kind {kind!r}")
+        frame = getattr(self, kind)
+        if since is None:
+            return frame
+        keep = frame["created_at"] >= int(since)
+        return {c: a[keep] for c, a in frame.items()}
+
+
+class AnalyticsService:
+    echo_dao = lazy(EchoDAO)
+    thought_dao = lazy(ThoughtDAO)
+    tribe_dao = lazy(TribeDAO)
+
+    @classmethod
+    def load(cls, source: Optional[str] = None, refresh: bool = False) -> EmotionData:
+        """The data set from the database, or from the .vnc files in an export directory."""
+        if refresh:
+            shared_cache.invalidate("analytics")
+        return shared_cache.get_or_load("analytics", source or "db", lambda: cls._load(source))
+
+    _loader_lock = threading.Lock()
+    _loaders: Dict[str, threading.Thread] = {}
+    _load_errors: Dict[str, Exception] = {}
+
+    @classmethod
+    def ready(cls, source: Optional[str] = None) -> bool:
+        """True once the data set is cached; otherwise start loading it in a background thread.
+
+        Lets a UI request return straight away instead of blocking on a full
+        table scan. A failed background load is re-raised by the next call.
+        """
+        key = source or "db"
+        if shared_cache.peek("analytics", key) is not None:
+            return True
+        with cls._loader_lock:
+            error = cls._load_errors.pop(key, None)
+            if error is not None:
+                raise error
+            thread = cls._loaders.get(key)
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=cls._load_in_background, args=(source,),
+                                          name="analytics-load", daemon=True)
+                cls._loaders[key] = thread
+                thread.start()
+        return False
+
+    @classmethod
+    def _load_in_background(cls, source: Optional[str]):
+        try:
+            cls.load(source)
+        except Exception as e:
+            log.exception("analytics load failed")
+            with cls._loader_lock:
+                cls._load_errors[source or "db"] = e
+
+    @classmethod
+    def _load(cls, source: Optional[str]) -> EmotionData:
+        if source:
+            batches = {t: _columnar_batches(os.path.join(source, f"{t}.vnc"), cols) for t, cols in COLUMNS.items()}
+        else:
+            batches = {
+                "echoes": _row_batches(cls.echo_dao.iter_all(
+                    desc=False, columns=",".join(("echo_id",) + COLUMNS["echoes"])), COLUMNS["echoes"]),
+                "thoughts": _row_batches(cls.thought_dao.iter_all(
+                    desc=False, columns=",".join(COLUMNS["thoughts"])), COLUMNS["thoughts"]),
+                "viber_tribes": _row_batches(cls.tribe_dao.iter_memberships(), COLUMNS["viber_tribes"]),
+            }
+        return EmotionData(*(_frame(batches[t], COLUMNS[t]) for t in ("echoes", "thoughts", "viber_tribes")))
+
+    @classmethod
+    def summary(cls, source: Optional[str] = None) -> Dict:
+        data = cls.load(source)
+        ts = np.concatenate([data.echoes["created_at"], data.thoughts["created_at"]])
+        return {
+            "echoes": len(data.echoes["created_at"]),
+            "thoughts": len(data.thoughts["created_at"]),
+            "memberships": len(data.memberships["viber_id"]),
+            "from": _iso(ts.min()) if len(ts) else None,
+            "to": _iso(ts.max()) if len(ts) else None,
+        }
+
+    @classmethod
+    def distribution_over_time(cls, kind: str = "echoes", bucket: str = "day", since: Optional[float] = None,
+                               source: Optional[str] = None) -> List[Dict]:
+        """Emotion counts per time bucket, oldest first."""
+        frame = cls.load(source).rows(kind, since)
+        starts, counts = _bucketed(frame["created_at"], frame["emotion_tag"], BUCKETS[bucket])
+        return [{"start": _iso(s), **_emotion_counts(c), "total": int(c.sum())} for s, c in zip(starts, counts)]
+
+    @classmethod
+    def distribution_by_tribe(cls, kind: str = "echoes", since: Optional[float] = None,
+                              source: Optional[str] = None) -> List[Dict]:
+        """Emotions expressed by each tribe's members, busiest tribe first."""
+        data = cls.load(source)
+        frame = data.rows(kind, since)
+        vibers, per_viber = _per_key(frame["viber_id"], frame["emotion_tag"])
+        pos, found = _lookup(vibers, data.memberships["viber_id"])
+        tribes, inv = _factorize(data.memberships["tribe_id"][found])
+        counts = np.zeros((len(tribes), _E), np.int64)
+        np.add.at(counts, inv, per_viber[pos[found]])
+        totals = counts.sum(axis=1)
+        return [{"tribe_id": int(tribes[i]), **_emotion_counts(counts[i]), "total": int(totals[i])}
+                for i in np.argsort(-totals, kind="stable") if totals[i]]
+
+    @classmethod
+    def distribution_by_viber(cls, viber_ids: Optional[Sequence[int]] = None, kind: str = "echoes",
+                              limit: int = 20, since: Optional[float] = None,
+                              source: Optional[str] = None) -> List[Dict]:
+        """Emotion counts for the given vibers, or for the `limit` most active ones."""
+        frame = cls.load(source).rows(kind, since)
+        vibers, counts = _per_key(frame["viber_id"], frame["emotion_tag"])
+        if viber_ids is None:
+            order = np.argsort(-counts.sum(axis=1), kind="stable")[:limit]
+            picked = [(int(vibers[i]), counts[i]) for i in order]
+        else:
+            pos, found = _lookup(vibers, np.asarray(viber_ids, np.int64))
+            picked = [(int(v), counts[p] if f else np.zeros(_E, np.int64)) for v, p, f in zip(viber_ids, pos, found)]
+        return [{"viber_id": v, **_emotion_counts(c), "total": int(c.sum())} for v, c in picked]
+
+    @classmethod
+    def mood_shift(cls, kind: str = "echoes", bucket: str = "day", since: Optional[float] = None,
+                   source: Optional[str] = None) -> List[Dict]:
+        """Emotion shares per active bucket and how far the mix moved from the bucket before.
+
+        `shift` is the total variation distance between consecutive mixes
+        (0 = same mood, 1 = completely different); `rising` and `falling`
+        name the emotions whose share grew and shrank the most.
+        """
+        frame = cls.load(source).rows(kind, since)
+        starts, counts = _bucketed(frame["created_at"], frame["emotion_tag"], BUCKETS[bucket])
+        active = counts.sum(axis=1) > 0
+        starts, counts = starts[active], counts[active]
+        if not len(counts):
+            return []
+        shares = counts / counts.sum(axis=1, keepdims=True)
+        delta = np.diff(shares, axis=0, prepend=shares[:1])
+        shift = 0.5 * np.abs(delta).sum(axis=1)
+        dominant, rising, falling = shares.argmax(axis=1), delta.argmax(axis=1), delta.argmin(axis=1)
+        return [
+            {
+                "start": _iso(starts[i]),
+                "total": int(counts[i].sum()),
+                **{e: round(float(s), 3) for e, s in zip(EMOTIONS, shares[i])},
+                "dominant": EMOTIONS[dominant[i]],
+                "shift": round(float(shift[i]), 3),
+                "rising": EMOTIONS[rising[i]] if delta[i, rising[i]] > 0 else None,
+                "falling": EMOTIONS[falling[i]] if delta[i, falling[i]] < 0 else None,
+            }
+            for i in range(len(starts))
+        ]
+
+    @classmethod
+    def top_influencers(cls, limit: int = 10, emotion: Optional[str] = None, since: Optional[float] = None,
+                        source: Optional[str] = None) -> List[Dict]:
+        """Authors whose thoughts drew the most echoes (of `emotion`, if given).
+
+        `reach` counts distinct vibers who echoed them; `resonance` is the
+        share of those echoes that matched the thought's own emotion tag.
+        """
+        data = cls.load(source)
+        echoes, thoughts = data.rows("echoes", since), data.thoughts
+        pos, found = _lookup(thoughts["thought_id"], echoes["thought_id"])
+        pos = pos[found]
+        authors, inv = _factorize(thoughts["viber_id"][pos])
+        codes = echoes["emotion_tag"][found]
+        n = len(authors)
+        by_emotion = np.bincount(inv * _E + codes, minlength=n * _E).reshape(-1, _E)
+        resonant = np.bincount(inv, weights=codes == thoughts["emotion_tag"][pos], minlength=n)
+        echoers = echoes["viber_id"][found] + 1
+        span = int(echoers.max()) + 1 if len(echoers) else 1
+        reach = np.bincount(_distinct(inv * span + echoers) // span, minlength=n)
+        totals = by_emotion.sum(axis=1)
+        score = by_emotion[:, _CODES[emotion]] if emotion else totals
+        return [
+            {
+                "viber_id": int(authors[i]),
+                "echoes": int(score[i]),
+                "reach": int(reach[i]),
+                "resonance": round(float(resonant[i] / totals[i]), 3),
+                "dominant": EMOTIONS[by_emotion[i].argmax()],
+                **_emotion_counts(by_emotion[i]),
+            }
+            for i in np.argsort(-score, kind="stable")[:limit] if score[i]
+        ]
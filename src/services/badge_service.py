@@ -1,14 +1,87 @@
 
 
+from typing import Dict, List, Optional
+from src.cache import shared_cache, viber_cache
 from src.dao.badge_dao import BadgeDAO
+from src.lazy import lazy
+
+# Declarative award rules: a rule fires when its event matches and every
+# other key equals the fact of the same name passed with the event.
+BADGE_RULES = [
+    {"badge": "Joyful Viber", "event": "echo", "emotion": "Joy"},
+    {"badge": "Curious Mind", "event": "echo", "emotion": "Curiosity"},
+    {"badge": "Nostalgic Soul", "event": "echo", "emotion": "Nostalgia"},
+    {"badge": "Explorer", "event": "post"},
+    {"badge": "Tribe Member", "event": "tribe_join"},
+]
 
 class BadgeService:
-    dao = BadgeDAO()
+    dao = lazy(BadgeDAO)
+    rules = BADGE_RULES
 
     @classmethod
     def create(cls, name: str, description: str, aura_color: str, vibe_level: int):
-        return cls.dao.create(name, description, aura_color, vibe_level)
+        badge = cls.dao.create(name, description, aura_color, vibe_level)
+        shared_cache.invalidate("badges")
+        return badge
 
     @classmethod
     def list(cls):
-        return cls.dao.list()
+        return shared_cache.get_or_load("badges", "all", lambda: cls.dao.list() or [])
+
+    @classmethod
+    def matching(cls, event: str, vibe_level: Optional[int] = None, **facts) -> List[str]:
+        """Badge names earned by `event`, restricted to badges in the catalog."""
+        catalog = {b.get("name"): b for b in cls.list()}
+        names = []
+        for rule in cls.rules:
+            if rule["event"] != event or rule["badge"] not in catalog:
+                continue
+            if all(facts.get(k) == v for k, v in rule.items() if k not in ("badge", "event")):
+                names.append(rule["badge"])
+        if vibe_level is not None:
+            for name, badge in catalog.items():
+                required = badge.get("vibe_level_required") or 0
+                if required > 1 and vibe_level >= required:
+                    names.append(name)
+        return list(dict.fromkeys(names))
+
+    @classmethod
+    def on_event(cls, viber_id: int, event: str, owned: Optional[List[str]] = None,
+                 vibe_level: Optional[int] = None, **facts) -> List[str]:
+        """Evaluate the rules for one event and award in a single write.
+
+        `owned` (e.g. the session's badge list) lets us skip the write
+        entirely when nothing new would be awarded. Returns the newly
+        awarded badge names.
+        """
+        names = [n for n in cls.matching(event, vibe_level, **facts) if n not in (owned or [])]
+        if not names:
+            return []
+        awarded = cls.dao.award(viber_id, names)
+        if awarded:
+            viber_cache.invalidate(viber_id)
+        return awarded
+
+    @classmethod
+    def on_events(cls, events: List[Dict]) -> Dict[int, List[str]]:
+        """Batch form of on_event: one write for any number of vibers.
+
+        Each event is a dict with `viber_id`, `event` and optional `owned`,
+        `vibe_level` and rule facts.
+        """
+        pending: Dict[int, List[str]] = {}
+        for e in events:
+            facts = {k: v for k, v in e.items() if k not in ("viber_id", "event", "owned")}
+            names = [n for n in cls.matching(e["event"], **facts) if n not in (e.get("owned") or [])]
+            if names:
+                pending.setdefault(e["viber_id"], [])
+                pending[e["viber_id"]] += [n for n in names if n not in pending[e["viber_id"]]]
+        if not pending:
+            return {}
+        awarded: Dict[int, List[str]] = {}
+        for row in cls.dao.award_many(pending):
+            awarded.setdefault(row["viber_id"], []).append(row["badge"])
+        for viber_id in awarded:
+            viber_cache.invalidate(viber_id)
+        return awarded
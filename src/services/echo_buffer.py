@@ -0,0 +1,155 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from src.cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+# Contribution of one echo to a thought's vibe_score.
+EMOTION_WEIGHTS = {"Joy": 3, "Curiosity": 2, "Nostalgia": 2, "Rage": 1}
+
+
+def aggregate_counts(rows: List[Dict]) -> List[Dict]:
+    """Per-thought totals for bump_echo_counters from a batch of inserted echoes."""
+    per_thought: Dict[int, Dict] = {}
+    for row in rows:
+        agg = per_thought.setdefault(row["thought_id"], {"thought_id": row["thought_id"], "n": 0, "score": 0,
+                                                         "emotions": defaultdict(int)})
+        agg["n"] += 1
+        agg["score"] += EMOTION_WEIGHTS.get(row["emotion_tag"], 1)
+        agg["emotions"][row["emotion_tag"]] += 1
+    return [{**agg, "emotions": dict(agg["emotions"])} for agg in per_thought.values()]
+
+
+def is_row_error(exc: Exception) -> bool:
+    # PostgREST reports the SQLSTATE as `code`. Classes 22 (bad data) and 23
+    # (constraints, e.g. an echo on a deleted thought) fail the same way on every retry.
+    return str(getattr(exc, "code", "") or "")[:2] in ("22", "23")
+
+
+class EchoBuffer:
+    """Write-behind buffer for echoes.
+
+    Reactions are deduplicated in memory, then flushed as one bulk insert
+    plus one counter update whenever `max_batch` rows are pending or
+    `flush_interval` seconds have passed. A final flush runs at interpreter
+    exit. `on_flushed` receives the rows that were actually inserted.
+    A batch rejected for bad data is split until the offending rows are
+    isolated; those are logged and dropped. Any other failure re-queues
+    the rows that were not written yet.
+    """
+
+    def __init__(self, dao, max_batch: int = 500, flush_interval: float = 1.0,
+                 seen_size: int = 100_000, on_flushed: Optional[Callable[[List[Dict]], None]] = None):
+        self.dao = dao
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.on_flushed = on_flushed
+        self._seen = TTLCache(maxsize=seen_size, ttl=float("inf"))
+        self._pending: List[Dict] = []
+        self._unbumped: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.counters = {"accepted": 0, "deduplicated": 0, "inserted": 0, "batches": 0, "failed_batches": 0,
+                         "rejected": 0}
+        atexit.register(self.close)
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="echo-buffer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("echo flush failed; batch re-queued")
+
+    def add(self, thought_id: int, viber_id: int, emotion: str) -> bool:
+        """Queue one echo. Returns False if this viber already echoed it with this emotion."""
+        key = (thought_id, viber_id, emotion)
+        with self._lock:
+            if self._seen.get(key):
+                self.counters["deduplicated"] += 1
+                return False
+            self._seen.set(key, True)
+            self._pending.append({"thought_id": thought_id, "viber_id": viber_id, "emotion_tag": emotion})
+            self.counters["accepted"] += 1
+            full = len(self._pending) >= self.max_batch
+            self._ensure_thread()
+        if full:
+            self._wake.set()
+        return True
+
+    def _insert(self, batch: List[Dict], inserted: List[Dict], rejected: List[Dict], done: List[Dict]):
+        try:
+            inserted += self.dao.react_many(batch)
+            done += batch
+            return
+        except Exception as e:
+            if not is_row_error(e):
+                raise
+            if len(batch) == 1:
+                log.warning("dropping echo %s: %s", batch[0], e)
+                rejected += batch
+                done += batch
+                return
+        mid = len(batch) // 2
+        self._insert(batch[:mid], inserted, rejected, done)
+        self._insert(batch[mid:], inserted, rejected, done)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            inserted: List[Dict] = []
+            rejected: List[Dict] = []
+            done: List[Dict] = []
+            try:
+                if batch:
+                    self._insert(batch, inserted, rejected, done)
+            except Exception:
+                with self._lock:
+                    # Rows are handled in order, so everything past `done` is still unwritten.
+                    self._pending = batch[len(done):] + self._pending
+                    self.counters["failed_batches"] += 1
+                raise
+            finally:
+                with self._lock:
+                    self.counters["inserted"] += len(inserted)
+                    self.counters["rejected"] += len(rejected)
+                if inserted:
+                    self._unbumped += aggregate_counts(inserted)
+                    # Before the counter bump, so trending sees stored rows even if the bump fails.
+                    if self.on_flushed:
+                        self.on_flushed(inserted)
+            if batch:
+                with self._lock:
+                    self.counters["batches"] += 1
+            if self._unbumped:
+                # Kept until it succeeds: the echoes are already stored, so
+                # re-inserting them would no longer report them as new.
+                self.dao.bump_counters(self._unbumped)
+                self._unbumped = []
+        return len(inserted)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception:
+            log.exception("final echo flush failed")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.counters, "pending": len(self._pending)}
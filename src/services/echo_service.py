@@ -1,10 +1,41 @@
 
 
+import os
+from typing import Dict, List
 from src.dao.echo_dao import EchoDAO
+from src.lazy import lazy
+from src.services.echo_buffer import EchoBuffer, aggregate_counts
+from src.services.trending_service import TrendingService
+
+def _record_trending(rows: List[Dict]):
+    for row in rows:
+        TrendingService.record_echo(row["thought_id"])
+
+def _make_buffer() -> EchoBuffer:
+    return EchoBuffer(
+        EchoService.dao,
+        max_batch=int(os.getenv("ECHO_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("ECHO_FLUSH_INTERVAL", "1.0")),
+        on_flushed=_record_trending,
+    )
 
 class EchoService:
-    dao = EchoDAO()
+    dao = lazy(EchoDAO)
+    buffer = lazy(_make_buffer)
 
     @classmethod
     def react(cls, thought_id: int, viber_id: int, emotion: str):
-        return cls.dao.react(thought_id, viber_id, emotion)
\ No newline at end of file
+        echo = cls.dao.react(thought_id, viber_id, emotion)
+        if echo:
+            cls.dao.bump_counters(aggregate_counts(echo))
+            TrendingService.record_echo(thought_id)
+        return echo
+
+    @classmethod
+    def enqueue(cls, thought_id: int, viber_id: int, emotion: str) -> bool:
+        """Buffered react: returns False if already reacted; written on the next flush."""
+        return cls.buffer.add(thought_id, viber_id, emotion)
+
+    @classmethod
+    def flush(cls) -> int:
+        return cls.buffer.flush()
@@ -0,0 +1,38 @@
+from typing import Dict, List, Optional, Tuple
+from src.dao.projections import AUTHOR_CARD, FEED_ITEM
+from src.services.reverberation_service import ReverberationService
+from src.services.thought_service import ThoughtService
+from src.services.timeline_service import TimelineService
+from src.services.viber_service import ViberService
+
+class FeedService:
+
+    @classmethod
+    def hydrate(cls, thoughts: List[Dict]) -> List[Dict]:
+        # One batched author lookup for the whole page instead of one per card.
+        authors = ViberService.get_many([t.get("viber_id") for t in thoughts], AUTHOR_CARD)
+        # Rows read with FEED_ITEM carry the maintained counter; count the rest in one query.
+        counts = ReverberationService.count_by_thoughts(
+            [t.get("thought_id") for t in thoughts if "reverberation_count" not in t]
+        )
+        return [
+            {**t, "author": authors.get(t.get("viber_id"), {}),
+             "reverberation_count": counts.get(t.get("thought_id"), t.get("reverberation_count") or 0)}
+            for t in thoughts
+        ]
+
+    @classmethod
+    def recent(cls, limit: int = 50) -> List[Dict]:
+        return cls.hydrate(ThoughtService.list_recent(limit, FEED_ITEM))
+
+    @classmethod
+    def page(cls, page_size: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        thoughts, next_cursor = ThoughtService.list_page(page_size, cursor, FEED_ITEM)
+        return cls.hydrate(thoughts), next_cursor
+
+    @classmethod
+    def home(cls, viber_id: int, page_size: int = 20,
+             cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """One page of the viber's personalised timeline (friends and tribes)."""
+        thoughts, next_cursor = TimelineService.page(viber_id, page_size, cursor, FEED_ITEM)
+        return cls.hydrate(thoughts), next_cursor
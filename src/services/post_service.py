@@ -1,31 +1,58 @@
 
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from src.dao.post_dao import PostDAO
+from src.dao.projections import ALL
+from src.lazy import lazy
+from src.services.search_service import SearchService
+from src.services.stats_service import StatsService
+from src.singleflight import coalesced, flights
 
 class PostService:
-    dao = PostDAO()
+    dao = lazy(PostDAO)
 
     @classmethod
     def create(cls, user_id: int, content: str) -> Dict:
-        return cls.dao.create(user_id, content)
+        post = cls.dao.create(user_id, content)
+        SearchService.index_post(post)
+        StatsService.bump("posts")
+        flights.forget("PostService.")
+        return post
 
     @classmethod
-    def get(cls, post_id: int) -> Optional[Dict]:
-        return cls.dao.get_by_id(post_id)
+    @coalesced
+    def get(cls, post_id: int, columns: str = ALL) -> Optional[Dict]:
+        return cls.dao.get_by_id(post_id, columns)
 
     @classmethod
-    def list_recent(cls, limit: int = 10) -> List[Dict]:
-        return cls.dao.list_recent(limit)
+    @coalesced
+    def list_recent(cls, limit: int = 10, columns: str = ALL) -> List[Dict]:
+        return cls.dao.list_recent(limit, columns)
+
+    @classmethod
+    @coalesced
+    def list_page(cls, page_size: int = 20, cursor: Optional[str] = None,
+                  columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        return cls.dao.list_page(page_size, cursor, columns)
 
     @classmethod
     def update(cls, post_id: int, updates: Dict) -> Optional[Dict]:
-        return cls.dao.update(post_id, updates)
+        post = cls.dao.update(post_id, updates)
+        SearchService.index_post(post)
+        flights.forget("PostService.")
+        return post
 
     @classmethod
     def delete(cls, post_id: int) -> bool:
-        return cls.dao.delete(post_id)
+        deleted = cls.dao.delete(post_id)
+        SearchService.remove("post", post_id)
+        if deleted:
+            StatsService.bump("posts", -1)
+        flights.forget("PostService.")
+        return deleted
 
     @classmethod
     def like(cls, post_id: int) -> Optional[Dict]:
-        return cls.dao.like(post_id)
+        post = cls.dao.like(post_id)
+        flights.forget("PostService.")
+        return post
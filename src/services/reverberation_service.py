@@ -1,14 +1,51 @@
 
 
+from typing import Dict, List, Optional, Tuple
 from src.dao.reverberation_dao import ReverberationDAO
+from src.lazy import lazy
+from src.services.trending_service import TrendingService
 
 class ReverberationService:
-    dao = ReverberationDAO()
+    dao = lazy(ReverberationDAO)
 
     @classmethod
-    def create(cls, thought_id: int, viber_id: int, content: str):
-        return cls.dao.create(thought_id, viber_id, content)
+    def create(cls, thought_id: int, viber_id: int, content: str, parent_id: Optional[int] = None):
+        reverberation = cls.dao.create(thought_id, viber_id, content, parent_id)
+        if not reverberation and parent_id is not None:
+            raise ValueError(f"Reverberation {parent_id} is not on thought {thought_id}.")
+        TrendingService.record_reverberation(thought_id)
+        return reverberation
 
     @classmethod
     def list(cls, thought_id: int):
-        return cls.dao.list_by_thought(thought_id)
\ No newline at end of file
+        return cls.dao.list_by_thought(thought_id)
+
+    @classmethod
+    def list_page(cls, thought_id: int, page_size: int = 20,
+                  cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        return cls.dao.list_page_by_thought(thought_id, page_size, cursor)
+
+    @classmethod
+    def thread_page(cls, thought_id: int, page_size: int = 20, cursor: Optional[str] = None,
+                    replies_per_root: int = 3) -> Tuple[List[Dict], Optional[str]]:
+        """One page of top-level reverberations, oldest first, each with its first replies.
+
+        Every root carries `replies` and `reply_count`; page through the
+        rest of a root's replies (and deeper levels) with replies_page.
+        """
+        roots, next_cursor = cls.dao.list_page_by_thought(thought_id, page_size, cursor, roots_only=True)
+        replied = [r["reverberation_id"] for r in roots if r.get("reply_count")]
+        replies: Dict[int, List[Dict]] = {}
+        for reply in cls.dao.list_first_replies(replied, replies_per_root) if replies_per_root else []:
+            replies.setdefault(reply["parent_id"], []).append(reply)
+        return [{**r, "replies": replies.get(r["reverberation_id"], [])} for r in roots], next_cursor
+
+    @classmethod
+    def replies_page(cls, parent_id: int, page_size: int = 20,
+                     cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        return cls.dao.list_replies_page(parent_id, page_size, cursor)
+
+    @classmethod
+    def count_by_thoughts(cls, thought_ids: List[int]) -> Dict[int, int]:
+        """Reverberation counts for a page of thoughts in one query (0 for none)."""
+        return cls.dao.count_by_thoughts(thought_ids)
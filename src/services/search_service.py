@@ -0,0 +1,253 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from src.dao.post_dao import PostDAO
+from src.dao.thought_dao import ThoughtDAO
+from src.dao.viber_dao import ViberDAO
+from src.lazy import lazy
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset("a an and are as at be but by for i in is it me my of on or so that the this to was we with you".split())
+MAX_PREFIX_EXPANSIONS = 64
+PREFIX_PENALTY = 0.5
+AUTHOR_BOOST = 1.5
+
+KINDS = ("thought", "post", "viber")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class SearchService:
+    """In-memory inverted index over thoughts, posts and usernames.
+
+    Documents get a compact internal number; each token maps to an
+    array('I') of those numbers. Updates and deletes tombstone the old
+    number instead of rewriting postings. A thought or post also matches a
+    query term through its author's username, so renaming a viber only
+    re-indexes the viber itself.
+    """
+
+    thought_dao = lazy(ThoughtDAO)
+    post_dao = lazy(PostDAO)
+    viber_dao = lazy(ViberDAO)
+
+    _lock = threading.RLock()
+    _postings: Dict[str, array] = {}
+    _vocab: List[str] = []
+    _docs: List[Optional[Tuple[str, int]]] = []
+    _user_postings: Dict[str, array] = {}
+    _doc_ids: Dict[Tuple[str, int], int] = {}
+    _authored: Dict[int, array] = {}
+    _warm = False
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._postings, cls._vocab, cls._docs = {}, [], []
+            cls._user_postings = {}
+            cls._doc_ids, cls._authored = {}, {}
+            cls._warm = False
+
+    @classmethod
+    def _index(cls, kind: str, doc_id: int, text: str, author_id: Optional[int]) -> None:
+        key = (kind, doc_id)
+        if key in cls._doc_ids:
+            cls._docs[cls._doc_ids[key]] = None
+        n = len(cls._docs)
+        cls._docs.append(key)
+        cls._doc_ids[key] = n
+        if author_id is not None and kind != "viber":
+            cls._authored.setdefault(author_id, array("I")).append(n)
+        for token in set(tokenize(text)):
+            postings = cls._postings.get(token)
+            if postings is None:
+                postings = cls._postings[token] = array("I")
+                bisect.insort(cls._vocab, token)
+            postings.append(n)
+            if kind == "viber":
+                cls._user_postings.setdefault(token, array("I")).append(n)
+
+    @classmethod
+    def _remove(cls, kind: str, doc_id: int):
+        n = cls._doc_ids.pop((kind, doc_id), None)
+        if n is not None:
+            cls._docs[n] = None
+
+    @classmethod
+    def index_thought(cls, thought: Optional[Dict]):
+        if thought and cls._warm:
+            with cls._lock:
+                cls._index_thought(thought)
+
+    @classmethod
+    def _index_thought(cls, t: Dict):
+        text = f"{t.get('content') or ''} {t.get('emotion_tag') or ''}"
+        cls._index("thought", t["thought_id"], text, t.get("viber_id"))
+
+    @classmethod
+    def index_post(cls, post: Optional[Dict]):
+        if post and cls._warm:
+            with cls._lock:
+                cls._index("post", post["post_id"], post.get("content"), post.get("user_id"))
+
+    @classmethod
+    def index_viber(cls, viber: Optional[Dict]):
+        if viber and cls._warm:
+            with cls._lock:
+                cls._index("viber", viber["viber_id"], viber.get("username"), viber["viber_id"])
+
+    @classmethod
+    def remove(cls, kind: str, doc_id: int):
+        with cls._lock:
+            cls._remove(kind, doc_id)
+
+    @classmethod
+    def warm(cls, thoughts: Iterable[Dict] = (), posts: Iterable[Dict] = (), vibers: Iterable[Dict] = ()):
+        with cls._lock:
+            cls._load(thoughts, posts, vibers)
+            cls._warm = True
+
+    @classmethod
+    def _load(cls, thoughts: Iterable[Dict] = (), posts: Iterable[Dict] = (), vibers: Iterable[Dict] = ()):
+        for v in vibers:
+            cls._index("viber", v["viber_id"], v.get("username"), v["viber_id"])
+        for t in thoughts:
+            cls._index_thought(t)
+        for p in posts:
+            cls._index("post", p["post_id"], p.get("content"), p.get("user_id"))
+
+    @classmethod
+    def ensure_warm(cls):
+        if cls._warm:
+            return
+        with cls._lock:
+            if cls._warm:
+                return
+            try:
+                # Oldest first, so document numbers grow with recency.
+                for page in cls.viber_dao.iter_all(desc=False):
+                    cls._load(vibers=page)
+                for page in cls.thought_dao.iter_all(desc=False):
+                    cls._load(thoughts=page)
+                for page in cls.post_dao.iter_all(desc=False):
+                    cls._load(posts=page)
+            except Exception:
+                # Drop the partial index; the next call rebuilds it from scratch.
+                cls.reset()
+                raise
+            cls._warm = True
+
+    @classmethod
+    def _expand(cls, term: str, prefix: bool) -> List[Tuple[str, float]]:
+        matches = [(term, 1.0)] if term in cls._postings else []
+        if prefix:
+            i = bisect.bisect_left(cls._vocab, term)
+            while i < len(cls._vocab) and len(matches) < MAX_PREFIX_EXPANSIONS and cls._vocab[i].startswith(term):
+                if cls._vocab[i] != term:
+                    matches.append((cls._vocab[i], PREFIX_PENALTY))
+                i += 1
+        return matches
+
+    @classmethod
+    def _sources(cls, term: str, prefix: bool) -> List[Tuple[float, array]]:
+        """(score, sorted doc numbers) lists a term can match, best score first."""
+        total = max(len(cls._doc_ids), 1)
+        sources = []
+        for token, weight in cls._expand(term, prefix):
+            postings = cls._postings[token]
+            idf = weight * math.log(1.0 + total / len(postings))
+            sources.append((idf, postings))
+            # Authored thoughts/posts match through the username token too.
+            for n in cls._user_postings.get(token, ()):
+                key = cls._docs[n]
+                if key is not None and key[1] in cls._authored:
+                    sources.append((idf * AUTHOR_BOOST, cls._authored[key[1]]))
+        sources.sort(key=lambda src: -src[0])
+        return sources
+
+    @staticmethod
+    def _best(sources: List[Tuple[float, array]], n: int) -> float:
+        for score, docs in sources:
+            i = bisect.bisect_left(docs, n)
+            if i < len(docs) and docs[i] == n:
+                return score
+        return 0.0
+
+    @classmethod
+    def search(cls, query: str, kinds: Sequence[str] = KINDS, limit: int = 20) -> List[Tuple[str, int, float]]:
+        """Ranked (kind, id, score) matches for every term of `query`.
+
+        The last term (or any term ending in '*') also matches as a prefix,
+        so results update as the user types. Ties go to the newest document.
+        """
+        raw = query.strip().split()
+        terms = []
+        for i, word in enumerate(raw):
+            prefix = word.endswith("*") or (i == len(raw) - 1 and not query.endswith(" "))
+            terms += [(t, prefix) for t in tokenize(word)]
+        if not terms:
+            return []
+        kinds = set(kinds)
+        with cls._lock:
+            per_term = sorted((cls._sources(t, p) for t, p in terms),
+                              key=lambda srcs: sum(len(d) for _, d in srcs))
+            if not per_term[0]:
+                return []
+
+            def live(n: int) -> bool:
+                return cls._docs[n] is not None and cls._docs[n][0] in kinds
+
+            if len(per_term) == 1:
+                # Postings are in insertion order, so walking each list
+                # backwards yields the best-scored, newest documents first.
+                hits, seen = [], set()
+                for score, docs in per_term[0]:
+                    for n in reversed(docs):
+                        if n not in seen and live(n):
+                            seen.add(n)
+                            hits.append((score, n))
+                            if len(hits) >= limit:
+                                break
+                    if len(hits) >= limit:
+                        break
+                return [(*cls._docs[n], round(s, 4)) for s, n in hits]
+
+            scored: Dict[int, float] = {}
+            for score, docs in per_term[0]:
+                for n in docs:
+                    if n not in scored:
+                        scored[n] = score
+            for sources in per_term[1:]:
+                survivors = {}
+                for n, s in scored.items():
+                    best = cls._best(sources, n)
+                    if best:
+                        survivors[n] = s + best
+                scored = survivors
+                if not scored:
+                    return []
+            hits = heapq.nlargest(limit, ((s, n) for n, s in scored.items() if live(n)))
+            return [(*cls._docs[n], round(s, 4)) for s, n in hits]
+
+    @classmethod
+    def search_thoughts(cls, query: str, limit: int = 20) -> List[Dict]:
+        cls.ensure_warm()
+        ranked = [doc_id for _, doc_id, _ in cls.search(query, ("thought",), limit)]
+        rows = {t["thought_id"]: t for t in cls.thought_dao.get_by_ids(ranked)}
+        return [rows[i] for i in ranked if i in rows]
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            return {
+                "documents": len(cls._doc_ids),
+                "tombstones": len(cls._docs) - len(cls._doc_ids),
+                "tokens": len(cls._vocab),
+                "postings": sum(len(p) for p in cls._postings.values()),
+            }
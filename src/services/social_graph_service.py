@@ -0,0 +1,248 @@
+import bisect
+import os
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.dao.soul_link_dao import SoulLinkDAO
+from src.lazy import lazy
+
+# Bounds on the friend-of-friend entries scanned per suggestion query, so
+# vibers with thousands of links (or links to hubs) stay fast: at most
+# SUGGEST_FANOUT ids are taken from each friend, SUGGEST_SCAN_BUDGET overall.
+SUGGEST_SCAN_BUDGET = int(os.getenv("SOCIAL_SUGGEST_BUDGET", "4000"))
+SUGGEST_FANOUT = int(os.getenv("SOCIAL_SUGGEST_FANOUT", "100"))
+
+ACCEPTED = "ACCEPTED"
+PENDING = "PENDING"
+
+_EMPTY = array("I")
+
+
+def _add(index: Dict[int, array], key: int, value: int):
+    ids = index.get(key)
+    if ids is None:
+        index[key] = array("I", [value])
+        return
+    i = bisect.bisect_left(ids, value)
+    if i == len(ids) or ids[i] != value:
+        ids.insert(i, value)
+
+
+def _discard(index: Dict[int, array], key: int, value: int):
+    ids = index.get(key)
+    if ids is None:
+        return
+    i = bisect.bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        del ids[i]
+        if not ids:
+            del index[key]
+
+
+def _contains(ids: array, value: int) -> bool:
+    i = bisect.bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+
+class SocialGraphService:
+    """In-memory soul-link graph.
+
+    Each viber maps to sorted array('I') of viber ids: accepted friends
+    (both directions), pending requests received (inbox) and sent
+    (outbox). Loaded once from soul_links, then kept current by
+    SoulLinkService on create/update_status.
+    """
+
+    dao = lazy(SoulLinkDAO)
+
+    _lock = threading.RLock()
+    _friends: Dict[int, array] = {}
+    _inbox: Dict[int, array] = {}
+    _outbox: Dict[int, array] = {}
+    # link_id -> (viber_id, friend_id, status), to undo a link's old state
+    _links: Dict[int, Tuple[int, int, str]] = {}
+    _pair_links: Dict[Tuple[int, int], int] = {}
+    # Both directions may be accepted; the friendship lasts while either is.
+    _accepted: Counter = Counter()
+    _warm = False
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._friends, cls._inbox, cls._outbox = {}, {}, {}
+            cls._links, cls._pair_links = {}, {}
+            cls._accepted = Counter()
+            cls._warm = False
+
+    @classmethod
+    def _unapply(cls, viber_id: int, friend_id: int, status: str):
+        if status == PENDING:
+            _discard(cls._outbox, viber_id, friend_id)
+            _discard(cls._inbox, friend_id, viber_id)
+        elif status == ACCEPTED:
+            pair = (min(viber_id, friend_id), max(viber_id, friend_id))
+            cls._accepted[pair] -= 1
+            if cls._accepted[pair] <= 0:
+                del cls._accepted[pair]
+                _discard(cls._friends, viber_id, friend_id)
+                _discard(cls._friends, friend_id, viber_id)
+
+    @classmethod
+    def _apply(cls, link: Dict):
+        link_id, viber_id, friend_id = link["link_id"], link["viber_id"], link["friend_id"]
+        status = (link.get("status") or PENDING).upper()
+        old = cls._links.get(link_id)
+        if old is not None:
+            cls._unapply(*old)
+        cls._links[link_id] = (viber_id, friend_id, status)
+        cls._pair_links[(viber_id, friend_id)] = link_id
+        if status == PENDING:
+            _add(cls._outbox, viber_id, friend_id)
+            _add(cls._inbox, friend_id, viber_id)
+        elif status == ACCEPTED:
+            cls._accepted[(min(viber_id, friend_id), max(viber_id, friend_id))] += 1
+            _add(cls._friends, viber_id, friend_id)
+            _add(cls._friends, friend_id, viber_id)
+
+    @classmethod
+    def on_links(cls, links: Optional[Iterable[Dict]]):
+        """Apply created or updated soul_links rows."""
+        if links and cls._warm:
+            with cls._lock:
+                for link in links:
+                    cls._apply(link)
+
+    @classmethod
+    def remove_viber(cls, viber_id: int):
+        with cls._lock:
+            for link_id, (a, b, status) in list(cls._links.items()):
+                if viber_id in (a, b):
+                    cls._unapply(a, b, status)
+                    del cls._links[link_id]
+                    cls._pair_links.pop((a, b), None)
+
+    @classmethod
+    def warm(cls, links: Iterable[Dict]):
+        with cls._lock:
+            # Bulk path: collect unsorted, then sort each adjacency once.
+            friends: Dict[int, List[int]] = {}
+            inbox: Dict[int, List[int]] = {}
+            outbox: Dict[int, List[int]] = {}
+            for link in links:
+                link_id, a, b = link["link_id"], link["viber_id"], link["friend_id"]
+                status = (link.get("status") or PENDING).upper()
+                old = cls._links.get(link_id)
+                if old is not None:
+                    cls._unapply(*old)
+                cls._links[link_id] = (a, b, status)
+                cls._pair_links[(a, b)] = link_id
+                if status == PENDING:
+                    outbox.setdefault(a, []).append(b)
+                    inbox.setdefault(b, []).append(a)
+                elif status == ACCEPTED:
+                    cls._accepted[(min(a, b), max(a, b))] += 1
+                    friends.setdefault(a, []).append(b)
+                    friends.setdefault(b, []).append(a)
+            for index, new in ((cls._friends, friends), (cls._inbox, inbox), (cls._outbox, outbox)):
+                for key, ids in new.items():
+                    merged = set(ids).union(index.get(key, _EMPTY))
+                    index[key] = array("I", sorted(merged))
+            cls._warm = True
+
+    @classmethod
+    def ensure_warm(cls):
+        if cls._warm:
+            return
+        with cls._lock:
+            if cls._warm:
+                return
+            # Fetch every page before touching the index, so a failed walk leaves it cold.
+            links = [link for page in cls.dao.iter_all() for link in page]
+            cls.warm(links)
+
+    @classmethod
+    def _ids(cls, index: Dict[int, array], viber_id: int, limit: Optional[int]) -> List[int]:
+        cls.ensure_warm()
+        with cls._lock:
+            ids = index.get(viber_id, _EMPTY)
+            return ids.tolist() if limit is None else ids[:limit].tolist()
+
+    @classmethod
+    def friends(cls, viber_id: int, limit: Optional[int] = None) -> List[int]:
+        return cls._ids(cls._friends, viber_id, limit)
+
+    @classmethod
+    def pending_inbox(cls, viber_id: int, limit: Optional[int] = None) -> List[int]:
+        """Vibers whose request to `viber_id` is still pending."""
+        return cls._ids(cls._inbox, viber_id, limit)
+
+    @classmethod
+    def pending_outbox(cls, viber_id: int, limit: Optional[int] = None) -> List[int]:
+        """Vibers `viber_id` has a pending request to."""
+        return cls._ids(cls._outbox, viber_id, limit)
+
+    @classmethod
+    def friend_count(cls, viber_id: int) -> int:
+        cls.ensure_warm()
+        return len(cls._friends.get(viber_id, _EMPTY))
+
+    @classmethod
+    def is_friend(cls, viber_id: int, other_id: int) -> bool:
+        cls.ensure_warm()
+        with cls._lock:
+            return _contains(cls._friends.get(viber_id, _EMPTY), other_id)
+
+    @classmethod
+    def link_id(cls, viber_id: int, friend_id: int) -> Optional[int]:
+        """The soul_links row for the request `viber_id` -> `friend_id`, if any."""
+        cls.ensure_warm()
+        return cls._pair_links.get((viber_id, friend_id))
+
+    @classmethod
+    def mutual_friends(cls, viber_id: int, other_id: int) -> List[int]:
+        cls.ensure_warm()
+        with cls._lock:
+            a = cls._friends.get(viber_id, _EMPTY)
+            b = cls._friends.get(other_id, _EMPTY)
+            if len(a) > len(b):
+                a, b = b, a
+            if not a:
+                return []
+            return sorted(set(a).intersection(b))
+
+    @classmethod
+    def suggestions(cls, viber_id: int, limit: int = 10) -> List[Tuple[int, int]]:
+        """Friends of friends ranked by mutual friend count: [(viber_id, mutuals)].
+
+        Excludes existing friends and anyone with a pending request either way.
+        """
+        cls.ensure_warm()
+        with cls._lock:
+            friends = cls._friends.get(viber_id, _EMPTY)
+            scan = array("I")
+            for friend in friends:
+                scan.extend(cls._friends.get(friend, _EMPTY)[:SUGGEST_FANOUT])
+                if len(scan) >= SUGGEST_SCAN_BUDGET:
+                    break
+            counts = Counter(scan)
+            if not counts:
+                return []
+            for v in friends:
+                counts.pop(v, None)
+            for v in cls._inbox.get(viber_id, _EMPTY):
+                counts.pop(v, None)
+            for v in cls._outbox.get(viber_id, _EMPTY):
+                counts.pop(v, None)
+            counts.pop(viber_id, None)
+            return counts.most_common(limit)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            return {
+                "vibers": len(cls._friends),
+                "friendships": len(cls._accepted),
+                "pending": sum(len(ids) for ids in cls._outbox.values()),
+                "links": len(cls._links),
+            }
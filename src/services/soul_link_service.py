@@ -1,12 +1,20 @@
 from src.dao.soul_link_dao import SoulLinkDAO
+from src.lazy import lazy
+from src.services.social_graph_service import SocialGraphService
+from src.services.timeline_service import TimelineService
 
 class SoulLinkService:
-    dao = SoulLinkDAO()
+    dao = lazy(SoulLinkDAO)
 
     @classmethod
     def create(cls, viber_id: int, friend_id: int):
-        return cls.dao.create(viber_id, friend_id)
+        link = cls.dao.create(viber_id, friend_id)
+        SocialGraphService.on_links(link)
+        return link
 
     @classmethod
     def update_status(cls, link_id: int, status: str):
-        return cls.dao.update_status(link_id, status)
\ No newline at end of file
+        link = cls.dao.update_status(link_id, status)
+        SocialGraphService.on_links(link)
+        TimelineService.on_links(link)
+        return link
\ No newline at end of file
@@ -0,0 +1,44 @@
+import os
+from typing import Dict, Sequence
+from src.cache import TTLCache
+from src.dao.stats_dao import StatsDAO
+from src.lazy import lazy
+
+DASHBOARD_TABLES = ("vibers", "thoughts", "tribes")
+
+class StatsService:
+    """Row counts for dashboard tiles.
+
+    Counts are cached for STATS_TTL seconds; creates and deletes made
+    through the services adjust the cached values, so tiles stay current
+    in between without another request.
+    """
+
+    dao = lazy(StatsDAO)
+    cache = TTLCache(maxsize=32, ttl=float(os.getenv("STATS_TTL", "30")))
+
+    @classmethod
+    def counts(cls, tables: Sequence[str] = DASHBOARD_TABLES) -> Dict[str, int]:
+        result = {}
+        for table in tables:
+            n = cls.cache.get(table)
+            if n is not None:
+                result[table] = n
+        missing = [t for t in tables if t not in result]
+        if missing:
+            for table, n in cls.dao.counts(missing).items():
+                cls.cache.set(table, n)
+                result[table] = n
+        return result
+
+    @classmethod
+    def count(cls, table: str) -> int:
+        return cls.counts((table,))[table]
+
+    @classmethod
+    def bump(cls, table: str, delta: int = 1):
+        cls.cache.incr(table, delta)
+
+    @classmethod
+    def invalidate(cls):
+        cls.cache.clear()
@@ -1,25 +1,66 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from src.cache import shared_cache
+from src.dao.projections import ALL
 from src.dao.thought_dao import ThoughtDAO
+from src.lazy import lazy
+from src.services.search_service import SearchService
+from src.services.stats_service import StatsService
+from src.services.timeline_service import TimelineService
+from src.services.trending_service import TrendingService
+from src.singleflight import coalesced, flights
 
 class ThoughtService:
-    dao = ThoughtDAO()
+    dao = lazy(ThoughtDAO)
 
     @classmethod
     def create(cls, viber_id: int, content: str, emotion_tag: str) -> Dict:
-        return cls.dao.create(viber_id, content, emotion_tag)
+        thought = cls.dao.create(viber_id, content, emotion_tag)
+        TrendingService.add_thought(thought)
+        TimelineService.add_thought(thought)
+        SearchService.index_thought(thought)
+        StatsService.bump("thoughts")
+        shared_cache.invalidate("recent_thoughts")
+        flights.forget("ThoughtService.")
+        return thought
 
     @classmethod
-    def get(cls, thought_id: int) -> Optional[Dict]:
-        return cls.dao.get_by_id(thought_id)
+    @coalesced
+    def get(cls, thought_id: int, columns: str = ALL) -> Optional[Dict]:
+        return cls.dao.get_by_id(thought_id, columns)
 
     @classmethod
-    def list_recent(cls, limit: int = 10) -> List[Dict]:
-        return cls.dao.list_recent(limit)
+    def list_recent(cls, limit: int = 10, columns: str = ALL) -> List[Dict]:
+        return shared_cache.get_or_load("recent_thoughts", (limit, columns),
+                                        lambda: cls.dao.list_recent(limit, columns))
+
+    @classmethod
+    @coalesced
+    def list_page(cls, page_size: int = 20, cursor: Optional[str] = None,
+                  columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        return cls.dao.list_page(page_size, cursor, columns)
+
+    @classmethod
+    @coalesced
+    def list_by_viber(cls, viber_id: int, page_size: int = 20, cursor: Optional[str] = None,
+                      columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        return cls.dao.list_page_by_viber(viber_id, page_size, cursor, columns)
 
     @classmethod
     def update(cls, thought_id: int, updates: Dict) -> Optional[Dict]:
-        return cls.dao.update(thought_id, updates)
+        thought = cls.dao.update(thought_id, updates)
+        SearchService.index_thought(thought)
+        shared_cache.invalidate("recent_thoughts")
+        flights.forget("ThoughtService.")
+        return thought
 
     @classmethod
     def delete(cls, thought_id: int) -> bool:
-        return cls.dao.delete(thought_id)
+        deleted = cls.dao.delete(thought_id)
+        TrendingService.remove_thought(thought_id)
+        TimelineService.remove_thought(thought_id)
+        SearchService.remove("thought", thought_id)
+        if deleted:
+            StatsService.bump("thoughts", -1)
+            shared_cache.invalidate("recent_thoughts")
+        flights.forget("ThoughtService.")
+        return deleted
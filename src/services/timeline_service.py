@@ -0,0 +1,279 @@
+import bisect
+import heapq
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src.dao.pagination import BULK_PAGE_SIZE, clamp_page_size, decode_cursor, encode_cursor
+from src.dao.projections import ALL
+from src.dao.thought_dao import ThoughtDAO
+from src.dao.tribe_dao import TribeDAO
+from src.lazy import lazy
+from src.services.social_graph_service import SocialGraphService
+from src.timeutil import to_epoch
+
+# Entries kept per home timeline, per tribe and per author.
+TIMELINE_SIZE = int(os.getenv("TIMELINE_SIZE", "800"))
+AUTHOR_RECENT_SIZE = int(os.getenv("TIMELINE_AUTHOR_RECENT", "100"))
+# Authors with more friends than this are not pushed; readers pull them.
+FANOUT_LIMIT = int(os.getenv("TIMELINE_FANOUT_LIMIT", "1000"))
+WARM_SIZE = int(os.getenv("TIMELINE_WARM_SIZE", "5000"))
+MEMBERSHIP_CHUNK = 200
+# Deleted thought ids collected before they are purged from every buffer in one pass.
+REMOVED_SWEEP = 1024
+
+# (created_at epoch, thought_id, author viber_id), kept in ascending order
+Entry = Tuple[float, int, int]
+
+
+def _push(buf: List[Entry], entry: Entry, size: int):
+    if not buf or buf[-1] < entry:
+        buf.append(entry)
+    else:
+        bisect.insort(buf, entry)
+    if len(buf) > 2 * size:
+        # Trim in bulk so appends stay amortised O(1).
+        del buf[:-size]
+
+
+def _older(buf: List[Entry], before: Optional[Tuple[float, int]]) -> Iterator[Entry]:
+    i = len(buf) if before is None else bisect.bisect_left(buf, before)
+    while i > 0:
+        i -= 1
+        yield buf[i]
+
+
+class TimelineService:
+    """Per-viber home timelines from soul-link friends and tribes.
+
+    Hybrid fan-out: a new thought is pushed into the bounded timelines of
+    the author's friends (only those already materialised), unless the
+    author has more than FANOUT_LIMIT friends. Tribe posts go to one
+    buffer per tribe. A read k-way merges the reader's own timeline, the
+    buffers of their tribes and the recent lists of the high-fan-out
+    friends they follow, so it costs O(page size), not O(network).
+    """
+
+    thought_dao = lazy(ThoughtDAO)
+    tribe_dao = lazy(TribeDAO)
+
+    _lock = threading.RLock()
+    _timelines: Dict[int, List[Entry]] = {}
+    _tribe_feeds: Dict[int, List[Entry]] = {}
+    _authored: Dict[int, List[Entry]] = {}
+    _viber_tribes: Dict[int, Set[int]] = {}
+    _celebrities: Set[int] = set()
+    _removed: Set[int] = set()
+    # Bumped by joins and leaves, so a membership read that raced one is not cached.
+    _membership_gen = 0
+    _warm = False
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._timelines, cls._tribe_feeds, cls._authored = {}, {}, {}
+            cls._viber_tribes, cls._celebrities, cls._removed = {}, set(), set()
+            cls._warm = False
+
+    @classmethod
+    def _tribes_of(cls, viber_id: int) -> Set[int]:
+        # Callers hold _lock; _load_tribes fetches missing vibers before taking it.
+        return cls._viber_tribes.get(viber_id) or set()
+
+    @classmethod
+    def _load_tribes(cls, viber_ids: Iterable[int]):
+        """Cache the tribes of any of `viber_ids` not known yet, querying outside _lock."""
+        for _ in range(3):
+            missing = [v for v in set(viber_ids) if v not in cls._viber_tribes]
+            if not missing:
+                return
+            generation = cls._membership_gen
+            tribes: Dict[int, Set[int]] = {v: set() for v in missing}
+            for i in range(0, len(missing), MEMBERSHIP_CHUNK):
+                for m in cls.tribe_dao.list_by_vibers(missing[i:i + MEMBERSHIP_CHUNK]):
+                    tribes[m["viber_id"]].add(m["tribe_id"])
+            with cls._lock:
+                if cls._membership_gen == generation:
+                    for viber_id, ids in tribes.items():
+                        cls._viber_tribes.setdefault(viber_id, ids)
+                    return
+
+    @classmethod
+    def _fan_out(cls, entry: Entry):
+        _, _, author = entry
+        _push(cls._authored.setdefault(author, []), entry, AUTHOR_RECENT_SIZE)
+        for tribe_id in cls._tribes_of(author):
+            _push(cls._tribe_feeds.setdefault(tribe_id, []), entry, TIMELINE_SIZE)
+        if SocialGraphService.friend_count(author) > FANOUT_LIMIT:
+            cls._celebrities.add(author)
+            targets = [author]
+        else:
+            cls._celebrities.discard(author)
+            targets = [author] + SocialGraphService.friends(author)
+        for viber_id in targets:
+            timeline = cls._timelines.get(viber_id)
+            if timeline is not None:
+                _push(timeline, entry, TIMELINE_SIZE)
+
+    @classmethod
+    def add_thought(cls, thought: Optional[Dict]):
+        if thought and cls._warm:
+            cls._load_tribes([thought["viber_id"]])
+            with cls._lock:
+                cls._fan_out((to_epoch(thought.get("created_at"), 0.0), thought["thought_id"], thought["viber_id"]))
+
+    @classmethod
+    def remove_thought(cls, thought_id: int):
+        with cls._lock:
+            cls._removed.add(thought_id)
+            if len(cls._removed) >= REMOVED_SWEEP:
+                cls._sweep()
+
+    @classmethod
+    def _sweep(cls):
+        removed = cls._removed
+        for buffers in (cls._timelines, cls._tribe_feeds, cls._authored):
+            for buf in buffers.values():
+                buf[:] = [entry for entry in buf if entry[1] not in removed]
+        cls._removed = set()
+
+    @classmethod
+    def record_join(cls, viber_id: int, tribe_id: int):
+        with cls._lock:
+            cls._membership_gen += 1
+            if viber_id in cls._viber_tribes:
+                cls._viber_tribes[viber_id].add(tribe_id)
+
+    @classmethod
+    def record_leave(cls, viber_id: int, tribe_id: int):
+        with cls._lock:
+            cls._membership_gen += 1
+            if viber_id in cls._viber_tribes:
+                cls._viber_tribes[viber_id].discard(tribe_id)
+
+    @classmethod
+    def on_links(cls, links: Optional[List[Dict]]):
+        """Backfill both timelines when a soul link is accepted."""
+        if not links or not cls._warm:
+            return
+        with cls._lock:
+            for link in links:
+                if (link.get("status") or "").upper() != "ACCEPTED":
+                    continue
+                a, b = link["viber_id"], link["friend_id"]
+                for reader, author in ((a, b), (b, a)):
+                    timeline = cls._timelines.get(reader)
+                    if timeline is not None and author not in cls._celebrities:
+                        for entry in cls._authored.get(author, ()):
+                            _push(timeline, entry, TIMELINE_SIZE)
+
+    @classmethod
+    def warm(cls, thoughts: List[Dict], memberships: List[Dict] = ()):
+        """Replay recent thoughts, oldest first, into author and tribe buffers."""
+        with cls._lock:
+            for m in memberships:
+                cls._viber_tribes.setdefault(m["viber_id"], set()).add(m["tribe_id"])
+            for t in thoughts:
+                cls._viber_tribes.setdefault(t["viber_id"], set())
+            entries = sorted((to_epoch(t.get("created_at"), 0.0), t["thought_id"], t["viber_id"]) for t in thoughts)
+            for entry in entries:
+                cls._fan_out(entry)
+            cls._warm = True
+
+    @classmethod
+    def ensure_warm(cls):
+        if cls._warm:
+            return
+        with cls._lock:
+            if cls._warm:
+                return
+            SocialGraphService.ensure_warm()
+            thoughts: List[Dict] = []
+            for page in cls.thought_dao.iter_all(min(WARM_SIZE, BULK_PAGE_SIZE)):
+                thoughts.extend(page)
+                if len(thoughts) >= WARM_SIZE:
+                    break
+            authors = list({t["viber_id"] for t in thoughts})
+            memberships = []
+            for i in range(0, len(authors), MEMBERSHIP_CHUNK):
+                memberships += cls.tribe_dao.list_by_vibers(authors[i:i + MEMBERSHIP_CHUNK])
+            cls.warm(thoughts, memberships)
+
+    @classmethod
+    def _materialise(cls, viber_id: int) -> List[Entry]:
+        timeline = cls._timelines.get(viber_id)
+        if timeline is None:
+            sources = [viber_id] + [f for f in SocialGraphService.friends(viber_id) if f not in cls._celebrities]
+            merged = heapq.merge(*(cls._authored.get(a, ()) for a in sources))
+            timeline = cls._timelines[viber_id] = list(merged)[-TIMELINE_SIZE:]
+        return timeline
+
+    @classmethod
+    def page_ids(cls, viber_id: int, page_size: int = 20,
+                 cursor: Optional[str] = None) -> Tuple[List[int], Optional[str]]:
+        """Thought ids for one page of `viber_id`'s home timeline, newest first."""
+        cls.ensure_warm()
+        page_size = clamp_page_size(page_size)
+        before = decode_cursor(cursor) if cursor else None
+        if before is not None and type(before[0]) not in (int, float):
+            # Timeline cursors carry epoch seconds; a keyset cursor's ISO string cannot be compared.
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        cls._load_tribes([viber_id])
+        for attempt in range(2):
+            # Authors whose tribes are unknown count as hidden on this pass; load them and merge again.
+            # A second pass only revisits entries the first one saw, so it finds no new unknowns.
+            unknown: Set[int] = set()
+            with cls._lock:
+                streams = [_older(cls._materialise(viber_id), before)]
+                for tribe_id in cls._tribes_of(viber_id):
+                    streams.append(_older(cls._tribe_feeds.get(tribe_id, []), before))
+                for author in cls._celebrities:
+                    if SocialGraphService.is_friend(viber_id, author):
+                        streams.append(_older(cls._authored.get(author, []), before))
+                page: List[Entry] = []
+                seen = set()
+                for entry in heapq.merge(*streams, reverse=True):
+                    _, thought_id, author = entry
+                    if thought_id in seen or thought_id in cls._removed:
+                        continue
+                    seen.add(thought_id)
+                    if author != viber_id and not cls._visible(viber_id, author, unknown):
+                        continue
+                    page.append(entry)
+                    if len(page) > page_size:
+                        break
+            if not unknown or attempt:
+                break
+            cls._load_tribes(unknown)
+        ids = [thought_id for _, thought_id, _ in page[:page_size]]
+        if len(page) <= page_size:
+            return ids, None
+        ts, thought_id, _ = page[page_size - 1]
+        return ids, encode_cursor({"created_at": ts, "thought_id": thought_id}, "thought_id")
+
+    @classmethod
+    def _visible(cls, viber_id: int, author: int, unknown: Set[int]) -> bool:
+        # Friendships can end after an entry was pushed; tribe posts stay visible.
+        if SocialGraphService.is_friend(viber_id, author):
+            return True
+        if author not in cls._viber_tribes:
+            unknown.add(author)
+            return False
+        return bool(cls._tribes_of(author) & cls._tribes_of(viber_id))
+
+    @classmethod
+    def page(cls, viber_id: int, page_size: int = 20, cursor: Optional[str] = None,
+             columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        ids, next_cursor = cls.page_ids(viber_id, page_size, cursor)
+        rows = {t["thought_id"]: t for t in cls.thought_dao.get_by_ids(ids, columns)}
+        return [rows[i] for i in ids if i in rows], next_cursor
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls._lock:
+            return {
+                "timelines": len(cls._timelines),
+                "tribe_feeds": len(cls._tribe_feeds),
+                "authors": len(cls._authored),
+                "celebrities": len(cls._celebrities),
+                "entries": sum(len(t) for t in cls._timelines.values()),
+            }
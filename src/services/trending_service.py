@@ -0,0 +1,246 @@
+import heapq
+import math
+import os
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from src.dao.echo_dao import EchoDAO
+from src.dao.pagination import MAX_PAGE_SIZE
+from src.dao.projections import ALL
+from src.dao.reverberation_dao import ReverberationDAO
+from src.dao.thought_dao import ThoughtDAO
+from src.dao.tribe_dao import TribeDAO
+from src.lazy import lazy
+from src.timeutil import to_epoch
+
+HALF_LIFE_SECONDS = float(os.getenv("TRENDING_HALF_LIFE", str(6 * 3600)))
+TOP_K = int(os.getenv("TRENDING_TOP_K", "100"))
+WARM_SIZE = int(os.getenv("TRENDING_WARM_SIZE", "500"))
+WEIGHTS = {"thought": 1.0, "echo": 1.0, "reverberation": 2.0}
+
+GLOBAL = ("global",)
+
+# Scores use forward decay: an event at time t adds w * 2 ** ((t - landmark) / half_life).
+# Every score shares the same decay factor at read time, so rankings never need
+# re-scoring as time passes and a reaction only touches its own thought.
+_RESCALE_EXPONENT = 512.0
+
+
+class TrendingService:
+    thought_dao = lazy(ThoughtDAO)
+    echo_dao = lazy(EchoDAO)
+    reverberation_dao = lazy(ReverberationDAO)
+    tribe_dao = lazy(TribeDAO)
+
+    _lock = threading.RLock()
+    # Serialises warm-ups so the DB reads in ensure_warm() run without holding _lock.
+    _warm_lock = threading.Lock()
+    _landmark = time.time()
+    _scores: Dict[int, float] = {}
+    _thought_scopes: Dict[int, Tuple[Hashable, ...]] = {}
+    _viber_tribes: Dict[int, set] = {}
+    # scope -> min-heap of [score, thought_id] holding that scope's top K
+    _heaps: Dict[Hashable, List[List]] = {}
+    _entries: Dict[Hashable, Dict[int, List]] = {}
+    _warm = False
+    # Writes recorded while ensure_warm() is reading, as (kind, thought_id, at, thought).
+    _backlog: Optional[List[Tuple]] = None
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._landmark = time.time()
+            cls._scores, cls._thought_scopes, cls._viber_tribes = {}, {}, {}
+            cls._heaps, cls._entries = {}, {}
+            cls._warm = False
+            cls._backlog = None
+
+    @classmethod
+    def _boost(cls, weight: float, at: float) -> float:
+        exponent = (at - cls._landmark) / HALF_LIFE_SECONDS
+        if exponent > _RESCALE_EXPONENT:
+            cls._rescale(at)
+            exponent = (at - cls._landmark) / HALF_LIFE_SECONDS
+        return weight * math.pow(2.0, exponent)
+
+    @classmethod
+    def _rescale(cls, at: float):
+        factor = math.pow(2.0, -(at - cls._landmark) / HALF_LIFE_SECONDS)
+        cls._landmark = at
+        for thought_id in cls._scores:
+            cls._scores[thought_id] *= factor
+        for heap in cls._heaps.values():
+            for entry in heap:
+                entry[0] *= factor
+
+    @classmethod
+    def _scopes_for(cls, thought: Dict) -> Tuple[Hashable, ...]:
+        scopes = [GLOBAL]
+        if thought.get("emotion_tag"):
+            scopes.append(("emotion", thought["emotion_tag"]))
+        for tribe_id in cls._viber_tribes.get(thought.get("viber_id"), ()):
+            scopes.append(("tribe", tribe_id))
+        return tuple(scopes)
+
+    @classmethod
+    def _offer(cls, scope: Hashable, thought_id: int, score: float):
+        # Scores only grow, so a thought outside the top K can enter only when
+        # its own score rises; nothing else ever has to be re-examined.
+        heap = cls._heaps.setdefault(scope, [])
+        entries = cls._entries.setdefault(scope, {})
+        entry = entries.get(thought_id)
+        if entry is not None:
+            entry[0] = score
+            heapq.heapify(heap)
+        elif len(heap) < TOP_K:
+            entry = [score, thought_id]
+            entries[thought_id] = entry
+            heapq.heappush(heap, entry)
+        elif score > heap[0][0]:
+            entry = [score, thought_id]
+            entries[thought_id] = entry
+            dropped = heapq.heapreplace(heap, entry)
+            del entries[dropped[1]]
+
+    @classmethod
+    def _add(cls, thought_id: int, weight: float, at: float):
+        if not cls._warm:
+            # Not loaded yet: ensure_warm() reads this write back from the DB,
+            # or replays it if the read has already started.
+            return
+        score = cls._scores.get(thought_id, 0.0) + cls._boost(weight, at)
+        cls._scores[thought_id] = score
+        for scope in cls._thought_scopes.setdefault(thought_id, (GLOBAL,)):
+            cls._offer(scope, thought_id, score)
+
+    @classmethod
+    def add_thought(cls, thought: Optional[Dict]):
+        if not thought or thought.get("thought_id") is None:
+            return
+        with cls._lock:
+            if not cls._warm:
+                if cls._backlog is not None:
+                    cls._backlog.append(("thought", thought["thought_id"], to_epoch(thought.get("created_at")), thought))
+                return
+            cls._thought_scopes[thought["thought_id"]] = cls._scopes_for(thought)
+            cls._add(thought["thought_id"], WEIGHTS["thought"], to_epoch(thought.get("created_at")))
+
+    @classmethod
+    def record_echo(cls, thought_id: int, at: Optional[float] = None):
+        cls._record("echo", thought_id, time.time() if at is None else at)
+
+    @classmethod
+    def record_reverberation(cls, thought_id: int, at: Optional[float] = None):
+        cls._record("reverberation", thought_id, time.time() if at is None else at)
+
+    @classmethod
+    def _record(cls, kind: str, thought_id: int, at: float):
+        with cls._lock:
+            if not cls._warm and cls._backlog is not None:
+                cls._backlog.append((kind, thought_id, at, None))
+            cls._add(thought_id, WEIGHTS[kind], at)
+
+    @classmethod
+    def record_join(cls, viber_id: int, tribe_id: int):
+        with cls._lock:
+            cls._viber_tribes.setdefault(viber_id, set()).add(tribe_id)
+
+    @classmethod
+    def remove_thought(cls, thought_id: int):
+        with cls._lock:
+            cls._scores.pop(thought_id, None)
+            for scope in cls._thought_scopes.pop(thought_id, ()):
+                if thought_id in cls._entries.get(scope, {}):
+                    cls._rebuild(scope)
+
+    @classmethod
+    def _rebuild(cls, scope: Hashable):
+        members = [(s, t) for t, s in cls._scores.items() if scope in cls._thought_scopes.get(t, ())]
+        top = [[s, t] for s, t in heapq.nlargest(TOP_K, members)]
+        heapq.heapify(top)
+        cls._heaps[scope] = top
+        cls._entries[scope] = {entry[1]: entry for entry in top}
+
+    @classmethod
+    def warm(cls, thoughts: Iterable[Dict], echoes: Iterable[Dict] = (),
+             reverberations: Iterable[Dict] = (), memberships: Iterable[Dict] = ()):
+        """Bulk-load state and build every scope's top K in one pass."""
+        with cls._lock:
+            for m in memberships:
+                cls._viber_tribes.setdefault(m["viber_id"], set()).add(m["tribe_id"])
+            for t in thoughts:
+                cls._thought_scopes[t["thought_id"]] = cls._scopes_for(t)
+                cls._scores[t["thought_id"]] = cls._boost(WEIGHTS["thought"], to_epoch(t.get("created_at")))
+            for kind, rows in (("echo", echoes), ("reverberation", reverberations)):
+                for r in rows:
+                    if r["thought_id"] in cls._scores:
+                        cls._scores[r["thought_id"]] += cls._boost(WEIGHTS[kind], to_epoch(r.get("created_at")))
+            for scope in {s for scopes in cls._thought_scopes.values() for s in scopes}:
+                cls._rebuild(scope)
+            cls._warm = True
+
+    @classmethod
+    def ensure_warm(cls):
+        if cls._warm:
+            return
+        with cls._warm_lock:
+            if cls._warm:
+                return
+            with cls._lock:
+                cls._backlog = []
+            try:
+                # Read outside _lock so writers and top() keep going during the load.
+                thoughts, cursor = [], None
+                while len(thoughts) < WARM_SIZE:
+                    page, cursor = cls.thought_dao.list_page(MAX_PAGE_SIZE, cursor)
+                    thoughts.extend(page)
+                    if not cursor:
+                        break
+                ids = [t["thought_id"] for t in thoughts]
+                echoes = cls.echo_dao.list_by_thoughts(ids)
+                reverberations = cls.reverberation_dao.list_by_thoughts(ids)
+                memberships = cls.tribe_dao.list_by_vibers({t["viber_id"] for t in thoughts})
+            except Exception:
+                with cls._lock:
+                    cls._backlog = None
+                raise
+            with cls._lock:
+                backlog, cls._backlog = cls._backlog or [], None
+                cls.warm(thoughts, echoes, reverberations, memberships)
+                cls._replay(backlog, {"thought": thoughts, "echo": echoes, "reverberation": reverberations})
+
+    @classmethod
+    def _replay(cls, backlog: List[Tuple], loaded: Dict[str, List[Dict]]):
+        # A write newer than everything the read returned for its kind landed after that read.
+        latest = {kind: max((to_epoch(r.get("created_at")) for r in rows), default=float("-inf"))
+                  for kind, rows in loaded.items()}
+        for kind, thought_id, at, thought in backlog:
+            if at <= latest[kind] or (thought and thought_id in cls._scores):
+                continue
+            if thought:
+                cls.add_thought(thought)
+            else:
+                cls._add(thought_id, WEIGHTS[kind], at)
+
+    @classmethod
+    def top(cls, limit: int = 10, emotion: Optional[str] = None,
+            tribe_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(thought_id, current score) pairs, hottest first. Cost is O(K), not O(thoughts)."""
+        if tribe_id is not None:
+            scope = ("tribe", tribe_id)
+        elif emotion:
+            scope = ("emotion", emotion)
+        else:
+            scope = GLOBAL
+        with cls._lock:
+            decay = math.pow(2.0, -(time.time() - cls._landmark) / HALF_LIFE_SECONDS)
+            ranked = heapq.nlargest(limit, cls._heaps.get(scope, ()))
+            return [(thought_id, score * decay) for score, thought_id in ranked]
+
+    @classmethod
+    def trending_thoughts(cls, limit: int = 10, emotion: Optional[str] = None,
+                          tribe_id: Optional[int] = None, columns: str = ALL) -> List[Dict]:
+        cls.ensure_warm()
+        ranked = cls.top(limit, emotion, tribe_id)
+        rows = {t["thought_id"]: t for t in cls.thought_dao.get_by_ids([i for i, _ in ranked], columns)}
+        return [{**rows[i], "trend_score": round(score, 3)} for i, score in ranked if i in rows]
@@ -1,21 +1,69 @@
 
+from typing import Dict, List, Optional, Tuple
+from src.cache import shared_cache
+from src.dao.projections import PROFILE
 from src.dao.tribe_dao import TribeDAO
+from src.lazy import lazy
+from src.services.stats_service import StatsService
+from src.services.timeline_service import TimelineService
+from src.services.trending_service import TrendingService
+from src.services.viber_service import ViberService
+from src.singleflight import coalesced, flights
 
 class TribeService:
-    dao = TribeDAO()
+    dao = lazy(TribeDAO)
 
     @classmethod
     def create(cls, name, description):
-        return cls.dao.create(name, description)
+        tribe = cls.dao.create(name, description)
+        StatsService.bump("tribes")
+        shared_cache.invalidate("tribes")
+        return tribe
 
     @classmethod
     def list(cls):
-        return cls.dao.list()
+        return shared_cache.get_or_load("tribes", "all", lambda: cls.dao.list() or [])
+
+    @classmethod
+    def list_for_viber(cls, viber_id: int):
+        """Every tribe with member_count and the viber's is_member flag, in one query."""
+        return cls.dao.list_with_membership(viber_id)
 
     @classmethod
     def join(cls, viber_id, tribe_id):
-        return cls.dao.join(viber_id, tribe_id)
+        """Returns the new membership rows; [] if the viber was already a member."""
+        membership = cls.dao.join(viber_id, tribe_id)
+        if membership:
+            TrendingService.record_join(viber_id, tribe_id)
+            TimelineService.record_join(viber_id, tribe_id)
+            shared_cache.invalidate("tribes")
+            flights.forget("TribeService.")
+        return membership
+
+    @classmethod
+    def leave(cls, viber_id: int, tribe_id: int) -> bool:
+        left = bool(cls.dao.leave(viber_id, tribe_id))
+        if left:
+            TimelineService.record_leave(viber_id, tribe_id)
+            shared_cache.invalidate("tribes")
+            flights.forget("TribeService.")
+        return left
+
+    @classmethod
+    def is_member_many(cls, viber_id: int, tribe_ids: List[int]) -> Dict[int, bool]:
+        joined = set(cls.dao.member_of(viber_id, tribe_ids))
+        return {tribe_id: tribe_id in joined for tribe_id in tribe_ids}
+
+    @classmethod
+    def members_page(cls, tribe_id: int, page_size: int = 20,
+                     cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """One page of members (PROFILE columns plus joined_at), newest first."""
+        rows, next_cursor = cls.dao.list_members_page(tribe_id, page_size, cursor)
+        vibers = ViberService.get_many([r["viber_id"] for r in rows], PROFILE)
+        members = [{**vibers[r["viber_id"]], "joined_at": r["created_at"]} for r in rows if r["viber_id"] in vibers]
+        return members, next_cursor
 
     @classmethod
+    @coalesced
     def list_viber_tribes(cls, viber_id):
         return cls.dao.list_viber_tribes(viber_id)
@@ -1,28 +1,85 @@
   
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from src.cache import viber_cache
+from src.dao.projections import ALL
 from src.dao.viber_dao import ViberDAO
+from src.lazy import lazy
+from src.services.search_service import SearchService
+from src.services.social_graph_service import SocialGraphService
+from src.services.stats_service import StatsService
+from src.singleflight import flights
 
 class ViberService:
-    dao = ViberDAO()
+    dao = lazy(ViberDAO)
+    cache = viber_cache
 
     @classmethod
     def register(cls, username: str, email: str, password: str, aura_color: str = "Neutral") -> Dict:
-        if cls.dao.get_by_username(username):
+        if cls.get_by_username(username, "viber_id,username"):
             raise ValueError(f"Username '{username}' already exists.")
-        return cls.dao.create(username, email, password, aura_color)
+        viber = cls.dao.create(username, email, password, aura_color)
+        SearchService.index_viber(viber)
+        StatsService.bump("vibers")
+        flights.forget("ViberService.")
+        return viber
 
     @classmethod
-    def get(cls, viber_id: int) -> Optional[Dict]:
-        return cls.dao.get_by_id(viber_id)
+    def get(cls, viber_id: int, columns: str = ALL) -> Optional[Dict]:
+        viber = cls.cache.get(viber_id, columns)
+        if viber is None:
+            generation = cls.cache.generation()
+            # Popular authors miss the cache from many sessions at once.
+            viber = flights.do(("ViberService.get", viber_id, columns, generation), cls.dao.get_by_id, viber_id, columns)
+            cls.cache.put(viber, columns, generation)
+        return viber
+
+    @classmethod
+    def get_by_username(cls, username: str, columns: str = ALL) -> Optional[Dict]:
+        viber = cls.cache.get_by_username(username, columns)
+        if viber is None:
+            generation = cls.cache.generation()
+            viber = cls.dao.get_by_username(username, columns)
+            cls.cache.put(viber, columns, generation)
+        return viber
+
+    @classmethod
+    def get_many(cls, viber_ids: List[int], columns: str = ALL) -> Dict[int, Dict]:
+        found, missing = {}, []
+        for viber_id in set(viber_ids):
+            viber = cls.cache.get(viber_id, columns)
+            if viber is not None:
+                found[viber_id] = viber
+            elif viber_id is not None:
+                missing.append(viber_id)
+        generation = cls.cache.generation()
+        for viber in cls.dao.get_by_ids(missing, columns):
+            cls.cache.put(viber, columns, generation)
+            found[viber["viber_id"]] = viber
+        return found
 
     @classmethod
     def list(cls) -> List[Dict]:
         return cls.dao.list_all()
 
+    @classmethod
+    def list_page(cls, page_size: int = 20, cursor: Optional[str] = None,
+                  columns: str = ALL) -> Tuple[List[Dict], Optional[str]]:
+        return cls.dao.list_page(page_size, cursor, columns)
+
     @classmethod
     def update(cls, viber_id: int, updates: Dict) -> Optional[Dict]:
-        return cls.dao.update(viber_id, updates)
+        viber = cls.dao.update(viber_id, updates)
+        if "username" in updates:
+            SearchService.index_viber(viber)
+        flights.forget("ViberService.")
+        return viber
 
     @classmethod
     def delete(cls, viber_id: int) -> bool:
-        return cls.dao.delete(viber_id)
+        deleted = cls.dao.delete(viber_id)
+        SearchService.remove("viber", viber_id)
+        SocialGraphService.remove_viber(viber_id)
+        if deleted:
+            StatsService.bump("vibers", -1)
+        flights.forget("ViberService.")
+        return deleted
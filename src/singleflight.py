@@ -0,0 +1,137 @@
+"""Single-flight request coalescing for identical concurrent reads.
+
+While a call for a key is in flight, every other caller asking for the
+same key waits for that call and shares its result (or exception)
+instead of issuing its own backend request. The shared state is a
+concurrent.futures.Future, so threads block on it and asyncio tasks
+await it. Nothing is cached: the key is forgotten as soon as the call
+finishes, so the next caller always starts a fresh request. Services
+call forget() after a write so later reads never join a call that
+started before it.
+
+Callers share the result object itself; treat it as read-only.
+Disable with VIBENET_SINGLE_FLIGHT=0.
+"""
+import asyncio
+import functools
+import os
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+ENABLED = os.getenv("VIBENET_SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no")
+
+
+def _label(key: Hashable) -> str:
+    return str(key[0] if isinstance(key, tuple) and key else key)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+        self.errors = 0
+        self.collapsed_by: Counter = Counter()
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """The in-flight future for `key` and whether this caller leads it."""
+        with self._lock:
+            self.calls += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self.collapsed += 1
+                self.collapsed_by[_label(key)] += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.executions += 1
+            return future, True
+
+    def _lead(self, key: Hashable, future: Future, fn: Callable, args: tuple, kwargs: Dict) -> Any:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                self._release(key, future)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._release(key, future)
+        future.set_result(result)
+        return result
+
+    def _release(self, key: Hashable, future: Future):
+        # forget() may already have handed the key to a newer call.
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def forget(self, prefix: str):
+        """Detach in-flight calls whose label starts with `prefix` (e.g. "ThoughtService.").
+
+        Callers already waiting still get the running call's result; later
+        callers start a fresh request instead of one that began before a write.
+        """
+        with self._lock:
+            for key in [k for k in self._calls if _label(k).startswith(prefix)]:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs), or wait for the identical call already running."""
+        if not ENABLED:
+            return fn(*args, **kwargs)
+        future, leader = self._join(key)
+        if leader:
+            return self._lead(key, future, fn, args, kwargs)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Coroutine form: the leader runs `fn` on the src.aio pool, followers await it."""
+        from src.aio import run_sync
+        if not ENABLED:
+            return await run_sync(fn, *args, **kwargs)
+        future, leader = self._join(key)
+        if leader:
+            return await run_sync(self._lead, key, future, fn, args, kwargs)
+        return await asyncio.wrap_future(future)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": ENABLED,
+                "calls": self.calls,
+                "executions": self.executions,
+                "collapsed": self.collapsed,
+                "errors": self.errors,
+                "in_flight": len(self._calls),
+                "collapsed_by": dict(self.collapsed_by.most_common()),
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = self.executions = self.collapsed = self.errors = 0
+            self.collapsed_by = Counter()
+
+
+flights = SingleFlight()
+
+
+def coalesced(fn: Callable) -> Callable:
+    """Coalesce concurrent calls with equal (hashable) arguments.
+
+    Goes under @classmethod, so the class is part of the key.
+    """
+    label = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (label, args, tuple(sorted(kwargs.items()))) if kwargs else (label, args)
+        return flights.do(key, fn, *args, **kwargs)
+    return wrapper
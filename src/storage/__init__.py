@@ -0,0 +1,21 @@
+"""Local storage backends that stand in for the Supabase client.
+
+Select one with VIBENET_BACKEND=sqlite|memory (default: supabase). Both
+expose the same table()/rpc() query-builder API the DAOs already use, so
+every DAO runs unchanged against them.
+"""
+import os
+
+from src.storage.query import LocalClient, StorageError
+
+BACKENDS = ("supabase", "sqlite", "memory")
+
+
+def create_local_client(backend: str) -> LocalClient:
+    if backend == "memory":
+        from src.storage.memory import MemoryBackend
+        return MemoryBackend()
+    if backend == "sqlite":
+        from src.storage.sqlite import SQLiteBackend
+        return SQLiteBackend(os.getenv("VIBENET_SQLITE_PATH", "vibenet.db"))
+    raise StorageError(f"Unknown VIBENET_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
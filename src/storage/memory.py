@@ -0,0 +1,180 @@
+import heapq
+import operator
+from typing import Callable, Dict, List
+
+from src.storage.query import (
+    LocalClient, Query, Response, StorageError, apply_defaults, coerce, duplicate_key, project,
+)
+from src.storage.schema import TABLES
+
+_OPS = {
+    "eq": operator.eq, "neq": operator.ne,
+    "lt": operator.lt, "lte": operator.le, "gt": operator.gt, "gte": operator.ge,
+}
+
+
+class _Desc:
+    """Sort-key wrapper that inverts ordering for descending columns."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _sort_value(value):
+    # None sorts after everything, like Postgres' NULLS LAST for ASC.
+    return (value is None, value if value is not None else 0)
+
+
+class MemoryBackend(LocalClient):
+    """Dict-backed tables with hash indexes on ids and unique constraints."""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._rows: Dict[str, Dict[int, Dict]] = {t: {} for t in TABLES}
+        self._next_id: Dict[str, int] = {t: 1 for t in TABLES}
+        self._unique: Dict[str, Dict[tuple, Dict[tuple, int]]] = {
+            t: {cols: {} for cols in spec["unique"]} for t, spec in TABLES.items()
+        }
+
+    # --- predicates ---
+    def _compile(self, table: str, node: tuple) -> Callable[[Dict], bool]:
+        kind = node[0]
+        if kind == "cmp":
+            _, column, op, value = node
+            fn, value = _OPS[op], coerce(table, column, value)
+            return lambda row: row.get(column) is not None and fn(row.get(column), value)
+        if kind == "in":
+            _, column, values = node
+            wanted = {coerce(table, column, v) for v in values}
+            return lambda row: row.get(column) in wanted
+        if kind == "is":
+            _, column, value = node
+            return lambda row: row.get(column) is value
+        parts = [self._compile(table, n) for n in node[1]]
+        if kind == "or":
+            return lambda row: any(p(row) for p in parts)
+        return lambda row: all(p(row) for p in parts)
+
+    def _matching(self, query: Query) -> List[int]:
+        table, rows = query.table, self._rows[query.table]
+        id_col = TABLES[table]["id"]
+        candidates = rows.keys()
+        # Primary-key lookups skip the scan.
+        for node in query.filters:
+            if node[0] == "cmp" and node[1] == id_col and node[2] == "eq":
+                candidates = [coerce(table, id_col, node[3])]
+                break
+            if node[0] == "in" and node[1] == id_col:
+                candidates = [coerce(table, id_col, v) for v in node[2]]
+                break
+        preds = [self._compile(table, n) for n in query.filters]
+        return [rid for rid in candidates if rid in rows and all(p(rows[rid]) for p in preds)]
+
+    def _sorted(self, query: Query, rids: List[int]) -> List[int]:
+        rows = self._rows[query.table]
+        if not query.orders:
+            ordered = rids
+            if query.limit_n is not None:
+                ordered = ordered[query.offset_n:query.offset_n + query.limit_n]
+            return ordered
+
+        def key(rid):
+            row = rows[rid]
+            return tuple(_Desc(_sort_value(row.get(c))) if desc else _sort_value(row.get(c))
+                         for c, desc in query.orders)
+
+        if query.limit_n is not None:
+            return heapq.nsmallest(query.offset_n + query.limit_n, rids, key=key)[query.offset_n:]
+        return sorted(rids, key=key)[query.offset_n:]
+
+    # --- writes ---
+    def _unique_keys(self, table: str, row: Dict):
+        return [(cols, tuple(row.get(c) for c in cols)) for cols in TABLES[table]["unique"]]
+
+    def _insert(self, table: str, payload: Dict, conflict: str = "error", on_conflict=None) -> List[Dict]:
+        row = apply_defaults(table, payload)
+        id_col = TABLES[table]["id"]
+        for cols, values in self._unique_keys(table, row):
+            existing = self._unique[table][cols].get(values)
+            if existing is None or None in values:
+                continue
+            if conflict == "ignore":
+                return []
+            if conflict == "merge" and (on_conflict is None or tuple(on_conflict) == cols):
+                return self._update_rows(table, [existing], payload)
+            raise duplicate_key(table, cols)
+        if id_col:
+            if row.get(id_col) is None:
+                row[id_col] = self._next_id[table]
+            self._next_id[table] = max(self._next_id[table], row[id_col] + 1)
+            rid = row[id_col]
+            if rid in self._rows[table]:
+                raise duplicate_key(table, (id_col,))
+        else:
+            rid = self._next_id[table]
+            self._next_id[table] += 1
+        self._rows[table][rid] = row
+        for cols, values in self._unique_keys(table, row):
+            self._unique[table][cols][values] = rid
+        return [dict(row)]
+
+    def _update_rows(self, table: str, rids: List[int], changes: Dict) -> List[Dict]:
+        out = []
+        for rid in rids:
+            row = self._rows[table][rid]
+            updated = {**row, **{c: coerce(table, c, v) for c, v in changes.items()}}
+            for cols, values in self._unique_keys(table, updated):
+                holder = self._unique[table][cols].get(values)
+                if holder is not None and holder != rid and None not in values:
+                    raise duplicate_key(table, cols)
+            for cols, values in self._unique_keys(table, row):
+                self._unique[table][cols].pop(values, None)
+            for cols, values in self._unique_keys(table, updated):
+                self._unique[table][cols][values] = rid
+            self._rows[table][rid] = updated
+            out.append(dict(updated))
+        return out
+
+    def _run(self, query: Query) -> Response:
+        table = query.table
+        with self.lock:
+            if query.op == "select":
+                rids = self._matching(query)
+                count = len(rids) if query.count else None
+                if query.head:
+                    return Response([], count)
+                rows = self._rows[table]
+                data = [project(rows[rid], query.columns) for rid in self._sorted(query, rids)]
+                return Response(data, count)
+            if query.op in ("insert", "upsert"):
+                payload = query.payload if isinstance(query.payload, list) else [query.payload]
+                conflict = "error"
+                if query.op == "upsert":
+                    conflict = "ignore" if query.ignore_duplicates else "merge"
+                on_conflict = [c.strip() for c in query.on_conflict.split(",")] if query.on_conflict else None
+                data = []
+                for item in payload:
+                    data += self._insert(table, item, conflict, on_conflict)
+                return Response(data)
+            rids = self._matching(query)
+            if query.op == "update":
+                return Response(self._update_rows(table, rids, query.payload))
+            if query.op == "delete":
+                data = []
+                for rid in rids:
+                    row = self._rows[table].pop(rid)
+                    for cols, values in self._unique_keys(table, row):
+                        self._unique[table][cols].pop(values, None)
+                    data.append(row)
+                return Response(data)
+            raise StorageError(f"unsupported operation {query.op}")
@@ -0,0 +1,244 @@
+"""PostgREST-style query builder shared by the local backends.
+
+Supports the subset of the supabase-py API the DAOs use:
+table().select/insert/update/upsert/delete, eq/neq/lt/lte/gt/gte/in_/is_/or_
+filters, order, limit, range and execute(), plus rpc().
+"""
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.storage.schema import TABLES
+
+
+class StorageError(Exception):
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        # SQLSTATE, like the `code` PostgREST puts on its errors.
+        self.code = code
+
+
+class Response:
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def split_top_level(expr: str) -> List[str]:
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    if current:
+        parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def parse_logic(expr: str) -> List[tuple]:
+    """Parse a PostgREST logic tree such as `a.lt.1,and(b.eq."x",c.gt.2)`."""
+    nodes = []
+    for part in split_top_level(expr):
+        for logic in ("and", "or"):
+            if part.startswith(logic + "(") and part.endswith(")"):
+                nodes.append((logic, parse_logic(part[len(logic) + 1:-1])))
+                break
+        else:
+            column, op, value = part.split(".", 2)
+            if op == "in":
+                values = [v.strip('"') for v in split_top_level(value.strip("()"))]
+                nodes.append(("in", column, values))
+            elif op == "is":
+                nodes.append(("is", column, None if value == "null" else value))
+            else:
+                nodes.append(("cmp", column, op, value.strip('"')))
+    return nodes
+
+
+def coerce(table: str, column: str, value: Any) -> Any:
+    kind = TABLES[table]["columns"].get(column)
+    if value is None or kind is None:
+        return value
+    if kind == "int" and not isinstance(value, int):
+        return int(value)
+    if kind in ("text", "timestamp") and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def apply_defaults(table: str, row: Dict) -> Dict:
+    spec = TABLES[table]
+    unknown = set(row) - set(spec["columns"])
+    if unknown:
+        raise StorageError(f"column {sorted(unknown)[0]!r} of relation {table!r} does not exist")
+    full = {col: None for col in spec["columns"]}
+    for col, default in spec["defaults"].items():
+        full[col] = _copy(default)
+    full["created_at"] = now_iso()
+    full.update({col: coerce(table, col, v) for col, v in row.items()})
+    return full
+
+
+class Query:
+    def __init__(self, client: "LocalClient", table: str):
+        self._client = client
+        self.table = table
+        self.op = "select"
+        self.columns = "*"
+        self.count: Optional[str] = None
+        self.head = False
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+        self.filters: List[tuple] = []
+        self.orders: List[tuple] = []
+        self.limit_n: Optional[int] = None
+        self.offset_n = 0
+
+    # --- operations ---
+    def select(self, *columns: str, count: Optional[str] = None, head: bool = False) -> "Query":
+        self.op, self.count, self.head = "select", count, head
+        self.columns = ",".join(columns) if columns else "*"
+        return self
+
+    def insert(self, payload, **_) -> "Query":
+        self.op, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = "", ignore_duplicates: bool = False, **_) -> "Query":
+        self.op, self.payload = "upsert", payload
+        self.on_conflict, self.ignore_duplicates = on_conflict or None, ignore_duplicates
+        return self
+
+    def update(self, payload: Dict, **_) -> "Query":
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self, **_) -> "Query":
+        self.op = "delete"
+        return self
+
+    # --- filters ---
+    def _cmp(self, column: str, op: str, value: Any) -> "Query":
+        self.filters.append(("cmp", column, op, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "Query":
+        return self._cmp(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "Query":
+        return self._cmp(column, "neq", value)
+
+    def lt(self, column: str, value: Any) -> "Query":
+        return self._cmp(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "Query":
+        return self._cmp(column, "lte", value)
+
+    def gt(self, column: str, value: Any) -> "Query":
+        return self._cmp(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "Query":
+        return self._cmp(column, "gte", value)
+
+    def in_(self, column: str, values) -> "Query":
+        self.filters.append(("in", column, list(values)))
+        return self
+
+    def is_(self, column: str, value: Any) -> "Query":
+        self.filters.append(("is", column, None if value in (None, "null") else value))
+        return self
+
+    def or_(self, expr: str) -> "Query":
+        self.filters.append(("or", parse_logic(expr)))
+        return self
+
+    # --- shaping ---
+    def order(self, column: str, desc: bool = False, **_) -> "Query":
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n: int) -> "Query":
+        self.limit_n = n
+        return self
+
+    def range(self, start: int, end: int) -> "Query":
+        self.offset_n, self.limit_n = start, end - start + 1
+        return self
+
+    def execute(self) -> Response:
+        return self._client._run(self)
+
+
+class RpcCall:
+    def __init__(self, client: "LocalClient", fn: str, params: Dict):
+        self._client, self.fn, self.params = client, fn, params
+
+    def execute(self) -> Response:
+        from src.storage.rpc import RPCS
+        if self.fn not in RPCS:
+            raise StorageError(f"function {self.fn} does not exist", code="42883")
+        with self._client.lock:
+            return Response(RPCS[self.fn](self._client, self.params or {}))
+
+
+class LocalClient:
+    """Base for local backends; subclasses implement `_run(query)`."""
+
+    name = "local"
+
+    def __init__(self):
+        self.lock = threading.RLock()
+
+    def table(self, name: str) -> Query:
+        if name not in TABLES:
+            raise StorageError(f'relation "{name}" does not exist')
+        return Query(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> RpcCall:
+        return RpcCall(self, fn, params or {})
+
+    def _run(self, query: Query) -> Response:
+        raise NotImplementedError
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+@lru_cache(maxsize=256)
+def _column_names(columns: str) -> Optional[Tuple[str, ...]]:
+    if columns.strip() == "*":
+        return None
+    return tuple(c.strip() for c in columns.split(",") if c.strip())
+
+
+def project(row: Dict, columns: str) -> Dict:
+    names = _column_names(columns)
+    if names is None:
+        return {c: _copy(v) for c, v in row.items()}
+    return {c: _copy(row.get(c)) for c in names}
+
+
+def duplicate_key(table: str, cols) -> StorageError:
+    return StorageError(f'duplicate key value violates unique constraint "{table}_{"_".join(cols)}_key"')
+
@@ -0,0 +1,165 @@
+"""Python versions of the database functions in db/migrations for the local backends.
+
+Each function receives the client and the RPC params and returns the rows
+PostgREST would return. They run under the client lock, standing in for
+the row locks the SQL versions take.
+"""
+from collections import Counter
+from typing import Callable, Dict, List
+
+from src.storage.schema import TABLES
+
+RPCS: Dict[str, Callable] = {}
+
+
+def rpc(name: str):
+    def register(fn):
+        RPCS[name] = fn
+        return fn
+    return register
+
+
+@rpc("increment_likes")
+def increment_likes(db, params: Dict) -> List[Dict]:
+    post = db.table("posts").select("likes").eq("post_id", params["p_post_id"]).execute().data
+    if not post:
+        return []
+    likes = (post[0].get("likes") or 0) + 1
+    return db.table("posts").update({"likes": likes}).eq("post_id", params["p_post_id"]).execute().data
+
+
+@rpc("award_badges")
+def award_badges(db, params: Dict) -> List[str]:
+    viber = db.table("vibers").select("badges").eq("viber_id", params["p_viber_id"]).execute().data
+    if not viber:
+        return []
+    current = viber[0].get("badges") or []
+    missing = [b for b in dict.fromkeys(params["p_badges"]) if b not in current]
+    if missing:
+        db.table("vibers").update({"badges": current + missing}).eq("viber_id", params["p_viber_id"]).execute()
+    return missing
+
+
+@rpc("bump_echo_counters")
+def bump_echo_counters(db, params: Dict) -> List[Dict]:
+    for item in params["p_counts"]:
+        thought = (db.table("thoughts").select("echoes,vibe_score,echo_counts")
+                   .eq("thought_id", item["thought_id"]).execute().data)
+        if not thought:
+            continue
+        counts = dict(thought[0].get("echo_counts") or {})
+        for emotion, n in item["emotions"].items():
+            counts[emotion] = counts.get(emotion, 0) + n
+        db.table("thoughts").update({
+            "echoes": (thought[0].get("echoes") or 0) + item["n"],
+            "vibe_score": (thought[0].get("vibe_score") or 0) + item["score"],
+            "echo_counts": counts,
+        }).eq("thought_id", item["thought_id"]).execute()
+    return []
+
+
+@rpc("award_badges_many")
+def award_badges_many(db, params: Dict) -> List[Dict]:
+    out = []
+    for item in params["p_awards"]:
+        for badge in award_badges(db, {"p_viber_id": item["viber_id"], "p_badges": item["badges"]}):
+            out.append({"viber_id": item["viber_id"], "badge": badge})
+    return out
+
+
+@rpc("get_table_counts")
+def get_table_counts(db, params: Dict) -> List[Dict]:
+    # No triggers locally; counting the rows directly is just as cheap here.
+    counts = []
+    for name in params["p_names"]:
+        id_col = TABLES[name]["id"] or next(iter(TABLES[name]["columns"]))
+        n = db.table(name).select(id_col, count="exact", head=True).execute().count
+        counts.append({"name": name, "n": n})
+    return counts
+
+
+def _bump_members(db, tribe_id: int, delta: int):
+    # Stands in for the viber_tribes triggers in 005_tribe_members.sql.
+    tribe = db.table("tribes").select("member_count").eq("tribe_id", tribe_id).execute().data
+    if tribe:
+        count = max((tribe[0].get("member_count") or 0) + delta, 0)
+        db.table("tribes").update({"member_count": count}).eq("tribe_id", tribe_id).execute()
+
+
+@rpc("join_tribe")
+def join_tribe(db, params: Dict) -> List[Dict]:
+    row = {"viber_id": params["p_viber_id"], "tribe_id": params["p_tribe_id"]}
+    inserted = (db.table("viber_tribes").upsert(row, on_conflict="viber_id,tribe_id", ignore_duplicates=True)
+                .execute().data or [])
+    if inserted:
+        _bump_members(db, params["p_tribe_id"], len(inserted))
+    return inserted
+
+
+@rpc("leave_tribe")
+def leave_tribe(db, params: Dict) -> List[Dict]:
+    deleted = (db.table("viber_tribes").delete().eq("viber_id", params["p_viber_id"])
+               .eq("tribe_id", params["p_tribe_id"]).execute().data or [])
+    if deleted:
+        _bump_members(db, params["p_tribe_id"], -len(deleted))
+    return deleted
+
+
+@rpc("tribes_for_viber")
+def tribes_for_viber(db, params: Dict) -> List[Dict]:
+    joined = {m["tribe_id"]: m["created_at"] for m in
+              db.table("viber_tribes").select("tribe_id,created_at").eq("viber_id", params["p_viber_id"]).execute().data}
+    query = db.table("tribes").select("tribe_id,name,description,member_count,created_at")
+    if params.get("p_joined_only"):
+        query = query.in_("tribe_id", list(joined))
+    return [{**t, "is_member": t["tribe_id"] in joined, "joined_at": joined.get(t["tribe_id"])}
+            for t in query.order("tribe_id").execute().data]
+
+
+def _bump(db, table: str, id_col: str, counter: str, counts: Dict[int, int]):
+    # Stands in for the reverberations triggers in 006_reverberation_threads.sql.
+    for row_id, delta in counts.items():
+        row = db.table(table).select(counter).eq(id_col, row_id).execute().data
+        if row:
+            value = max((row[0].get(counter) or 0) + delta, 0)
+            db.table(table).update({counter: value}).eq(id_col, row_id).execute()
+
+
+@rpc("add_reverberations")
+def add_reverberations(db, params: Dict) -> List[Dict]:
+    rows = [{k: r.get(k) for k in ("thought_id", "viber_id", "content", "parent_id", "import_key")}
+            for r in params["p_rows"]]
+    parent_ids = list({r["parent_id"] for r in rows if r["parent_id"] is not None})
+    parents = {p["reverberation_id"]: p["thought_id"] for p in
+               db.table("reverberations").select("reverberation_id,thought_id").in_("reverberation_id", parent_ids)
+               .execute().data} if parent_ids else {}
+    rows = [r for r in rows if r["parent_id"] is None or parents.get(r["parent_id"]) == r["thought_id"]]
+    if not rows:
+        return []
+    inserted = (db.table("reverberations").upsert(rows, on_conflict="import_key", ignore_duplicates=True)
+                .execute().data or [])
+    _bump(db, "thoughts", "thought_id", "reverberation_count", Counter(r["thought_id"] for r in inserted))
+    _bump(db, "reverberations", "reverberation_id", "reply_count",
+          Counter(r["parent_id"] for r in inserted if r.get("parent_id") is not None))
+    return inserted
+
+
+@rpc("reverberation_counts")
+def reverberation_counts(db, params: Dict) -> List[Dict]:
+    rows = (db.table("reverberations").select("thought_id").in_("thought_id", list(params["p_thought_ids"]))
+            .execute().data)
+    return [{"thought_id": t, "n": n} for t, n in Counter(r["thought_id"] for r in rows).items()]
+
+
+@rpc("reverberation_replies")
+def reverberation_replies(db, params: Dict) -> List[Dict]:
+    per_parent = params.get("p_per_parent", 3)
+    rows = (db.table("reverberations").select("*").in_("parent_id", list(params["p_parent_ids"]))
+            .order("parent_id").order("created_at").order("reverberation_id").execute().data)
+    taken: Counter = Counter()
+    out = []
+    for r in rows:
+        taken[r["parent_id"]] += 1
+        if taken[r["parent_id"]] <= per_parent:
+            out.append(r)
+    return out
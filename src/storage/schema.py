@@ -0,0 +1,98 @@
+"""Table layout shared by the local (SQLite and in-memory) backends.
+
+Mirrors the Supabase tables the DAOs use. Column types are one of
+"int", "text", "json" or "timestamp"; `id` is the auto-increment key and
+`unique` lists the constraints that raise a duplicate-key error.
+"""
+from typing import Dict
+
+TABLES: Dict[str, Dict] = {
+    "vibers": {
+        "id": "viber_id",
+        "columns": {
+            "viber_id": "int", "username": "text", "email": "text", "password": "text",
+            "aura_color": "text", "vibe_level": "int", "badges": "json", "created_at": "timestamp",
+        },
+        "defaults": {"aura_color": "Neutral", "vibe_level": 1, "badges": []},
+        "unique": [("username",)],
+        "indexes": [("created_at", "viber_id")],
+    },
+    "thoughts": {
+        "id": "thought_id",
+        "columns": {
+            "thought_id": "int", "viber_id": "int", "content": "text", "emotion_tag": "text",
+            "echoes": "int", "vibe_score": "int", "echo_counts": "json", "reverberation_count": "int",
+            "import_key": "text", "created_at": "timestamp",
+        },
+        "defaults": {"echoes": 0, "vibe_score": 0, "echo_counts": {}, "reverberation_count": 0},
+        "unique": [("import_key",)],
+        "indexes": [("created_at", "thought_id"), ("viber_id", "created_at")],
+    },
+    "posts": {
+        "id": "post_id",
+        "columns": {
+            "post_id": "int", "user_id": "int", "content": "text", "likes": "int", "import_key": "text",
+            "created_at": "timestamp",
+        },
+        "defaults": {"likes": 0},
+        "unique": [("import_key",)],
+        "indexes": [("created_at", "post_id"), ("user_id",)],
+    },
+    "echoes": {
+        "id": "echo_id",
+        "columns": {
+            "echo_id": "int", "thought_id": "int", "viber_id": "int", "emotion_tag": "text",
+            "created_at": "timestamp",
+        },
+        "defaults": {},
+        "unique": [("thought_id", "viber_id", "emotion_tag")],
+        "indexes": [("thought_id",), ("created_at", "echo_id")],
+    },
+    "reverberations": {
+        "id": "reverberation_id",
+        "columns": {
+            "reverberation_id": "int", "thought_id": "int", "viber_id": "int", "content": "text",
+            "parent_id": "int", "reply_count": "int", "import_key": "text", "created_at": "timestamp",
+        },
+        "defaults": {"reply_count": 0},
+        "unique": [("import_key",)],
+        "indexes": [("thought_id", "created_at", "reverberation_id"), ("parent_id", "created_at", "reverberation_id")],
+    },
+    "soul_links": {
+        "id": "link_id",
+        "columns": {
+            "link_id": "int", "viber_id": "int", "friend_id": "int", "status": "text",
+            "created_at": "timestamp",
+        },
+        "defaults": {"status": "PENDING"},
+        "unique": [("viber_id", "friend_id")],
+        "indexes": [("friend_id",)],
+    },
+    "badges": {
+        "id": "badge_id",
+        "columns": {
+            "badge_id": "int", "name": "text", "description": "text", "aura_color": "text",
+            "vibe_level_required": "int", "created_at": "timestamp",
+        },
+        "defaults": {"vibe_level_required": 1},
+        "unique": [("name",)],
+        "indexes": [],
+    },
+    "tribes": {
+        "id": "tribe_id",
+        "columns": {
+            "tribe_id": "int", "name": "text", "description": "text", "member_count": "int",
+            "created_at": "timestamp",
+        },
+        "defaults": {"member_count": 0},
+        "unique": [("name",)],
+        "indexes": [],
+    },
+    "viber_tribes": {
+        "id": None,
+        "columns": {"viber_id": "int", "tribe_id": "int", "created_at": "timestamp"},
+        "defaults": {},
+        "unique": [("viber_id", "tribe_id")],
+        "indexes": [("tribe_id", "created_at", "viber_id")],
+    },
+}
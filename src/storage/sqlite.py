@@ -0,0 +1,185 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Tuple
+
+from src.storage.query import (
+    LocalClient, Query, Response, StorageError, apply_defaults, coerce, project,
+)
+from src.storage.schema import TABLES
+
+_SQL_TYPES = {"int": "INTEGER", "text": "TEXT", "json": "TEXT", "timestamp": "TEXT"}
+_SQL_OPS = {"eq": "=", "neq": "<>", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+
+
+def _ddl() -> List[str]:
+    statements = []
+    for table, spec in TABLES.items():
+        cols = []
+        for col, kind in spec["columns"].items():
+            if col == spec["id"]:
+                cols.append(f"{col} INTEGER PRIMARY KEY AUTOINCREMENT")
+            else:
+                cols.append(f"{col} {_SQL_TYPES[kind]}")
+        for unique in spec["unique"]:
+            cols.append(f"UNIQUE ({', '.join(unique)})")
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(cols)})")
+        for index in spec["indexes"]:
+            name = f"idx_{table}_{'_'.join(index)}"
+            statements.append(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(index)})")
+    return statements
+
+
+class SQLiteBackend(LocalClient):
+    """SQLite in WAL mode with one connection per thread."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "vibenet.db"):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            for statement in _ddl():
+                conn.execute(statement)
+            self._add_missing_columns(conn)
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection):
+        # Columns added to the schema after a database file was created.
+        for table, spec in TABLES.items():
+            existing = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+            for col, kind in spec["columns"].items():
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {_SQL_TYPES[kind]}")
+                    # ALTER cannot add a UNIQUE constraint; a unique index enforces it the same way.
+                    if (col,) in spec["unique"]:
+                        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{table}_{col} ON {table} ({col})")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    # --- SQL generation ---
+    @staticmethod
+    def _col(table: str, column: str) -> str:
+        # Identifiers cannot be bound as parameters, so only schema columns get through.
+        if column not in TABLES[table]["columns"]:
+            raise StorageError(f"column {table}.{column} does not exist")
+        return column
+
+    def _where(self, table: str, nodes: List[tuple], joiner: str = " AND ") -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for node in nodes:
+            kind = node[0]
+            if kind == "cmp":
+                _, column, op, value = node
+                if op not in _SQL_OPS:
+                    raise StorageError(f"unsupported operator {op}")
+                clauses.append(f"{self._col(table, column)} {_SQL_OPS[op]} ?")
+                params.append(coerce(table, column, value))
+            elif kind == "in":
+                _, column, values = node
+                if not values:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{self._col(table, column)} IN ({', '.join('?' for _ in values)})")
+                params += [coerce(table, column, v) for v in values]
+            elif kind == "is":
+                _, column, value = node
+                column = self._col(table, column)
+                clauses.append(f"{column} IS NULL" if value is None else f"{column} IS ?")
+                if value is not None:
+                    params.append(value)
+            else:
+                sql, sub = self._where(table, node[1], " OR " if kind == "or" else " AND ")
+                clauses.append(f"({sql})")
+                params += sub
+        return joiner.join(clauses) or "1", params
+
+    def _decode(self, table: str, row: sqlite3.Row) -> Dict:
+        spec = TABLES[table]["columns"]
+        out = dict(row)
+        for col, value in out.items():
+            if spec.get(col) == "json" and value is not None:
+                out[col] = json.loads(value)
+        return out
+
+    def _encode(self, table: str, row: Dict) -> Dict:
+        spec = TABLES[table]["columns"]
+        return {c: json.dumps(v) if spec.get(c) == "json" and v is not None else v for c, v in row.items()}
+
+    def _select(self, conn: sqlite3.Connection, query: Query) -> Response:
+        where, params = self._where(query.table, query.filters)
+        count = None
+        if query.count:
+            count = conn.execute(f"SELECT COUNT(*) FROM {query.table} WHERE {where}", params).fetchone()[0]
+        if query.head:
+            return Response([], count)
+        sql = f"SELECT * FROM {query.table} WHERE {where}"
+        if query.orders:
+            sql += " ORDER BY " + ", ".join(f"{self._col(query.table, c)} {'DESC' if d else 'ASC'}"
+                                            for c, d in query.orders)
+        if query.limit_n is not None:
+            sql += f" LIMIT {int(query.limit_n)} OFFSET {int(query.offset_n)}"
+        rows = conn.execute(sql, params).fetchall()
+        return Response([project(self._decode(query.table, r), query.columns) for r in rows], count)
+
+    def _insert(self, conn: sqlite3.Connection, query: Query) -> Response:
+        payload = query.payload if isinstance(query.payload, list) else [query.payload]
+        conflict = ""
+        if query.op == "upsert":
+            if query.ignore_duplicates:
+                conflict = " ON CONFLICT DO NOTHING"
+            else:
+                target = ", ".join(self._col(query.table, c.strip())
+                                   for c in (query.on_conflict or ",".join(TABLES[query.table]["unique"][0])).split(","))
+                conflict = f" ON CONFLICT ({target}) DO UPDATE SET {{updates}}"
+        data = []
+        for item in payload:
+            row = self._encode(query.table, apply_defaults(query.table, item))
+            id_col = TABLES[query.table]["id"]
+            if id_col and row.get(id_col) is None:
+                row.pop(id_col)
+            cols = list(row)
+            sql = f"INSERT INTO {query.table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})"
+            updates = ", ".join(f"{c} = excluded.{c}" for c in item if c != "created_at")
+            sql += conflict.replace("{updates}", updates) + " RETURNING *"
+            data += [self._decode(query.table, r) for r in conn.execute(sql, list(row.values())).fetchall()]
+        return Response(data)
+
+    def _update(self, conn: sqlite3.Connection, query: Query) -> Response:
+        changes = self._encode(query.table, {self._col(query.table, c): coerce(query.table, c, v)
+                                             for c, v in query.payload.items()})
+        where, params = self._where(query.table, query.filters)
+        sets = ", ".join(f"{c} = ?" for c in changes)
+        sql = f"UPDATE {query.table} SET {sets} WHERE {where} RETURNING *"
+        rows = conn.execute(sql, list(changes.values()) + params).fetchall()
+        return Response([self._decode(query.table, r) for r in rows])
+
+    def _delete(self, conn: sqlite3.Connection, query: Query) -> Response:
+        where, params = self._where(query.table, query.filters)
+        rows = conn.execute(f"DELETE FROM {query.table} WHERE {where} RETURNING *", params).fetchall()
+        return Response([self._decode(query.table, r) for r in rows])
+
+    def _run(self, query: Query) -> Response:
+        conn = self._conn()
+        handler = {
+            "select": self._select, "insert": self._insert, "upsert": self._insert,
+            "update": self._update, "delete": self._delete,
+        }.get(query.op)
+        if handler is None:
+            raise StorageError(f"unsupported operation {query.op}")
+        try:
+            with conn:
+                return handler(conn, query)
+        except sqlite3.IntegrityError as e:
+            raise StorageError(f"duplicate key value violates unique constraint ({e})")
@@ -0,0 +1,16 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+
+def to_epoch(ts: Optional[Union[str, float, int, datetime]], default: Optional[float] = None) -> float:
+    """Seconds since the epoch for a Supabase timestamp (ISO string), datetime or number."""
+    if ts is None or ts == "":
+        return time.time() if default is None else default
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()